@@ -0,0 +1,451 @@
+"""
+Asyncio counterpart of LyricsFetcher for use as a library.
+
+AsyncLyricsFetcher shares candidate planning, caching, response parsing,
+cleanup and ranking with LyricsFetcher through BaseLyricsFetcher; only the
+network side differs. Requests go through one pooled aiohttp session, probes
+and hedged requests are tasks instead of threads, and fetch_many streams
+results for any number of songs with a bounded number in flight.
+
+Needs aiohttp (pip install 'lyrics-cli[async]').
+
+    async with AsyncLyricsFetcher(verbose=False) as fetcher:
+        async for result in fetcher.fetch_many(pairs, concurrency=8):
+            print(result['artist'], result['song'], bool(result['lyrics']))
+"""
+
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from lyrics_fetcher import BaseLyricsFetcher
+from metrics import HEDGED_REQUESTS, HTTP_RETRIES, SEARCHES, record_request
+from tracing import span
+from transport import (
+    BodyProbe, DEFAULT_BACKOFF, DEFAULT_HEADERS, DEFAULT_POOL_SIZE, DEFAULT_RATE_LIMIT_RETRIES,
+    DEFAULT_RETRIES, PROBE_CHUNK_SIZE, RETRY_STATUSES, accept_encoding, backoff_delay,
+    check_circuit, endpoint_name, rate_limit_delay, record_response,
+)
+
+class AsyncHttpTransport:
+    """
+    aiohttp version of HttpTransport with the same retry, rate limit and health handling.
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 rate_limiter=None, max_rate_limit_retries=DEFAULT_RATE_LIMIT_RETRIES, log=None):
+        if aiohttp is None:
+            raise ImportError("AsyncLyricsFetcher needs aiohttp: pip install 'lyrics-cli[async]'")
+
+        self.pool_size = max(1, pool_size)
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = rate_limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self._log = log or (lambda message: None)
+        # Created on first use so it belongs to the running event loop
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            headers = dict(DEFAULT_HEADERS)
+            headers['Accept-Encoding'] = accept_encoding()
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, headers=headers)
+        return self._session
+
+    async def get(self, url, timeout, headers=None, health=None, probe=None):
+        """
+        GET a URL and return (status_code, body bytes).
+
+        Retries and raises like HttpTransport.get. With a BodyProbe a 200 body is
+        streamed into the probe like HttpTransport.get does, and None is returned
+        as the body.
+        """
+        endpoint = endpoint_name(url, health)
+        rate_limited = 0
+        attempt = 0
+
+        while True:
+            await self._acquire()
+
+            try:
+                status_code, retry_after, body = await self._send(url, timeout, headers, health, endpoint, probe)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                HTTP_RETRIES.inc(endpoint=endpoint, reason='error')
+                await asyncio.sleep(backoff_delay(self.backoff, attempt))
+                continue
+
+            if status_code in RETRY_STATUSES and attempt < self.retries:
+                attempt += 1
+                HTTP_RETRIES.inc(endpoint=endpoint, reason='gateway')
+                await asyncio.sleep(backoff_delay(self.backoff, attempt))
+                continue
+
+            if status_code == 429 and rate_limited < self.max_rate_limit_retries:
+                delay = rate_limit_delay(retry_after, rate_limited)
+                rate_limited += 1
+                HTTP_RETRIES.inc(endpoint=endpoint, reason='rate_limited')
+
+                self._log(f"⏳ Rate limited by API, waiting {delay:.0f}s")
+                if self.rate_limiter is not None:
+                    self.rate_limiter.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+
+            return status_code, body
+
+    async def _acquire(self):
+        if self.rate_limiter is None:
+            return
+        with span('rate_limit_wait'):
+            while True:
+                wait = self.rate_limiter.try_acquire()
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+
+    async def _send(self, url, timeout, headers, health, endpoint, probe=None):
+        """
+        Send a single request and return (status_code, Retry-After header, body).
+        """
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        check_circuit(health, endpoint)
+        with span('http_get', endpoint=endpoint, url=url) as http_span:
+            start = time.monotonic()
+            try:
+                async with session.get(url, headers=headers, timeout=client_timeout) as response:
+                    status_code = response.status
+                    retry_after = response.headers.get('Retry-After')
+                    if probe is not None and status_code == 200:
+                        body = None
+                        nbytes = await self._read_probe(response, probe)
+                    else:
+                        body = await response.read()
+                        nbytes = len(body)
+            except Exception as e:
+                seconds = time.monotonic() - start
+                if health is not None:
+                    health.record_failure(seconds)
+                record_request(endpoint, 'timeout' if isinstance(e, asyncio.TimeoutError) else 'error', seconds)
+                raise
+
+            seconds = time.monotonic() - start
+            http_span.set('status', status_code)
+            if health is not None:
+                record_response(health, status_code, seconds)
+            record_request(endpoint, status_code, seconds, nbytes)
+            return status_code, retry_after, body
+
+    async def _read_probe(self, response, probe):
+        # Start from an empty body on every attempt, like HttpTransport._read_probe
+        probe.reset()
+        async for chunk in response.content.iter_chunked(PROBE_CHUNK_SIZE):
+            if probe.feed(chunk):
+                # Leaving unread data behind; the connection must not be reused
+                response.close()
+                return probe.size
+        probe.complete = True
+        return probe.size
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class AsyncLyricsFetcher(BaseLyricsFetcher):
+    """
+    Native asyncio lyrics fetcher with the same API as LyricsFetcher, as coroutines.
+
+    The lyrics cache, vault index and miss filter are local files, so every
+    lookup, cache write, miss record (which may autosave the filter) and file
+    write runs in the default executor and never blocks the event loop.
+    """
+    def __init__(self, max_workers=8, search_timeout=12.0, cache=None, rate_limiter=None,
+                 verbose=True, vault_index=None, planner=None, providers=None, hedge=True,
+                 transport=None, writer=None, miss_filter=None, recheck_missing=False,
+                 search_provider=None):
+        super().__init__(
+            max_workers=max_workers, search_timeout=search_timeout, cache=cache,
+            verbose=verbose, vault_index=vault_index, planner=planner,
+            providers=providers, hedge=hedge, writer=writer,
+            miss_filter=miss_filter, recheck_missing=recheck_missing,
+            search_provider=search_provider
+        )
+
+        if transport is None:
+            transport = AsyncHttpTransport(pool_size=max_workers, rate_limiter=rate_limiter, log=self._log)
+        self.transport = transport
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.transport.close()
+
+    async def _in_executor(self, func, *args):
+        """
+        Run blocking local work (SQLite, the miss filter, files) in the default executor.
+        """
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    async def search_songs(self, query, artist=None, use_vault=True):
+        """
+        Search for songs and return a list of matches, like LyricsFetcher.search_songs.
+        """
+        start = time.monotonic()
+        with span('search_songs', query=query, artist=artist):
+            local_results, candidates = await self._in_executor(self._start_search, query, artist, use_vault)
+            if local_results:
+                SEARCHES.observe(time.monotonic() - start, source='vault')
+                return local_results
+
+            if candidates is None:
+                results = await self._search_native(query, artist)
+                if results is not None:
+                    SEARCHES.observe(time.monotonic() - start, source='native')
+                    return results
+                candidates = await self._in_executor(self._plan_candidates, query, artist)
+
+            results = self._finish_search(await self._probe_candidates(candidates))
+            SEARCHES.observe(time.monotonic() - start, source='online')
+            return results
+
+    async def _search_native(self, query, artist=None):
+        """
+        Ask the search provider for ranked matches in one request; None if it failed.
+        """
+        provider = self.search_provider
+        health = provider.health
+        try:
+            with span('native_search', query=query, artist=artist):
+                status_code, body = await self.transport.get(
+                    provider.search_url(query, artist), health.timeout(self.PROBE_TIMEOUT),
+                    headers=provider.headers, health=health
+                )
+                matches = self._parse_search(provider, status_code, body)
+        except Exception as e:
+            self._log(f"⚠️ {provider.name} search failed ({e}), guessing candidates instead")
+            return None
+        return self._native_results(query, artist, matches)
+
+    async def _probe_candidates(self, candidates):
+        """
+        Probe candidates concurrently and return those that have lyrics, in candidate order.
+        """
+        if not candidates:
+            return []
+
+        limit = asyncio.Semaphore(max(1, self.max_workers))
+
+        async def probe(candidate):
+            async with limit:
+                return await self._test_lyrics_availability(candidate['artist'], candidate['song'])
+
+        tasks = [asyncio.ensure_future(probe(c)) for c in candidates]
+        done, not_done = await asyncio.wait(tasks, timeout=self.search_timeout)
+        for task in not_done:
+            task.cancel()
+
+        results = []
+        for candidate, task in zip(candidates, tasks):
+            if task in done and task.exception() is None and task.result():
+                results.append(candidate)
+
+        self._record_probes(len(candidates), len(results), len(not_done))
+        if not_done:
+            self._log(f"⏱️ Search deadline reached, skipped {len(not_done)} slow probe(s)")
+
+        return results
+
+    async def _test_lyrics_availability(self, artist, song_title):
+        try:
+            return await self.probe_lyrics(artist, song_title)
+        except Exception:
+            return False
+
+    async def probe_lyrics(self, artist, song_title):
+        """
+        Check whether lyrics are available, like LyricsFetcher.probe_lyrics.
+        """
+        with span('probe', artist=artist, song=song_title) as probe_span:
+            if await self._in_executor(self._cached_lyrics, artist, song_title):
+                probe_span.set('cached', True)
+                return True
+            if await self._in_executor(self._known_missing, artist, song_title):
+                probe_span.set('known_missing', True)
+                return False
+
+            return await self._probe_provider(self.providers[0], artist, song_title, self.PROBE_TIMEOUT)
+
+    async def _probe_provider(self, provider, artist, song_title, timeout):
+        url = provider.lyrics_url(artist, song_title)
+        health = provider.health
+        probe = BodyProbe(provider.probe_prefix)
+
+        status_code, body = await self.transport.get(
+            url, health.timeout(timeout), headers=provider.headers, health=health, probe=probe
+        )
+        if body is None:
+            body = probe.body
+        # May write the cache or record a miss
+        return await self._in_executor(
+            self._finish_probe, provider, artist, song_title, status_code, body, probe
+        )
+
+    async def _query_provider(self, provider, artist, song_title, timeout):
+        url = provider.lyrics_url(artist, song_title)
+        health = provider.health
+
+        status_code, body = await self.transport.get(
+            url, health.timeout(timeout), headers=provider.headers, health=health
+        )
+        return self._parse_response(provider, status_code, body)
+
+    async def _fetch_hedged(self, artist, song_title, timeout):
+        """
+        Fetch raw lyrics from the providers, hedging slow requests like LyricsFetcher.
+
+        Requests still in flight when one provider wins are cancelled.
+        """
+        providers = self.providers if self.hedge else self.providers[:1]
+        if len(providers) == 1:
+            return await self._query_provider(providers[0], artist, song_title, timeout)
+
+        pending = {}
+        misses = 0
+        last_error = None
+
+        try:
+            remaining = list(providers)
+            deadline = time.monotonic() + timeout
+            hedge_at = deadline
+
+            while remaining or pending:
+                if remaining and (not pending or time.monotonic() >= hedge_at):
+                    provider = remaining.pop(0)
+                    if pending:
+                        self._log(f"🔀 Hedging request to {provider.name}")
+                        HEDGED_REQUESTS.inc(endpoint=provider.name)
+                    task = asyncio.ensure_future(self._query_provider(provider, artist, song_title, timeout))
+                    pending[task] = provider
+                    hedge_at = time.monotonic() + provider.hedge_delay()
+
+                wait_until = hedge_at if remaining else deadline
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(0.0, wait_until - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done and time.monotonic() >= deadline:
+                    raise TimeoutError(f"No provider answered within {timeout}s")
+
+                for task in done:
+                    pending.pop(task)
+                    try:
+                        lyrics = task.result()
+                    except Exception as e:
+                        last_error = e
+                        hedge_at = time.monotonic()
+                        continue
+                    if lyrics:
+                        return lyrics
+                    misses += 1
+                    hedge_at = time.monotonic()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if misses or last_error is None:
+            return None
+        raise last_error
+
+    async def get_lyrics(self, artist, song_title):
+        """
+        Fetch lyrics for a specific artist and song.
+        """
+        try:
+            return await self.fetch_lyrics(artist, song_title)
+        except Exception as e:
+            self._log(f"❌ Error fetching lyrics: {e}")
+            return None
+
+    async def fetch_lyrics(self, artist, song_title):
+        """
+        Fetch lyrics like get_lyrics, but raise on network and API errors.
+        """
+        with span('fetch_lyrics', artist=artist, song=song_title):
+            cached = await self._in_executor(self._cached_lyrics, artist, song_title)
+            if cached:
+                self._log(f"📦 Using cached lyrics for: {artist} - {song_title}")
+                return cached
+            if await self._in_executor(self._known_missing, artist, song_title):
+                self._log(f"🚫 Skipping known missing song: {artist} - {song_title}")
+                return None
+
+            self._log(f"📡 Fetching lyrics for: {artist} - {song_title}")
+
+            raw_lyrics = await self._fetch_hedged(artist, song_title, self.FETCH_TIMEOUT)
+            return await self._in_executor(self._accept_lyrics, artist, song_title, raw_lyrics)
+
+    async def save_lyrics_to_file(self, filename, lyrics_text, song_title, artist, output_dir=None):
+        """
+        Save lyrics to a markdown file without blocking the event loop.
+        """
+        return await self._in_executor(
+            BaseLyricsFetcher.save_lyrics_to_file,
+            self, filename, lyrics_text, song_title, artist, output_dir
+        )
+
+    async def fetch_many(self, pairs, concurrency=8):
+        """
+        Fetch lyrics for (artist, song) pairs, yielding results as they complete.
+
+        Each result is a dict with 'artist', 'song', 'lyrics' (None if the song
+        wasn't found) and 'error' (None unless the fetch failed). Pairs are
+        read lazily, so at most `concurrency` fetches are in flight however
+        long the input is. Results arrive in completion order, not input order.
+        """
+        pairs = iter(pairs)
+        pending = set()
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(pending) < max(1, concurrency):
+                    pair = next(pairs, None)
+                    if pair is None:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self._fetch_one(*pair)))
+
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # The caller stopped iterating early; don't leave fetches running
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_one(self, artist, song_title):
+        result = {'artist': artist, 'song': song_title, 'lyrics': None, 'error': None}
+        try:
+            result['lyrics'] = await self.fetch_lyrics(artist, song_title)
+        except Exception as e:
+            result['error'] = str(e) or e.__class__.__name__
+        return result
@@ -0,0 +1,118 @@
+"""
+Streaming readers for batch input files.
+
+Batch input is read lazily, one record at a time, so multi-million line
+exports never have to fit in memory. Supported formats:
+
+  text   'Artist - Song' per line, '#' starts a comment
+  jsonl  one JSON object per line with artist and title/song keys
+  csv    a header row with artist and title/song columns
+
+A path of '-' reads from stdin.
+"""
+
+import csv
+import json
+import os
+import sys
+
+from batch_runner import BatchEntry, parse_batch_line
+
+INPUT_FORMATS = ('auto', 'text', 'jsonl', 'csv')
+
+# Accepted column/key names, compared case-insensitively
+ARTIST_FIELDS = ('artist', 'artist_name', 'artists')
+TITLE_FIELDS = ('title', 'song', 'song_title', 'track', 'track_name', 'name')
+
+def detect_format(path):
+    """
+    Guess the input format from the file extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension in ('.csv', '.tsv'):
+        return 'csv'
+    return 'text'
+
+def _pick_field(record, names):
+    lowered = {str(k).strip().lower(): v for k, v in record.items()}
+    for name in names:
+        value = lowered.get(name)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return None
+
+def parse_record(line_no, record):
+    """
+    Turn a JSON object or CSV row into a BatchEntry, raising ValueError if incomplete.
+    """
+    artist = _pick_field(record, ARTIST_FIELDS)
+    song_title = _pick_field(record, TITLE_FIELDS)
+    if not artist or not song_title:
+        raise ValueError("Missing artist or title")
+    return BatchEntry(line_no, artist, song_title)
+
+def _parse_jsonl_line(line_no, line):
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON ({e})")
+    # A bare string is treated like a text line
+    if isinstance(record, str):
+        return parse_batch_line(line_no, record)
+    if not isinstance(record, dict):
+        raise ValueError("Expected a JSON object")
+    return parse_record(line_no, record)
+
+def _read_records(f, input_format, delimiter=','):
+    """
+    Yield (line_no, raw record) pairs along with the parser for that format.
+    """
+    if input_format == 'csv':
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            yield reader.line_num, row, parse_record
+    elif input_format == 'jsonl':
+        for line_no, line in enumerate(f, 1):
+            yield line_no, line, _parse_jsonl_line
+    else:
+        for line_no, line in enumerate(f, 1):
+            yield line_no, line, parse_batch_line
+
+def iter_batch_entries(path, input_format='auto', include_invalid=False):
+    """
+    Yield BatchEntry objects from a batch input file as it is read.
+
+    Blank lines and comments are skipped. Malformed records are skipped too,
+    unless include_invalid is set, in which case they are yielded as entries
+    with an `error` message so they can be reported in input order.
+    """
+    if input_format == 'auto':
+        input_format = 'text' if path == '-' else detect_format(path)
+
+    if path == '-':
+        f = sys.stdin
+        close = False
+    else:
+        # newline='' lets the csv module handle quoted line breaks
+        f = open(path, 'r', encoding='utf-8-sig', newline='')
+        close = True
+
+    try:
+        delimiter = '\t' if path.lower().endswith('.tsv') else ','
+        for line_no, record, parse in _read_records(f, input_format, delimiter):
+            try:
+                entry = parse(line_no, record)
+            except ValueError as e:
+                if include_invalid:
+                    yield BatchEntry(line_no, None, None, error=str(e))
+                continue
+            if entry is not None:
+                yield entry
+    finally:
+        if close:
+            f.close()
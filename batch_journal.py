@@ -0,0 +1,113 @@
+"""
+Append-only progress journal for resumable batch runs.
+
+Every processed batch line appends one JSON record to the journal. On
+`--resume` the journal is replayed (the last record for a song wins) so
+songs that were already saved, or that the API reported missing, are
+skipped and only errors are retried.
+
+Only each song's latest status and error count are kept in memory, so
+replaying the journal of a very long batch stays small; the full records
+stay on disk.
+"""
+
+import json
+import os
+import threading
+import time
+
+from lyrics_cache import normalize_key
+
+# Journal statuses that mean a song needs no further work
+COMPLETED_STATUSES = ('saved',)
+# Songs the API doesn't have; resuming only asks again on request
+MISSING_STATUSES = ('not_found',)
+
+# How each BatchResult status is recorded in the journal
+JOURNAL_STATUSES = {
+    'saved': 'saved',
+    'exists': 'saved',
+    'not_found': 'not_found',
+    'save_failed': 'error',
+    'error': 'error',
+}
+
+def journal_path_for(output_dir):
+    """
+    Return the journal path for an output directory: a sibling file named after it.
+    """
+    output_dir = os.path.normpath(os.path.expanduser(output_dir))
+    parent, name = os.path.split(output_dir)
+    return os.path.join(parent, f".{name}.lyrics-journal.jsonl")
+
+class BatchJournal:
+    def __init__(self, path):
+        self.path = path
+        # normalized key -> (status, errors so far) from the song's latest record
+        self._statuses = {}
+        self._lock = threading.Lock()
+        self._load()
+
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        """
+        Replay existing records; a truncated last line from an interrupted run is ignored.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = normalize_key(record['artist'], record['song'])
+                    self._statuses[key] = (record.get('status'), record.get('retries', 0))
+                except (ValueError, KeyError, AttributeError):
+                    continue
+
+    def is_completed(self, artist, song_title):
+        return self.status(artist, song_title) in COMPLETED_STATUSES
+
+    def is_missing(self, artist, song_title):
+        return self.status(artist, song_title) in MISSING_STATUSES
+
+    def status(self, artist, song_title):
+        """
+        Return the last recorded status for this song, or None if it has none.
+        """
+        with self._lock:
+            status, _ = self._statuses.get(normalize_key(artist, song_title), (None, 0))
+        return status
+
+    def record(self, line_no, artist, song_title, status, path=None, error=None):
+        """
+        Append the outcome for one song and flush it to disk immediately.
+        """
+        key = normalize_key(artist, song_title)
+        record = {
+            'line': line_no,
+            'artist': artist,
+            'song': song_title,
+            'status': status,
+            'time': time.time(),
+        }
+        if path:
+            record['path'] = path
+        if error:
+            record['error'] = error
+
+        with self._lock:
+            # Counted under the lock so concurrent failures of one song aren't lost
+            _, retries = self._statuses.get(key, (None, 0))
+            record['retries'] = retries + (1 if status == 'error' else 0)
+            self._statuses[key] = (status, record['retries'])
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,265 @@
+"""
+Parallel batch downloads for the `batch` command.
+
+A batch runs as a streaming pipeline of threads connected by bounded queues:
+
+    reader -> fetch workers (N) -> writer -> caller (results in input order)
+
+At most `window` entries are in flight at once, so memory stays flat no
+matter how long the input is, and the first files are written as soon as
+their lyrics arrive. With a LyricsPack the writer stores rows in the pack
+instead of creating one note per song.
+"""
+
+import os
+import queue
+import threading
+import time
+
+from lyrics_fetcher import sanitize_filename
+from metrics import FILE_WRITES
+from song_keys import display_artist, display_title, song_key
+from tracing import span
+
+class BatchEntry:
+    def __init__(self, line_no, artist, song_title, error=None):
+        self.line_no = line_no
+        self.artist = artist
+        self.song_title = song_title
+        # Set for input lines that could not be parsed
+        self.error = error
+
+class BatchResult:
+    def __init__(self, entry, status, path=None, error=None, lyrics=None):
+        self.entry = entry
+        # 'fetched' (waiting for the writer), 'saved', 'exists', 'not_found',
+        # 'save_failed', 'error' or 'invalid'; 'available' in probe-only runs
+        self.status = status
+        self.path = path
+        self.error = error
+        self.lyrics = lyrics
+
+    @property
+    def ok(self):
+        return self.status in ('saved', 'exists')
+
+def parse_batch_line(line_no, line):
+    """
+    Parse an 'Artist - Song' line into a BatchEntry.
+
+    Returns None for blank lines and comments, and raises ValueError for lines
+    in any other format.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if ' - ' not in line:
+        raise ValueError(f"Invalid format '{line}'")
+
+    artist, song_title = line.split(' - ', 1)
+    return BatchEntry(line_no, artist.strip(), song_title.strip())
+
+def lyrics_filename(artist, song_title):
+    """
+    Return the '<song> - <artist>.md' filename used for saved lyrics.
+
+    Featuring, remaster and live suffixes are left out, so variants of a song
+    share one note.
+    """
+    return f"{sanitize_filename(display_title(song_title))} - {sanitize_filename(display_artist(artist))}.md"
+
+def filename_key(filename):
+    """
+    Return the canonical song key of a '<song> - <artist>.md' filename, or None.
+
+    Filenames lose characters like '/', so compare against
+    `filename_key(lyrics_filename(artist, song))` rather than `song_key`.
+    """
+    stem, extension = os.path.splitext(filename)
+    if extension.lower() != '.md' or ' - ' not in stem:
+        return None
+    song_title, artist = stem.rsplit(' - ', 1)
+    return song_key(artist, song_title)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+class BatchRunner:
+    def __init__(self, fetcher, output_dir, concurrency=1, skip_existing=True, window=None, pack=None,
+                 probe_only=False):
+        self.fetcher = fetcher
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        # Maximum number of entries between the reader and the caller
+        self.window = window or self.concurrency * 4
+        # Optional LyricsPack that receives the lyrics instead of one note per song
+        self.pack = pack
+        self.skip_existing = skip_existing
+        # Only check that lyrics exist: nothing is written and long bodies aren't downloaded
+        self.probe_only = probe_only
+
+        # List the vault once up front so songs already saved cost no network work.
+        # Notes are matched by canonical key, so older names like
+        # 'Song (feat. X) - Artist.md' still count as saved.
+        self.existing_files = {}
+        if skip_existing and pack is None and os.path.isdir(output_dir):
+            for filename in os.listdir(output_dir):
+                key = filename_key(filename)
+                if key is not None:
+                    self.existing_files.setdefault(key, filename)
+
+    def run(self, entries):
+        """
+        Fetch and save every entry from an iterable, reading it lazily.
+
+        Results are yielded in input order regardless of which worker finishes
+        first, so the report is the same from run to run.
+        """
+        fetch_queue = queue.Queue(maxsize=self.window)
+        write_queue = queue.Queue(maxsize=self.window)
+        result_queue = queue.Queue(maxsize=self.window)
+        in_flight = threading.BoundedSemaphore(self.window)
+        stop = threading.Event()
+        reader_error = []
+
+        def reader():
+            try:
+                for seq, entry in enumerate(entries):
+                    # Backpressure: wait until the caller has consumed older results
+                    while not in_flight.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    fetch_queue.put((seq, entry))
+            except Exception as e:
+                reader_error.append(e)
+            finally:
+                for _ in range(self.concurrency):
+                    fetch_queue.put(_DONE)
+
+        def fetch_worker():
+            while True:
+                item = fetch_queue.get()
+                if item is _DONE:
+                    write_queue.put(_DONE)
+                    return
+                seq, entry = item
+                write_queue.put((seq, self.fetch(entry)))
+
+        def writer():
+            remaining = self.concurrency
+            while remaining:
+                item = write_queue.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                seq, result = item
+                result_queue.put((seq, self.write(result)))
+            result_queue.put(_DONE)
+
+        threads = [threading.Thread(target=reader, daemon=True),
+                   threading.Thread(target=writer, daemon=True)]
+        threads += [threading.Thread(target=fetch_worker, daemon=True)
+                    for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+
+        # Reorder buffer; bounded by the in-flight window
+        pending = {}
+        next_seq = 0
+        try:
+            while True:
+                item = result_queue.get()
+                if item is _DONE:
+                    break
+                seq, result = item
+                pending[seq] = result
+                while next_seq in pending:
+                    yield pending.pop(next_seq)
+                    next_seq += 1
+                    in_flight.release()
+        finally:
+            stop.set()
+
+        if reader_error:
+            raise reader_error[0]
+
+    def process(self, entry):
+        """
+        Fetch and save a single entry, turning every outcome into a BatchResult.
+        """
+        return self.write(self.fetch(entry))
+
+    def fetch(self, entry):
+        """
+        Fetch lyrics for an entry; a 'fetched' result still needs to be written.
+        """
+        if entry.error:
+            return BatchResult(entry, 'invalid', error=entry.error)
+
+        if self.pack is not None:
+            if self.skip_existing and self.pack.contains(entry.artist, entry.song_title):
+                return BatchResult(entry, 'exists', path=self.pack.path)
+        else:
+            # Key the entry through its filename so characters the filename
+            # drops (AC/DC -> ACDC) are dropped on both sides
+            key = filename_key(lyrics_filename(entry.artist, entry.song_title))
+            filename = self.existing_files.get(key)
+            if filename is not None:
+                return BatchResult(entry, 'exists', path=os.path.join(self.output_dir, filename))
+
+        if self.probe_only:
+            try:
+                available = self.fetcher.probe_lyrics(entry.artist, entry.song_title)
+            except Exception as e:
+                return BatchResult(entry, 'error', error=str(e))
+            return BatchResult(entry, 'available' if available else 'not_found')
+
+        try:
+            lyrics = self.fetcher.fetch_lyrics(entry.artist, entry.song_title)
+        except Exception as e:
+            return BatchResult(entry, 'error', error=str(e))
+
+        if not lyrics:
+            return BatchResult(entry, 'not_found')
+
+        return BatchResult(entry, 'fetched', lyrics=lyrics)
+
+    def write(self, result):
+        """
+        Save the lyrics of a 'fetched' result; other results pass through unchanged.
+        """
+        if result.status != 'fetched':
+            return result
+
+        entry = result.entry
+        if self.pack is not None:
+            saved_path = self._write_pack(entry, result.lyrics)
+        else:
+            filename = lyrics_filename(entry.artist, entry.song_title)
+            saved_path = self.fetcher.save_lyrics_to_file(
+                filename, result.lyrics, entry.song_title, entry.artist, self.output_dir
+            )
+        # Lyrics aren't needed after the write; don't hold them in the reorder buffer
+        result.lyrics = None
+
+        if not saved_path:
+            result.status = 'save_failed'
+        else:
+            result.status = 'saved'
+            result.path = saved_path
+        return result
+
+    def _write_pack(self, entry, lyrics):
+        """
+        Store lyrics in the pack; returns the pack path, or None if the write failed.
+        """
+        start = time.monotonic()
+        with span('pack_put', artist=entry.artist, song=entry.song_title):
+            try:
+                outcome = self.pack.put(entry.artist, entry.song_title, lyrics)
+            except Exception:
+                FILE_WRITES.observe(time.monotonic() - start, result='error')
+                return None
+        FILE_WRITES.observe(time.monotonic() - start, result=outcome)
+        return self.pack.path
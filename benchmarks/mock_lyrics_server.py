@@ -0,0 +1,262 @@
+"""
+Local stand-in for the lyrics.ovh /v1/<artist>/<song> endpoint and Musixmatch search.
+
+Used by the benchmarks so they never touch the live API. Latency follows a
+log-normal distribution around a median, a fixed share of songs answer 404,
+each block of N requests can end in a burst of HTTP 429 responses with
+a Retry-After header, and lyrics payloads have a configurable size.
+
+Whether a song is found is decided by a hash of its path, so the same song
+always gets the same answer and cache behaviour is reproducible.
+
+It also answers Musixmatch-style /ws/1.1/track.search requests. Searches
+that match a recorded response in benchmarks/recordings are answered with
+that recording; any other search gets a response in the same format.
+
+Run it on its own to point other tools at it:
+
+    python benchmarks/mock_lyrics_server.py --port 8800 --median-ms 80 --not-found-rate 0.2
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, unquote, urlsplit
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+
+# Query parameters that identify a search; tokens and paging are ignored when matching recordings
+SEARCH_PARAMS = ('q', 'q_track', 'q_artist', 'q_track_artist')
+
+class MockConfig:
+    def __init__(self, median_latency=0.05, latency_sigma=0.5, max_latency=2.0,
+                 not_found_rate=0.1, burst_every=0, burst_length=0, retry_after=0.2,
+                 payload_bytes=2000, seed=0):
+        # Response time is log-normal: half the requests are faster than the median
+        self.median_latency = median_latency
+        self.latency_sigma = latency_sigma
+        self.max_latency = max_latency
+        self.not_found_rate = not_found_rate
+        # Out of every `burst_every` requests, `burst_length` in a row answer 429
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.payload_bytes = payload_bytes
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+class MockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.statuses = {}
+
+    def record(self, status):
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def next_request(self):
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def snapshot(self):
+        with self._lock:
+            return {'requests': self.requests, 'statuses': {str(k): v for k, v in sorted(self.statuses.items())}}
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.statuses = {}
+
+def load_recordings(directory=RECORDINGS_DIR):
+    """
+    Load recorded track.search responses, keyed by their search parameters.
+
+    Each file holds a list of {"params": {...}, "response": {...}} entries.
+    """
+    recordings = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                recordings[search_key(entry['params'])] = entry['response']
+    return recordings
+
+def search_key(params):
+    return tuple((name, params[name].strip().lower()) for name in SEARCH_PARAMS if params.get(name))
+
+def musixmatch_envelope(status_code, body=''):
+    return {'message': {'header': {'status_code': status_code, 'execute_time': 0.01}, 'body': body}}
+
+def make_lyrics(song, size):
+    """
+    Build a lyrics text of roughly `size` bytes.
+    """
+    line = f"la la la {song} oh oh oh"
+    lines = []
+    total = 0
+    while total < size:
+        lines.append(line)
+        total += len(line) + 1
+    return '\n'.join(lines)
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API behind its CDN. Headers and body go out in
+    # separate writes, so without TCP_NODELAY delayed ACKs add ~40ms per response.
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        config = server.config
+        number = server.stats.next_request()
+
+        time.sleep(server.sample_latency())
+
+        url = urlsplit(self.path)
+        if url.path.endswith('/track.search'):
+            return self._search(url.query)
+
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if len(parts) != 3 or parts[0] != 'v1':
+            return self._send(400, {'error': 'bad request'})
+
+        # The last `burst_length` requests of every block of `burst_every` are rate limited
+        if config.burst_every and config.burst_length:
+            if (number - 1) % config.burst_every >= config.burst_every - config.burst_length:
+                return self._send(429, {'error': 'Too many requests'},
+                                  {'Retry-After': f"{config.retry_after:g}"})
+
+        _, artist, song = parts
+        bucket = zlib.crc32(f"{artist.lower()}/{song.lower()}".encode('utf-8')) % 10000
+        if bucket < config.not_found_rate * 10000:
+            return self._send(404, {'error': 'No lyrics found'})
+
+        self._send(200, {'lyrics': make_lyrics(song, config.payload_bytes)})
+
+    def _search(self, query):
+        """
+        Answer a Musixmatch track.search from a recording, or with a generated response.
+        """
+        params = {name: values[0] for name, values in parse_qs(query).items()}
+        if not params.get('usertoken'):
+            return self._send(200, musixmatch_envelope(401))
+
+        recorded = self.server.recordings.get(search_key(params))
+        if recorded is not None:
+            return self._send(200, recorded)
+
+        if params.get('q_track'):
+            artist, song = params.get('q_artist', ''), params['q_track']
+        else:
+            artist, _, song = params.get('q_track_artist', params.get('q', '')).rpartition(' - ')
+        if not artist:
+            return self._send(200, musixmatch_envelope(200, {'track_list': []}))
+
+        bucket = zlib.crc32(f"{artist.lower()}/{song.lower()}".encode('utf-8')) % 10000
+        if bucket < self.server.config.not_found_rate * 10000:
+            return self._send(200, musixmatch_envelope(200, {'track_list': []}))
+
+        # The song itself, a live version and a cover, as real searches tend to return
+        tracks = [(artist, song), (artist, f"{song} - Live"), (f"{artist} Tribute Band", song)]
+        track_list = [
+            {'track': {'track_id': bucket * 10 + i, 'track_name': name, 'artist_name': by, 'has_lyrics': 1}}
+            for i, (by, name) in enumerate(tracks)
+        ]
+        self._send(200, musixmatch_envelope(200, {'track_list': track_list}))
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.record(status)
+
+class MockLyricsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, recordings=None):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self.recordings = load_recordings() if recordings is None else recordings
+        self.stats = MockStats()
+        self._random = random.Random(self.config.seed)
+        self._random_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def search_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/ws/1.1"
+
+    def sample_latency(self):
+        config = self.config
+        if config.median_latency <= 0:
+            return 0.0
+        with self._random_lock:
+            latency = self._random.lognormvariate(math.log(config.median_latency), config.latency_sigma)
+        return min(latency, config.max_latency)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock lyrics.ovh and Musixmatch search server for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--median-ms', type=float, default=50.0, help='Median response time in ms')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Log-normal spread of response times')
+    parser.add_argument('--not-found-rate', type=float, default=0.1, help='Share of songs answering 404')
+    parser.add_argument('--burst-every', type=int, default=0, help='Start a 429 burst every N requests')
+    parser.add_argument('--burst-length', type=int, default=0, help='Number of 429 responses per burst')
+    parser.add_argument('--retry-after', type=float, default=0.2, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--payload-bytes', type=int, default=2000, help='Size of each lyrics payload')
+    args = parser.parse_args()
+
+    config = MockConfig(
+        median_latency=args.median_ms / 1000, latency_sigma=args.sigma,
+        not_found_rate=args.not_found_rate, burst_every=args.burst_every,
+        burst_length=args.burst_length, retry_after=args.retry_after,
+        payload_bytes=args.payload_bytes
+    )
+    server = MockLyricsServer(config, args.host, args.port)
+    print(f"🎭 Mock lyrics API on {server.base_url}")
+    print(f"🎭 Mock Musixmatch search on {server.search_url} ({len(server.recordings)} recorded response(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
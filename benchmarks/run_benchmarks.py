@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for search, get and batch against a local mock lyrics API.
+
+Measures search_songs latency (guessed probes and one Musixmatch-style
+track search), get_lyrics throughput and batch songs per second at
+several concurrency levels (plus one batch into a lyrics pack at
+the highest level), with the lyrics cache off so every
+lookup reaches the (mock) network. Results are written as JSON; pass
+--compare with an earlier results file to print the change per metric.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --compare bench.json
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_lyrics_server import MockConfig, MockLyricsServer  # noqa: E402
+
+from batch_runner import BatchEntry, BatchRunner  # noqa: E402
+from lyrics_fetcher import LyricsFetcher  # noqa: E402
+from lyrics_pack import LyricsPack  # noqa: E402
+from main import __version__  # noqa: E402
+from providers import LyricsOvhProvider, MusixmatchSearchProvider  # noqa: E402
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(samples):
+    """
+    Latency summary in milliseconds.
+    """
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'mean_ms': round(1000 * sum(samples) / len(samples), 2),
+        'p50_ms': round(1000 * percentile(samples, 0.5), 2),
+        'p95_ms': round(1000 * percentile(samples, 0.95), 2),
+        'p99_ms': round(1000 * percentile(samples, 0.99), 2),
+        'max_ms': round(1000 * max(samples), 2),
+    }
+
+def songs(count, offset=0):
+    return [(f"Artist {i}", f"Song Number {i}") for i in range(offset, offset + count)]
+
+def make_fetcher(server, max_workers=8):
+    provider = LyricsOvhProvider(server.base_url)
+    return LyricsFetcher(max_workers=max_workers, verbose=False, providers=[provider])
+
+def bench_search(server, count):
+    """
+    search_songs latency for 'Artist - Song' queries and title-only queries with an artist hint.
+    """
+    fetcher = make_fetcher(server)
+    server.stats.reset()
+    latencies = []
+    found = 0
+
+    for i, (artist, song) in enumerate(songs(count, offset=100000)):
+        start = time.perf_counter()
+        if i % 2:
+            results = fetcher.search_songs(song, artist=artist, use_vault=False)
+        else:
+            results = fetcher.search_songs(f"{artist} - {song}", use_vault=False)
+        latencies.append(time.perf_counter() - start)
+        found += bool(results)
+
+    fetcher.transport.close()
+    result = summarize(latencies)
+    result['found'] = found
+    result['upstream'] = server.stats.snapshot()
+    result['requests_per_search'] = round(server.stats.requests / max(1, count), 2)
+    return result
+
+def bench_search_native(server, count):
+    """
+    search_songs through track search, then get_lyrics for the top result, like picking it.
+    """
+    fetcher = make_fetcher(server)
+    fetcher.search_provider = MusixmatchSearchProvider(server.search_url, 'benchmark-token')
+    server.stats.reset()
+    latencies = []
+    found = 0
+    search_requests = 0
+
+    for i, (artist, song) in enumerate(songs(count, offset=100000)):
+        before = server.stats.requests
+        start = time.perf_counter()
+        if i % 2:
+            results = fetcher.search_songs(song, artist=artist, use_vault=False)
+        else:
+            results = fetcher.search_songs(f"{artist} - {song}", use_vault=False)
+        latencies.append(time.perf_counter() - start)
+        search_requests += server.stats.requests - before
+        if results:
+            found += fetcher.get_lyrics(results[0]['artist'], results[0]['song']) is not None
+
+    fetcher.transport.close()
+    result = summarize(latencies)
+    result['found'] = found
+    result['upstream'] = server.stats.snapshot()
+    result['requests_per_search'] = round(search_requests / max(1, count), 2)
+    result['requests_per_pick'] = round(server.stats.requests / max(1, count), 2)
+    return result
+
+def bench_get(server, count, concurrency):
+    """
+    get_lyrics throughput with `concurrency` callers sharing one fetcher.
+    """
+    fetcher = make_fetcher(server, max_workers=concurrency)
+    server.stats.reset()
+    latencies = []
+
+    def timed_get(pair):
+        start = time.perf_counter()
+        lyrics = fetcher.get_lyrics(*pair)
+        return time.perf_counter() - start, lyrics is not None
+
+    start = time.perf_counter()
+    found = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, ok in pool.map(timed_get, songs(count, offset=200000 + 10000 * concurrency)):
+            latencies.append(latency)
+            found += ok
+    elapsed = time.perf_counter() - start
+
+    fetcher.transport.close()
+    result = summarize(latencies)
+    result.update({
+        'concurrency': concurrency,
+        'found': found,
+        'elapsed_s': round(elapsed, 3),
+        'songs_per_s': round(count / elapsed, 2),
+        'upstream': server.stats.snapshot(),
+    })
+    return result
+
+def bench_batch(server, count, concurrency, packed=False):
+    """
+    End-to-end batch throughput: fetch and write `count` songs with BatchRunner.
+
+    With packed=True the songs go into a LyricsPack instead of one note each.
+    """
+    fetcher = make_fetcher(server, max_workers=max(8, concurrency))
+    output_dir = tempfile.mkdtemp(prefix='lyrics-bench-')
+    server.stats.reset()
+    entries = [
+        BatchEntry(i, artist, song)
+        for i, (artist, song) in enumerate(songs(count, offset=300000 + 10000 * concurrency), 1)
+    ]
+
+    statuses = {}
+    pack = LyricsPack(os.path.join(output_dir, 'bench.lyrpack')) if packed else None
+    try:
+        start = time.perf_counter()
+        runner = BatchRunner(fetcher, output_dir, concurrency=concurrency, pack=pack)
+        for batch_result in runner.run(entries):
+            statuses[batch_result.status] = statuses.get(batch_result.status, 0) + 1
+        if pack is not None:
+            pack.close()
+        elapsed = time.perf_counter() - start
+        files = len(os.listdir(output_dir))
+    finally:
+        fetcher.transport.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        'concurrency': concurrency,
+        'packed': packed,
+        'files': files,
+        'songs': count,
+        'elapsed_s': round(elapsed, 3),
+        'songs_per_s': round(count / elapsed, 2),
+        'statuses': statuses,
+        'upstream': server.stats.snapshot(),
+    }
+
+def headline_metrics(results):
+    """
+    Flatten results into {metric name: (value, higher_is_better)} for comparisons.
+    """
+    metrics = {}
+    for name in ('search', 'search_native'):
+        search = results.get(name, {})
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'requests_per_search'):
+            if key in search:
+                metrics[f"{name}.{key}"] = (search[key], False)
+    for run in results.get('get_lyrics', []):
+        metrics[f"get_lyrics.c{run['concurrency']}.songs_per_s"] = (run['songs_per_s'], True)
+        metrics[f"get_lyrics.c{run['concurrency']}.p95_ms"] = (run.get('p95_ms'), False)
+    for run in results.get('batch', []):
+        metrics[f"batch.c{run['concurrency']}.songs_per_s"] = (run['songs_per_s'], True)
+    for run in results.get('batch_pack', []):
+        metrics[f"batch_pack.c{run['concurrency']}.songs_per_s"] = (run['songs_per_s'], True)
+    return metrics
+
+def compare(previous, current):
+    """
+    Print the change of each headline metric between two result files.
+    """
+    before = headline_metrics(previous['results'])
+    after = headline_metrics(current['results'])
+
+    print(f"\n📊 Compared with {previous.get('version')} ({previous.get('timestamp')}):")
+    for name, (value, higher_is_better) in after.items():
+        if name not in before or not before[name][0] or value is None:
+            continue
+        change = (value - before[name][0]) / before[name][0] * 100
+        better = change > 0 if higher_is_better else change < 0
+        marker = "✅" if better or abs(change) < 5 else "⚠️"
+        print(f"  {marker} {name}: {before[name][0]} -> {value} ({change:+.1f}%)")
+
+def parse_levels(text):
+    return [int(level) for level in text.split(',') if level.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark lyrics-cli against a local mock API')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--quick', action='store_true', help='Fewer songs, for a fast sanity run')
+    parser.add_argument('--songs', type=int, default=200, help='Songs per get/batch run (default: 200)')
+    parser.add_argument('--searches', type=int, default=50, help='Number of searches (default: 50)')
+    parser.add_argument('--concurrency', default='1,4,16', help='Concurrency levels (default: 1,4,16)')
+    parser.add_argument('--median-ms', type=float, default=30.0, help='Mock median latency in ms')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Mock log-normal latency spread')
+    parser.add_argument('--not-found-rate', type=float, default=0.1, help='Share of songs answering 404')
+    parser.add_argument('--burst-every', type=int, default=100, help='Block size for 429 bursts (0 disables)')
+    parser.add_argument('--burst-length', type=int, default=3, help='429 responses at the end of each block')
+    parser.add_argument('--retry-after', type=float, default=0.2, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--payload-bytes', type=int, default=2000, help='Lyrics payload size')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the latency distribution')
+    args = parser.parse_args()
+
+    if args.quick:
+        args.songs = min(args.songs, 40)
+        args.searches = min(args.searches, 10)
+
+    config = MockConfig(
+        median_latency=args.median_ms / 1000, latency_sigma=args.sigma,
+        not_found_rate=args.not_found_rate, burst_every=args.burst_every,
+        burst_length=args.burst_length, retry_after=args.retry_after,
+        payload_bytes=args.payload_bytes, seed=args.seed
+    )
+    server = MockLyricsServer(config).start()
+    levels = parse_levels(args.concurrency)
+
+    results = {}
+    try:
+        print(f"⏱️ search_songs x{args.searches}", file=sys.stderr)
+        results['search'] = bench_search(server, args.searches)
+        print(f"⏱️ search_songs x{args.searches} via track search", file=sys.stderr)
+        results['search_native'] = bench_search_native(server, args.searches)
+
+        results['get_lyrics'] = []
+        results['batch'] = []
+        for level in levels:
+            print(f"⏱️ get_lyrics x{args.songs} at concurrency {level}", file=sys.stderr)
+            results['get_lyrics'].append(bench_get(server, args.songs, level))
+            print(f"⏱️ batch x{args.songs} at concurrency {level}", file=sys.stderr)
+            results['batch'].append(bench_batch(server, args.songs, level))
+
+        level = max(levels)
+        print(f"⏱️ batch --pack x{args.songs} at concurrency {level}", file=sys.stderr)
+        results['batch_pack'] = [bench_batch(server, args.songs, level, packed=True)]
+    finally:
+        server.stop()
+
+    report = {
+        'version': __version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'mock': config.to_dict(),
+        'settings': {'songs': args.songs, 'searches': args.searches, 'concurrency': levels},
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark: wall time and import cost of common invocations.
+
+Runs `main.py` under `python -X importtime` for `--version`, `--help` and a
+`get` answered from a pre-filled lyrics cache, and reports the median wall
+time, the total import time and the slowest top-level imports as JSON.
+Exits non-zero if the HTTP stack is imported on a path that never needs it,
+so a stray top-level import shows up as a failure rather than a slow drift.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+sys.path.insert(0, ROOT)
+
+from lyrics_cache import LyricsCache  # noqa: E402
+
+# Modules that must not be imported on the paths checked with `lean=True`
+HEAVY_MODULES = ('requests', 'urllib3', 'http.server', 'aiohttp')
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into {module: (self_us, cumulative_us, depth)}.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+def run_scenario(name, argv, runs, lean):
+    times = []
+    modules = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', MAIN] + argv,
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, cwd=ROOT
+        )
+        times.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{name}: exited with {proc.returncode}")
+        modules = parse_importtime(proc.stderr)
+
+    top_level = sorted(
+        ((module, cumulative) for module, (_, cumulative, depth) in modules.items() if depth == 1),
+        key=lambda item: -item[1]
+    )
+    heavy = sorted(module for module in modules if module in HEAVY_MODULES)
+    return {
+        'argv': argv,
+        'runs': runs,
+        'median_ms': round(1000 * statistics.median(times), 1),
+        'min_ms': round(1000 * min(times), 1),
+        'import_ms': round(sum(self_us for self_us, _, _ in modules.values()) / 1000, 1),
+        'modules': len(modules),
+        'top_imports_ms': {module: round(cumulative / 1000, 1) for module, cumulative in top_level[:8]},
+        'heavy_imports': heavy,
+        'lean': lean,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure lyrics-cli startup time and imports')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per scenario (default: 10)')
+    parser.add_argument('--output', '-o', help='Write results as JSON to this file (default: stdout)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='lyrics-startup-')
+    try:
+        cache_dir = os.path.join(workdir, 'cache')
+        cache = LyricsCache(cache_dir)
+        cache.put('Queen', 'Bohemian Rhapsody', 'Is this the real life?\nIs this just fantasy?')
+        cache.close()
+
+        scenarios = [
+            ('version', ['--version'], True),
+            ('help', ['--help'], True),
+            ('get_cached', ['get', 'Queen', 'Bohemian Rhapsody', '--cache-dir', cache_dir,
+                            '-o', os.path.join(workdir, 'out')], True),
+        ]
+        results = {}
+        for name, argv, lean in scenarios:
+            print(f"⏱️ {name} x{args.runs}", file=sys.stderr)
+            results[name] = run_scenario(name, argv, args.runs, lean)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps({'python': sys.version.split()[0], 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    failures = [name for name, result in results.items() if result['lean'] and result['heavy_imports']]
+    for name in failures:
+        print(f"❌ {name} imported {', '.join(results[name]['heavy_imports'])}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Ranked (artist, title) candidate generation for search_songs.
+
+Every candidate costs a network probe, so candidates are scored before any
+request is sent and only the best few within the probe budget are tried.
+Hypotheses come from the artist hint, the ' - ' / ' by ' splits of the query
+and a local catalog of known artists and titles (the lyrics cache, the saved
+lyrics folder and an optional catalog file), matched by trigram similarity.
+"""
+
+import os
+
+from lyrics_cache import normalize_key
+from vault_index import normalize_text, trigram_similarity, trigrams
+
+DEFAULT_PROBE_BUDGET = 4
+
+# Minimum trigram similarity for a catalog title or artist to count as a match
+MIN_CATALOG_SIMILARITY = 0.5
+
+# Well-known artists seeded into every catalog. They are only used to spot an
+# artist name inside a query like "taylor swift love story", never probed blindly.
+SEED_ARTISTS = [
+    'Taylor Swift', 'Ed Sheeran', 'Drake', 'Adele', 'Post Malone',
+    'Billie Eilish', 'Ariana Grande', 'The Weeknd', 'Justin Bieber',
+    'Harry Styles', 'Dua Lipa', 'Olivia Rodrigo', 'Bad Bunny'
+]
+
+def default_catalog_path():
+    """
+    Return the optional catalog file location, honouring LYRICS_CLI_CATALOG.
+    """
+    env_path = os.environ.get('LYRICS_CLI_CATALOG')
+    if env_path:
+        return os.path.expanduser(env_path)
+    return os.path.join(os.path.expanduser('~'), '.config', 'lyrics-cli', 'catalog.txt')
+
+class _TrigramIndex:
+    """
+    In-memory trigram postings over a set of strings.
+    """
+    def __init__(self):
+        self.items = []
+        self.grams = []
+        self.postings = {}
+
+    def add(self, item, text):
+        grams = trigrams(text)
+        if not grams:
+            return
+        item_id = len(self.items)
+        self.items.append(item)
+        self.grams.append(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(item_id)
+
+    def match(self, text, min_similarity):
+        """
+        Return [(similarity, item)] for indexed strings similar to text, best first.
+        """
+        query_grams = trigrams(text)
+        shared = {}
+        for gram in query_grams:
+            for item_id in self.postings.get(gram, ()):
+                shared[item_id] = shared.get(item_id, 0) + 1
+
+        matches = []
+        for item_id, count in shared.items():
+            union = len(query_grams) + len(self.grams[item_id]) - count
+            similarity = count / union if union else 0.0
+            if similarity >= min_similarity:
+                matches.append((similarity, self.items[item_id]))
+        matches.sort(key=lambda match: match[0], reverse=True)
+        return matches
+
+class Catalog:
+    """
+    Known artists and (artist, title) pairs used to rank search hypotheses.
+    """
+    def __init__(self, seed_artists=SEED_ARTISTS):
+        self._artists = {}
+        # Keyed by canonical song key, so variants of one song are indexed once
+        self._songs = {}
+        self._artist_index = None
+        self._title_index = None
+        for artist in seed_artists:
+            self.add(artist)
+
+    def add(self, artist, song_title=None):
+        artist = artist.strip()
+        if not artist:
+            return
+        self._artists.setdefault(normalize_text(artist), artist)
+        if song_title and song_title.strip():
+            self._songs.setdefault(normalize_key(artist, song_title), (artist, song_title.strip()))
+        # Rebuilt lazily on the next lookup
+        self._artist_index = None
+        self._title_index = None
+
+    def add_many(self, pairs):
+        for artist, song_title in pairs:
+            self.add(artist, song_title)
+
+    def load(self, path):
+        """
+        Load a catalog file with one 'Artist - Title' or bare 'Artist' per line.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if ' - ' in line:
+                    artist, song_title = line.split(' - ', 1)
+                    self.add(artist, song_title)
+                else:
+                    self.add(line)
+
+    def __len__(self):
+        return len(self._songs) + len(self._artists)
+
+    def _build(self):
+        if self._artist_index is None:
+            self._artist_index = _TrigramIndex()
+            for artist in self._artists.values():
+                self._artist_index.add(artist, artist)
+            self._title_index = _TrigramIndex()
+            for artist, song_title in self._songs.values():
+                self._title_index.add((artist, song_title), song_title)
+
+    def match_titles(self, text, min_similarity=MIN_CATALOG_SIMILARITY):
+        self._build()
+        return self._title_index.match(text, min_similarity)
+
+    def match_artists(self, text, min_similarity=MIN_CATALOG_SIMILARITY):
+        self._build()
+        return self._artist_index.match(text, min_similarity)
+
+    def split_known_artist(self, query):
+        """
+        Find known artists that start or end the query and return [(artist, rest)].
+        """
+        words = normalize_text(query).split()
+        splits = []
+        for size in range(1, len(words)):
+            for artist_words, rest_words in ((words[:size], words[size:]), (words[-size:], words[:-size])):
+                artist = self._artists.get(' '.join(artist_words))
+                if artist:
+                    splits.append((artist, ' '.join(rest_words)))
+        return splits
+
+class CandidatePlanner:
+    def __init__(self, catalog=None, probe_budget=DEFAULT_PROBE_BUDGET):
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.probe_budget = probe_budget
+
+    def plan(self, query, artist=None):
+        """
+        Score (artist, song) hypotheses for a query and return the top candidates.
+
+        Candidates are result-shaped dicts (artist, song, confidence, source)
+        with a 'score', best first, at most probe_budget of them.
+        """
+        scored = {}
+
+        def add(test_artist, test_song, score, confidence):
+            test_artist = test_artist.strip()
+            test_song = test_song.strip()
+            if not test_artist or not test_song:
+                return
+            key = normalize_key(test_artist, test_song)
+            if key in scored and scored[key]['score'] >= score:
+                return
+            scored[key] = {
+                'artist': test_artist,
+                'song': test_song,
+                'confidence': confidence,
+                'source': 'lyrics.ovh',
+                'score': score,
+            }
+
+        # Whether the hint or an explicit separator already told us the artist
+        scored_split = bool(artist) or ' - ' in query or ' by ' in query.lower()
+
+        if artist:
+            # Exact combination, then swapped in case the user mixed them up
+            add(artist, query, 1.0, 'high')
+            add(query, artist, 0.6, 'high')
+
+            # A catalog artist close to the hint (typo correction)
+            for similarity, known_artist in self.catalog.match_artists(artist)[:2]:
+                add(known_artist, query, 0.9 * similarity, 'high')
+        elif ' - ' in query:
+            left, right = query.split(' - ', 1)
+            add(left, right, 0.95, 'high')
+            add(right, left, 0.7, 'high')
+        elif ' by ' in query.lower():
+            index = query.lower().index(' by ')
+            add(query[index + 4:], query[:index], 0.95, 'high')
+
+        # Known songs with a similar title
+        for similarity, (known_artist, known_title) in self.catalog.match_titles(query)[:self.probe_budget]:
+            if artist:
+                artist_similarity = trigram_similarity(trigrams(artist), trigrams(known_artist))
+                similarity = 0.6 * similarity + 0.4 * artist_similarity
+            add(known_artist, known_title, 0.85 * similarity, 'medium')
+
+        # A known artist name inside the query, e.g. "queen bohemian rhapsody"
+        if not scored_split:
+            for known_artist, rest in self.catalog.split_known_artist(query):
+                add(known_artist, rest, 0.8, 'medium')
+
+        ranked = sorted(scored.values(), key=lambda candidate: candidate['score'], reverse=True)
+        return ranked[:self.probe_budget]
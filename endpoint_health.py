@@ -0,0 +1,154 @@
+"""
+Per-endpoint health tracking: latency statistics, adaptive timeouts and a
+circuit breaker.
+
+Each provider owns an EndpointHealth. It keeps an EWMA of latency and error
+rate plus a window of recent latencies, derives request timeouts from the
+observed percentiles, and opens its circuit after repeated failures so calls
+fail fast instead of waiting for a dead endpoint to time out. After a
+cool-down the circuit goes half-open and lets a single probe request through
+to test recovery.
+"""
+
+import collections
+import threading
+import time
+
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 5
+
+# Adaptive timeouts are this multiple of the p99 latency, within these bounds
+TIMEOUT_MULTIPLIER = 3.0
+MIN_TIMEOUT = 1.0
+MAX_TIMEOUT = 30.0
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+EWMA_ALPHA = 0.2
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to an endpoint whose circuit is open.
+    """
+
+class LatencyWindow:
+    """
+    Rolling window of recent response times.
+    """
+    def __init__(self, size=LATENCY_WINDOW):
+        self._samples = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, fraction):
+        """
+        Return the given percentile (0..1) of recent samples, or None without enough data.
+        """
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+class EndpointHealth:
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.latency = LatencyWindow()
+        self.ewma_latency = None
+        self.error_rate = 0.0
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Check the circuit before sending a request; raises CircuitOpenError to fail fast.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                # Let exactly one request through to test recovery
+                self._probe_in_flight = True
+                return
+
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open after repeated failures)")
+
+    def record_success(self, seconds):
+        with self._lock:
+            self.latency.record(seconds)
+            self._update_ewma(seconds, 0.0)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self._probe_in_flight = False
+
+    def record_failure(self, seconds=None):
+        with self._lock:
+            if seconds is not None:
+                self.latency.record(seconds)
+            self._update_ewma(seconds, 1.0)
+            self.consecutive_failures += 1
+
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def _update_ewma(self, seconds, error):
+        self.error_rate += EWMA_ALPHA * (error - self.error_rate)
+        if seconds is not None:
+            if self.ewma_latency is None:
+                self.ewma_latency = seconds
+            else:
+                self.ewma_latency += EWMA_ALPHA * (seconds - self.ewma_latency)
+
+    def percentile(self, fraction):
+        return self.latency.percentile(fraction)
+
+    def timeout(self, default):
+        """
+        Request timeout derived from the observed p99 latency, or `default` without enough data.
+        """
+        p99 = self.latency.percentile(0.99)
+        if p99 is None:
+            return default
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, p99 * TIMEOUT_MULTIPLIER))
+
+    def snapshot(self):
+        """
+        Return the current health figures as a dict.
+        """
+        return {
+            'name': self.name,
+            'state': self.state,
+            'ewma_latency': self.ewma_latency,
+            'error_rate': round(self.error_rate, 4),
+            'p50': self.latency.percentile(0.5),
+            'p95': self.latency.percentile(0.95),
+            'p99': self.latency.percentile(0.99),
+            'consecutive_failures': self.consecutive_failures,
+        }
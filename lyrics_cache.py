@@ -0,0 +1,215 @@
+"""
+Persistent on-disk cache for fetched lyrics.
+
+Entries live in a single SQLite database (WAL mode, so several CLI processes
+can read while one writes) and are keyed by the canonical artist/song pair
+from song_keys, so 'Song (feat. X)' and 'song' share one entry.
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache grows past its size limit.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from song_keys import KEY_VERSION, song_key
+
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30 days
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB of lyrics text
+
+# Recount the on-disk total every so many writes, since other processes
+# may be writing to the same database.
+RECOUNT_INTERVAL = 200
+
+def default_cache_dir():
+    """
+    Return the cache directory, honouring LYRICS_CLI_CACHE_DIR and XDG_CACHE_HOME.
+    """
+    env_dir = os.environ.get('LYRICS_CLI_CACHE_DIR')
+    if env_dir:
+        return os.path.expanduser(env_dir)
+
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'lyrics-cli')
+
+def normalize_key(artist, song_title):
+    """
+    Normalize an artist/song pair into the key used for cache lookups.
+    """
+    return song_key(artist, song_title)
+
+def rekey_songs(conn, table):
+    """
+    Recompute the artist_key/song_key columns of a table written with older keys.
+
+    The table's PRAGMA user_version records the key version. When two old
+    keys now share one canonical key, the most recently fetched row is kept.
+    """
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= KEY_VERSION:
+        return
+
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')
+               if row[1] not in ('artist_key', 'song_key')]
+    names = ', '.join(columns)
+    artist_at, song_at = columns.index('artist'), columns.index('song')
+    with conn:
+        rows = conn.execute(f'SELECT {names} FROM {table} ORDER BY fetched_at').fetchall()
+        conn.execute(f'DELETE FROM {table}')
+        conn.executemany(
+            f'INSERT OR REPLACE INTO {table} (artist_key, song_key, {names}) '
+            f'VALUES ({", ".join("?" * (len(columns) + 2))})',
+            [song_key(row[artist_at], row[song_at]) + row for row in rows]
+        )
+        conn.execute(f'PRAGMA user_version={KEY_VERSION}')
+
+class LyricsCache:
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path = os.path.join(self.cache_dir, 'lyrics.sqlite3')
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # One connection shared by the fetcher's worker threads, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lyrics (
+                artist_key  TEXT NOT NULL,
+                song_key    TEXT NOT NULL,
+                artist      TEXT NOT NULL,
+                song        TEXT NOT NULL,
+                lyrics      TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                fetched_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (artist_key, song_key)
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS lyrics_accessed ON lyrics (accessed_at)')
+        self._conn.commit()
+        rekey_songs(self._conn, 'lyrics')
+
+        self._writes = 0
+        self._total_bytes = self._count_bytes()
+
+    def get(self, artist, song_title):
+        """
+        Return cached lyrics for this artist/song, or None on a miss or expired entry.
+        """
+        artist_key, song_key = normalize_key(artist, song_title)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT lyrics, size, fetched_at FROM lyrics WHERE artist_key = ? AND song_key = ?',
+                (artist_key, song_key)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            lyrics, size, fetched_at = row
+            if self.ttl and now - fetched_at > self.ttl:
+                self._conn.execute(
+                    'DELETE FROM lyrics WHERE artist_key = ? AND song_key = ?',
+                    (artist_key, song_key)
+                )
+                self._conn.commit()
+                self._total_bytes -= size
+                return None
+
+            self._conn.execute(
+                'UPDATE lyrics SET accessed_at = ? WHERE artist_key = ? AND song_key = ?',
+                (now, artist_key, song_key)
+            )
+            self._conn.commit()
+            return lyrics
+
+    def put(self, artist, song_title, lyrics):
+        """
+        Store cleaned lyrics for this artist/song and evict old entries if needed.
+        """
+        artist_key, song_key = normalize_key(artist, song_title)
+        size = len(lyrics.encode('utf-8'))
+        now = time.time()
+
+        with self._lock:
+            old = self._conn.execute(
+                'SELECT size FROM lyrics WHERE artist_key = ? AND song_key = ?',
+                (artist_key, song_key)
+            ).fetchone()
+
+            self._conn.execute(
+                'INSERT OR REPLACE INTO lyrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (artist_key, song_key, artist.strip(), song_title.strip(), lyrics, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+
+            self._writes += 1
+            if self._writes % RECOUNT_INTERVAL == 0:
+                self._total_bytes = self._count_bytes()
+
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+
+            self._conn.commit()
+
+    def entries(self):
+        """
+        Yield (artist, song) pairs for every unexpired cache entry.
+        """
+        cutoff = time.time() - self.ttl if self.ttl else 0
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT artist, song FROM lyrics WHERE fetched_at >= ?', (cutoff,)
+            ).fetchall()
+        return rows
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM lyrics')
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _count_bytes(self):
+        row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM lyrics').fetchone()
+        return row[0]
+
+    def _evict(self):
+        """
+        Drop expired entries, then least recently used ones until under max_bytes.
+        Must be called with the lock held.
+        """
+        if self.ttl:
+            self._conn.execute('DELETE FROM lyrics WHERE fetched_at < ?', (time.time() - self.ttl,))
+
+        # Evict down to 90% so we don't run eviction on every subsequent write
+        target = int(self.max_bytes * 0.9)
+        total = self._count_bytes()
+        if total > target:
+            rows = self._conn.execute(
+                'SELECT artist_key, song_key, size FROM lyrics ORDER BY accessed_at'
+            )
+            victims = []
+            for artist_key, song_key, size in rows:
+                if total <= target:
+                    break
+                victims.append((artist_key, song_key))
+                total -= size
+            self._conn.executemany(
+                'DELETE FROM lyrics WHERE artist_key = ? AND song_key = ?', victims
+            )
+
+        self._total_bytes = total
@@ -1,171 +1,284 @@
-import requests
 import re
 import os
 import time
-from urllib.parse import quote
-import json
+import threading
+from providers import MIN_LYRICS_LENGTH, LyricsOvhProvider
+from note_writer import NoteWriter, render_note
+from song_keys import canonical_artist, canonical_title, display_artist, display_title, song_key
+from metrics import (
+    CACHE_LOOKUPS, FILE_WRITES, HEDGED_REQUESTS, MISS_FILTER, PROBE_RESULTS, PROBE_TRANSFERS,
+    SEARCH_PROBES, SEARCHES
+)
+from tracing import span
 
-class LyricsFetcher:
-    def __init__(self):
+# Ranking order for search results (lower sorts first)
+CONFIDENCE_RANK = {'high': 0, 'medium': 1}
+
+class BaseLyricsFetcher:
+    """
+    Configuration and I/O-free logic shared by LyricsFetcher and AsyncLyricsFetcher.
+    
+    Subclasses only add the network side (threads or asyncio); candidate
+    planning, caching, response parsing, cleanup, ranking and duplicate
+    removal live here so the two fetchers can't drift apart.
+    """
+    # Fixed timeouts used until a provider has enough latency samples
+    PROBE_TIMEOUT = 5
+    FETCH_TIMEOUT = 15
+    
+    def __init__(self, max_workers=8, search_timeout=12.0, cache=None, verbose=True,
+                 vault_index=None, planner=None, providers=None, hedge=True, writer=None,
+                 miss_filter=None, recheck_missing=False, search_provider=None):
         # We'll use multiple APIs for better coverage
         self.apis = {
             'lyrics_ovh': 'https://api.lyrics.ovh/v1',
             'musixmatch_alt': 'https://apic-desktop.musixmatch.com/ws/1.1'
         }
         
-    def search_songs(self, query, artist=None):
-        """
-        Search for songs using multiple methods and return a list of matches.
-        """
-        print(f"🔍 Searching for: '{query}'")
-        if artist:
-            print(f"   Artist hint: '{artist}'")
+        # Candidate probes in search_songs run concurrently on a bounded pool
+        # and the whole search gives up after search_timeout seconds.
+        self.max_workers = max_workers
+        self.search_timeout = search_timeout
         
-        results = []
+        # Optional LyricsCache shared by search probes and get_lyrics
+        self.cache = cache
         
-        # Method 1: Try direct search with lyrics.ovh variations
-        results.extend(self._search_lyrics_ovh_variations(query, artist))
+        # Batch workers turn this off and report results themselves
+        self.verbose = verbose
         
-        # Method 2: Try common song variations
-        results.extend(self._search_common_variations(query, artist))
+        # Optional VaultIndex over already saved notes, consulted before the network
+        self.vault_index = vault_index
         
-        # Remove duplicates and return
-        unique_results = self._remove_duplicates(results)
-        return unique_results[:10]  # Limit to top 10 results
+        # Ranks (artist, song) guesses so search only probes the most likely ones.
+        # Built on first search, so fetch-only commands never load the catalog code.
+        # planner_factory, when set, builds it instead of the default planner.
+        self._planner = planner
+        self.planner_factory = None
+        self._planner_lock = threading.Lock()
+        
+        # Lyrics sources in order of preference. get_lyrics hedges to the next one
+        # when the current provider is slower than its recent p95 latency.
+        if providers is None:
+            providers = [LyricsOvhProvider(self.apis['lyrics_ovh'])]
+        self.providers = list(providers)
+        self.hedge = hedge
+        
+        # Optional search API (e.g. MusixmatchSearchProvider) that returns ranked
+        # matches in one request. Without one, search probes guessed pairs.
+        self.search_provider = search_provider
+        
+        # Writes notes atomically and skips notes whose content hasn't changed
+        self.writer = writer if writer is not None else NoteWriter()
+        
+        # Optional MissFilter of songs the API confirmed it doesn't have. Probes and
+        # fetches skip them without a request unless recheck_missing is set.
+        self.miss_filter = miss_filter
+        self.recheck_missing = recheck_missing
+        
+        # Threads that set `active` (background prefetches) log nothing
+        self._quiet = threading.local()
     
-    def _search_lyrics_ovh_variations(self, query, artist=None):
-        """
-        Search using different artist/song combinations.
+    @property
+    def planner(self):
+        with self._planner_lock:
+            if self._planner is None:
+                if self.planner_factory is not None:
+                    self._planner = self.planner_factory()
+                else:
+                    from candidate_planner import CandidatePlanner
+                    self._planner = CandidatePlanner()
+            return self._planner
+    
+    @planner.setter
+    def planner(self, planner):
+        self._planner = planner
+    
+    def _log(self, message):
+        if self.verbose and not getattr(self._quiet, 'active', False):
+            print(message)
+    
+    def _start_search(self, query, artist=None, use_vault=True):
         """
-        results = []
-        search_combinations = []
+        Log the search and answer it from the vault if possible.
         
+        Returns (local_results, candidates): local results when the vault had
+        matches, otherwise the ranked candidates to probe. Candidates are None
+        when a search provider should be asked first.
+        """
+        self._log(f"🔍 Searching for: '{query}'")
         if artist:
-            # If artist is provided, try exact combination
-            search_combinations.append((artist, query))
-            # Try swapped (in case user mixed up artist/song)
-            search_combinations.append((query, artist))
-        else:
-            # Try to split query to guess artist and song
-            if ' - ' in query:
-                parts = query.split(' - ', 1)
-                search_combinations.append((parts[0].strip(), parts[1].strip()))
-                search_combinations.append((parts[1].strip(), parts[0].strip()))
-            elif ' by ' in query.lower():
-                parts = query.lower().split(' by ', 1)
-                search_combinations.append((parts[1].strip(), parts[0].strip()))
-        
-        # Try each combination
-        for test_artist, test_song in search_combinations:
-            if self._test_lyrics_availability(test_artist, test_song):
-                results.append({
-                    'artist': test_artist,
-                    'song': test_song,
-                    'confidence': 'high',
-                    'source': 'lyrics.ovh'
-                })
+            self._log(f"   Artist hint: '{artist}'")
         
-        return results
+        # Songs already saved in the vault are answered locally
+        if use_vault and self.vault_index is not None:
+            local_results = self._search_vault(query, artist)
+            if local_results:
+                self._log(f"📁 Found {len(local_results)} match(es) in your lyrics folder")
+                SEARCH_PROBES.observe(0)
+                return local_results, []
+        
+        if self.search_provider is not None:
+            return None, None
+        return None, self._plan_candidates(query, artist)
     
-    def _search_common_variations(self, query, artist=None):
+    def _plan_candidates(self, query, artist=None):
         """
-        Try common artist names with the query as song title.
+        Rank artist/song guesses locally; only the best few are probed.
         """
-        results = []
+        with span('plan_candidates', query=query, artist=artist):
+            candidates = self.planner.plan(query, artist)
+        SEARCH_PROBES.observe(len(candidates))
+        return candidates
+    
+    def _native_results(self, query, artist, matches):
+        """
+        Turn search provider matches into results, keeping the provider's ranking.
         
-        # Common artist names to try if no artist provided
-        common_artists = [
-            'Taylor Swift', 'Ed Sheeran', 'Drake', 'Adele', 'Post Malone',
-            'Billie Eilish', 'Ariana Grande', 'The Weeknd', 'Justin Bieber',
-            'Harry Styles', 'Dua Lipa', 'Olivia Rodrigo', 'Bad Bunny'
-        ]
-        
-        if not artist:
-            # Try with popular artists
-            for test_artist in common_artists[:5]:  # Limit to avoid too many requests
-                if self._test_lyrics_availability(test_artist, query):
-                    results.append({
-                        'artist': test_artist,
-                        'song': query,
-                        'confidence': 'medium',
-                        'source': 'lyrics.ovh'
-                    })
+        Matches whose title appears in the query (and whose artist matches the
+        hint, if any) are marked high confidence.
+        """
+        SEARCH_PROBES.observe(1)
+        query_words = f" {canonical_title(query)} "
+        wanted_artist = canonical_artist(artist) if artist else None
         
-        return results
+        results = []
+        for match in matches:
+            match_artist, match_title = song_key(match['artist'], match['song'])
+            high = f" {match_title} " in query_words and wanted_artist in (None, match_artist)
+            # 'Song - Remastered 2011' by 'Queen feat. X' is fetched as 'Song' by 'Queen'
+            results.append({
+                'artist': display_artist(match['artist']),
+                'song': display_title(match['song']),
+                'confidence': 'high' if high else 'medium',
+                'source': self.search_provider.name,
+            })
+        return self._finish_search(results)
     
-    def _test_lyrics_availability(self, artist, song_title):
+    def _search_vault(self, query, artist=None):
         """
-        Quick test to see if lyrics are available for this artist/song combination.
+        Look the query up in the local vault index, refreshing it first.
         """
         try:
-            clean_artist = quote(artist.strip())
-            clean_song = quote(song_title.strip())
-            
-            api_url = f"{self.apis['lyrics_ovh']}/{clean_artist}/{clean_song}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(api_url, headers=headers, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return 'lyrics' in data and data['lyrics'] and len(data['lyrics'].strip()) > 10
-            
-            return False
-            
-        except Exception:
-            return False
+            with span('vault_search', query=query):
+                self.vault_index.refresh()
+                return self.vault_index.search(query, artist)
+        except Exception as e:
+            self._log(f"⚠️ Local index unavailable: {e}")
+            return []
+    
+    def _record_probes(self, total, found, timed_out):
+        PROBE_RESULTS.inc(found, result='found')
+        PROBE_RESULTS.inc(total - found - timed_out, result='empty')
+        if timed_out:
+            PROBE_RESULTS.inc(timed_out, result='timed_out')
+    
+    def _finish_search(self, results):
+        """
+        Order probe hits for display: high confidence first, duplicates removed, top 10.
+        """
+        results = sorted(results, key=lambda r: CONFIDENCE_RANK.get(r['confidence'], len(CONFIDENCE_RANK)))
+        unique_results = self._remove_duplicates(results)
+        return unique_results[:10]  # Limit to top 10 results
     
     def _remove_duplicates(self, results):
         """
-        Remove duplicate results based on artist and song combination.
+        Remove duplicate results: songs whose canonical artist/song keys match.
         """
         seen = set()
         unique_results = []
         
         for result in results:
-            key = (result['artist'].lower(), result['song'].lower())
+            key = song_key(result['artist'], result['song'])
             if key not in seen:
                 seen.add(key)
                 unique_results.append(result)
         
         return unique_results
     
-    def get_lyrics(self, artist, song_title):
+    def _cached_lyrics(self, artist, song_title):
+        if self.cache is None:
+            return None
+        with span('cache_get', artist=artist, song=song_title) as cache_span:
+            lyrics = self.cache.get(artist, song_title)
+            cache_span.set('hit', bool(lyrics))
+        CACHE_LOOKUPS.inc(result='hit' if lyrics else 'miss')
+        return lyrics
+    
+    def _known_missing(self, artist, song_title):
         """
-        Fetch lyrics for a specific artist and song.
+        True if the miss filter says the API doesn't have this song.
         """
-        try:
-            clean_artist = quote(artist.strip())
-            clean_song = quote(song_title.strip())
-            
-            api_url = f"{self.apis['lyrics_ovh']}/{clean_artist}/{clean_song}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json'
-            }
-            
-            print(f"📡 Fetching lyrics for: {artist} - {song_title}")
-            
-            response = requests.get(api_url, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'lyrics' in data and data['lyrics']:
-                    lyrics = data['lyrics'].strip()
-                    # Clean up excessive newlines
-                    lyrics = re.sub(r'\n{3,}', '\n\n', lyrics)
-                    return lyrics
-            
-            return None
-            
-        except Exception as e:
-            print(f"❌ Error fetching lyrics: {e}")
+        if self.miss_filter is None or self.recheck_missing:
+            return False
+        if self.miss_filter.might_contain(artist, song_title):
+            MISS_FILTER.inc(result='skipped')
+            return True
+        return False
+    
+    def _record_missing(self, artist, song_title):
+        if self.miss_filter is not None:
+            self.miss_filter.add(artist, song_title)
+            MISS_FILTER.inc(result='recorded')
+    
+    def _accept_probe(self, artist, song_title, raw_lyrics):
+        """
+        Decide whether a probe found usable lyrics, caching them if so.
+        """
+        if raw_lyrics and len(raw_lyrics.strip()) > MIN_LYRICS_LENGTH:
+            if self.cache is not None:
+                self._store_lyrics(artist, song_title, self._clean(raw_lyrics))
+            return True
+        if not raw_lyrics:
+            self._record_missing(artist, song_title)
+        return False
+    
+    def _finish_probe(self, provider, artist, song_title, status_code, body, probe):
+        """
+        Decide a probe from a streamed response (see transport.BodyProbe).
+        
+        Lyrics seen early are enough: an abandoned body isn't parsed at all, and a
+        complete one is only decoded if it goes into the cache. Responses the
+        probe couldn't decide are parsed in full like any other.
+        """
+        if status_code == 200 and probe.available:
+            if not probe.complete:
+                PROBE_TRANSFERS.inc(result='aborted')
+                return True
+            if self.cache is None:
+                PROBE_TRANSFERS.inc(result='not_decoded')
+                return True
+            PROBE_TRANSFERS.inc(result='cached')
+        return self._accept_probe(artist, song_title, self._parse_response(provider, status_code, body))
+    
+    def _accept_lyrics(self, artist, song_title, raw_lyrics):
+        """
+        Clean and cache fetched lyrics; returns None if there were none.
+        """
+        if not raw_lyrics:
+            self._record_missing(artist, song_title)
             return None
+        
+        lyrics = self._clean(raw_lyrics)
+        if self.cache is not None:
+            self._store_lyrics(artist, song_title, lyrics)
+        return lyrics
+    
+    def _clean(self, raw_lyrics):
+        with span('clean_lyrics', size=len(raw_lyrics)):
+            return clean_lyrics(raw_lyrics)
+    
+    def _store_lyrics(self, artist, song_title, lyrics):
+        with span('cache_put', artist=artist, song=song_title):
+            self.cache.put(artist, song_title, lyrics)
+    
+    def _parse_response(self, provider, status_code, body):
+        """
+        Decode a provider response body and hand it to the provider's parser.
+        """
+        return provider.parse_lyrics(status_code, decode_json(body))
+    
+    def _parse_search(self, provider, status_code, body):
+        return provider.parse_search(status_code, decode_json(body))
     
     def save_lyrics_to_file(self, filename, lyrics_text, song_title, artist, output_dir=None):
         """
@@ -174,35 +287,380 @@ class LyricsFetcher:
         if output_dir is None:
             output_dir = "/home/archboyknm/Documents/Obsidian/Lyrics/"
         
-        try:
-            # Ensure .md extension
-            if not filename.lower().endswith('.md'):
-                filename += '.md'
+        with span('save_lyrics_to_file', filename=filename):
+            start = time.monotonic()
+            try:
+                # Ensure .md extension
+                if not filename.lower().endswith('.md'):
+                    filename += '.md'
+                
+                # Create full path
+                full_path = os.path.join(output_dir, filename)
+                
+                result = self.writer.write(full_path, render_note(song_title, artist, lyrics_text))
+                
+                FILE_WRITES.observe(time.monotonic() - start, result=result)
+                if result == 'unchanged':
+                    self._log(f"✅ Lyrics already up to date: {full_path}")
+                else:
+                    self._log(f"✅ Lyrics saved to: {full_path}")
+                return full_path
+                
+            except Exception as e:
+                FILE_WRITES.observe(time.monotonic() - start, result='error')
+                self._log(f"❌ Error saving file: {e}")
+                return None
+
+class LyricsFetcher(BaseLyricsFetcher):
+    def __init__(self, max_workers=8, search_timeout=12.0, cache=None, rate_limiter=None,
+                 verbose=True, vault_index=None, planner=None, providers=None, hedge=True,
+                 transport=None, writer=None, miss_filter=None, recheck_missing=False,
+                 search_provider=None):
+        super().__init__(
+            max_workers=max_workers, search_timeout=search_timeout, cache=cache,
+            verbose=verbose, vault_index=vault_index, planner=planner,
+            providers=providers, hedge=hedge, writer=writer,
+            miss_filter=miss_filter, recheck_missing=recheck_missing,
+            search_provider=search_provider
+        )
+        
+        # Every request goes through one pooled, keep-alive transport, which also
+        # applies the optional rate limiter shared by all requests. It is created
+        # on first use so cache hits never import the HTTP stack.
+        self._transport = transport
+        self._rate_limiter = rate_limiter
+        self._transport_lock = threading.Lock()
+    
+    @property
+    def transport(self):
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    from transport import HttpTransport
+                    self._transport = HttpTransport(
+                        pool_size=self.max_workers, rate_limiter=self._rate_limiter, log=self._log
+                    )
+        return self._transport
+    
+    def search_songs(self, query, artist=None, use_vault=True):
+        """
+        Search for songs using multiple methods and return a list of matches.
+        """
+        start = time.monotonic()
+        with span('search_songs', query=query, artist=artist):
+            local_results, candidates = self._start_search(query, artist, use_vault)
+            if local_results:
+                SEARCHES.observe(time.monotonic() - start, source='vault')
+                return local_results
             
-            # Create full path
-            full_path = os.path.join(output_dir, filename)
+            if candidates is None:
+                results = self._search_native(query, artist)
+                if results is not None:
+                    SEARCHES.observe(time.monotonic() - start, source='native')
+                    return results
+                candidates = self._plan_candidates(query, artist)
             
-            # Create directory if it doesn't exist
-            os.makedirs(output_dir, exist_ok=True)
+            # Probe every candidate at once instead of one after another
+            results = self._finish_search(self._probe_candidates(candidates))
+            SEARCHES.observe(time.monotonic() - start, source='online')
+            return results
+    
+    def _search_native(self, query, artist=None):
+        """
+        Ask the search provider for ranked matches in one request; None if it failed.
+        """
+        provider = self.search_provider
+        health = provider.health
+        try:
+            with span('native_search', query=query, artist=artist):
+                response = self.transport.get(
+                    provider.search_url(query, artist), health.timeout(self.PROBE_TIMEOUT),
+                    headers=provider.headers, health=health
+                )
+                matches = self._parse_search(provider, response.status_code, response.content)
+        except Exception as e:
+            self._log(f"⚠️ {provider.name} search failed ({e}), guessing candidates instead")
+            return None
+        return self._native_results(query, artist, matches)
+    
+    def _probe_candidates(self, candidates):
+        """
+        Test all candidates concurrently and return the available ones in their original order.
+        
+        Probes that have not started when the search deadline passes are skipped;
+        probes already in flight are abandoned and counted as misses. They run on
+        daemon threads, so abandoned probes never hold up the program's exit.
+        """
+        if not candidates:
+            return []
+        
+        import queue
+        
+        deadline = time.monotonic() + self.search_timeout
+        todo = queue.Queue()
+        for index, candidate in enumerate(candidates):
+            todo.put((index, candidate))
+        answers = queue.Queue()
+        
+        def worker():
+            while time.monotonic() < deadline:
+                try:
+                    index, candidate = todo.get_nowait()
+                except queue.Empty:
+                    return
+                answers.put((index, self._test_lyrics_availability(candidate['artist'], candidate['song'])))
+        
+        workers = max(1, min(self.max_workers, len(candidates)))
+        for _ in range(workers):
+            threading.Thread(target=worker, name='search-probe', daemon=True).start()
+        
+        found = {}
+        while len(found) < len(candidates):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                index, available = answers.get(timeout=remaining)
+            except queue.Empty:
+                break
+            found[index] = available
+        
+        results = [candidate for index, candidate in enumerate(candidates) if found.get(index)]
+        timed_out = len(candidates) - len(found)
+        
+        self._record_probes(len(candidates), len(results), timed_out)
+        if timed_out:
+            self._log(f"⏱️ Search deadline reached, skipped {timed_out} slow probe(s)")
+        
+        return results
+    
+    def _test_lyrics_availability(self, artist, song_title):
+        """
+        Quick test to see if lyrics are available for this artist/song combination.
+        
+        The response is streamed and the test ends as soon as its first bytes show
+        lyrics. Short bodies are still read to the end and stored in the cache, so
+        a later get_lyrics for the same song costs no request.
+        """
+        try:
+            return self.probe_lyrics(artist, song_title)
+        except Exception:
+            return False
+    
+    def probe_lyrics(self, artist, song_title):
+        """
+        Check whether lyrics are available without necessarily downloading them.
+        
+        Like the search probes, but raises on network and API errors so callers
+        can tell a missing song apart from a failed check.
+        """
+        with span('probe', artist=artist, song=song_title) as probe_span:
+            if self._cached_lyrics(artist, song_title):
+                probe_span.set('cached', True)
+                return True
+            if self._known_missing(artist, song_title):
+                probe_span.set('known_missing', True)
+                return False
             
-            with open(full_path, 'w', encoding='utf-8') as f:
-                # Write header
-                f.write(f"# {song_title}\n")
-                f.write(f"**Artist:** {artist}\n\n")
-                f.write("---\n\n")
-                
-                # Write lyrics
-                f.write(lyrics_text)
-                f.write("\n\n")
-                f.write("---\n")
-                f.write(f"\n*Fetched using Lyrics API*\n")
+            # Probes only ask the primary provider; hedging every probe would double the load
+            return self._probe_provider(self.providers[0], artist, song_title, self.PROBE_TIMEOUT)
+    
+    def _probe_provider(self, provider, artist, song_title, timeout):
+        """
+        Ask one provider whether it has lyrics, streaming the response into a BodyProbe.
+        """
+        from transport import BodyProbe
+        
+        url = provider.lyrics_url(artist, song_title)
+        health = provider.health
+        probe = BodyProbe(provider.probe_prefix)
+        
+        response = self.transport.get(
+            url, health.timeout(timeout), headers=provider.headers, health=health, probe=probe
+        )
+        body = probe.body if response.status_code == 200 else response.content
+        return self._finish_probe(provider, artist, song_title, response.status_code, body, probe)
+    
+    def _query_provider(self, provider, artist, song_title, timeout):
+        """
+        Ask one provider for raw lyrics.
+        
+        `timeout` is used until the provider has enough latency samples; after that
+        the timeout adapts to the provider's observed latency.
+        """
+        url = provider.lyrics_url(artist, song_title)
+        health = provider.health
+        
+        response = self.transport.get(url, health.timeout(timeout), headers=provider.headers, health=health)
+        return self._parse_response(provider, response.status_code, response.content)
+    
+    def _fetch_hedged(self, artist, song_title, timeout):
+        """
+        Fetch raw lyrics from the providers, hedging slow requests.
+        
+        The first provider is asked right away. If it hasn't answered within its
+        recent p95 latency, or it answers without lyrics or fails, the next
+        provider is asked too. The first answer with lyrics wins; requests still
+        in flight are left to finish on daemon threads so they never hold up
+        the caller or interpreter exit. Returns None if no provider has the
+        song and raises the last error if every provider failed.
+        """
+        providers = self.providers if self.hedge else self.providers[:1]
+        if len(providers) == 1:
+            return self._query_provider(providers[0], artist, song_title, timeout)
+        
+        import queue
+        
+        answers = queue.Queue()
+        
+        def ask(provider):
+            try:
+                answers.put((provider, self._query_provider(provider, artist, song_title, timeout), None))
+            except Exception as e:
+                answers.put((provider, None, e))
+        
+        in_flight = 0
+        misses = 0
+        last_error = None
+        remaining = list(providers)
+        deadline = time.monotonic() + timeout
+        hedge_at = deadline
+        
+        while remaining or in_flight:
+            if remaining and (not in_flight or time.monotonic() >= hedge_at):
+                provider = remaining.pop(0)
+                if in_flight:
+                    self._log(f"🔀 Hedging request to {provider.name}")
+                    HEDGED_REQUESTS.inc(endpoint=provider.name)
+                # Daemon threads: a request that loses the race must not hold up exit
+                threading.Thread(target=ask, args=(provider,), name='hedge', daemon=True).start()
+                in_flight += 1
+                hedge_at = time.monotonic() + provider.hedge_delay()
             
-            print(f"✅ Lyrics saved to: {full_path}")
-            return full_path
+            wait_until = hedge_at if remaining else deadline
+            try:
+                provider, lyrics, error = answers.get(timeout=max(0.0, wait_until - time.monotonic()))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"No provider answered within {timeout}s")
+                continue
             
+            in_flight -= 1
+            if error is not None:
+                last_error = error
+                # Don't wait for the hedge delay to try the next provider
+                hedge_at = time.monotonic()
+                continue
+            if lyrics:
+                return lyrics
+            misses += 1
+            hedge_at = time.monotonic()
+        
+        if misses or last_error is None:
+            return None
+        raise last_error
+    
+    def get_lyrics(self, artist, song_title):
+        """
+        Fetch lyrics for a specific artist and song.
+        """
+        try:
+            return self.fetch_lyrics(artist, song_title)
         except Exception as e:
-            print(f"❌ Error saving file: {e}")
+            self._log(f"❌ Error fetching lyrics: {e}")
             return None
+    
+    def prefetch_lyrics(self, artist, song_title):
+        """
+        fetch_lyrics without any log output, for downloads started in the background.
+        """
+        self._quiet.active = True
+        try:
+            return self.fetch_lyrics(artist, song_title)
+        finally:
+            self._quiet.active = False
+    
+    def fetch_lyrics(self, artist, song_title):
+        """
+        Fetch lyrics like get_lyrics, but raise on network and API errors.
+        
+        Returns None only when the API answered that it has no lyrics for the song,
+        so callers can tell a missing song apart from a failed request.
+        """
+        with span('fetch_lyrics', artist=artist, song=song_title):
+            cached = self._cached_lyrics(artist, song_title)
+            if cached:
+                self._log(f"📦 Using cached lyrics for: {artist} - {song_title}")
+                return cached
+            if self._known_missing(artist, song_title):
+                self._log(f"🚫 Skipping known missing song: {artist} - {song_title}")
+                return None
+            
+            self._log(f"📡 Fetching lyrics for: {artist} - {song_title}")
+            
+            raw_lyrics = self._fetch_hedged(artist, song_title, self.FETCH_TIMEOUT)
+            return self._accept_lyrics(artist, song_title, raw_lyrics)
+    
+    def revalidate_lyrics(self, artist, song_title, etag=None, last_modified=None):
+        """
+        Ask the primary provider for fresh lyrics, bypassing the cache.
+        
+        Validators from an earlier answer are sent as If-None-Match and
+        If-Modified-Since, so providers that support conditional requests can
+        answer 304 without a body. Returns (status, lyrics, etag, last_modified)
+        with status 'not_modified', 'found' or 'not_found'; raises on network
+        and API errors.
+        """
+        provider = self.providers[0]
+        headers = dict(provider.headers or {})
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        with span('revalidate_lyrics', artist=artist, song=song_title) as revalidate_span:
+            url = provider.lyrics_url(artist, song_title)
+            health = provider.health
+            response = self.transport.get(
+                url, health.timeout(self.FETCH_TIMEOUT), headers=headers or None, health=health
+            )
+            etag = response.headers.get('ETag') or etag
+            last_modified = response.headers.get('Last-Modified') or last_modified
+            revalidate_span.set('status', response.status_code)
+            
+            if response.status_code == 304:
+                return 'not_modified', None, etag, last_modified
+            
+            raw_lyrics = self._parse_response(provider, response.status_code, response.content)
+            lyrics = self._accept_lyrics(artist, song_title, raw_lyrics)
+            return ('found' if lyrics else 'not_found'), lyrics, etag, last_modified
+
+def result_emoji(result):
+    """
+    Pick the emoji shown next to a search result.
+    """
+    if result.get('source') == 'vault':
+        return "📁"
+    return "🎯" if result['confidence'] == 'high' else "🎲"
+
+def decode_json(body):
+    """
+    Decode a JSON response body; None if it is empty or not JSON.
+    """
+    import json
+    
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+def clean_lyrics(raw_lyrics):
+    """
+    Normalize lyrics text returned by the API.
+    """
+    lyrics = raw_lyrics.strip()
+    # Clean up excessive newlines
+    return re.sub(r'\n{3,}', '\n\n', lyrics)
 
 def sanitize_filename(filename):
     """
@@ -218,11 +676,12 @@ def sanitize_filename(filename):
     
     return filename.strip()
 
-def interactive_search_and_download():
+def interactive_search_and_download(fetcher=None):
     """
     Interactive function to search and download lyrics.
     """
-    fetcher = LyricsFetcher()
+    if fetcher is None:
+        fetcher = LyricsFetcher()
     
     print("🎵 LYRICS SEARCH & DOWNLOAD 🎵")
     print("=" * 40)
@@ -249,8 +708,7 @@ def interactive_search_and_download():
     print("=" * 40)
     
     for i, result in enumerate(results, 1):
-        confidence_emoji = "🎯" if result['confidence'] == 'high' else "🎲"
-        print(f"{i:2d}. {confidence_emoji} {result['artist']} - {result['song']}")
+        print(f"{i:2d}. {result_emoji(result)} {result['artist']} - {result['song']}")
     
     print(f"{len(results) + 1:2d}. ❌ None of these (exit)")
     
@@ -266,13 +724,17 @@ def interactive_search_and_download():
         if 1 <= choice_num <= len(results):
             selected = results[choice_num - 1]
             
+            if selected.get('source') == 'vault':
+                print(f"\n📁 Already saved: {selected['path']}")
+                return
+            
             # Fetch and save lyrics
             lyrics = fetcher.get_lyrics(selected['artist'], selected['song'])
             
             if lyrics:
                 # Create filename
-                safe_song = sanitize_filename(selected['song'])
-                safe_artist = sanitize_filename(selected['artist'])
+                safe_song = sanitize_filename(display_title(selected['song']))
+                safe_artist = sanitize_filename(display_artist(selected['artist']))
                 filename = f"{safe_song} - {safe_artist}.md"
                 
                 # Get output directory
@@ -0,0 +1,147 @@
+"""
+Packed lyrics archive: a whole library in one compressed SQLite file.
+
+`batch --pack library.lyrpack` stores each song as one row (artist, title,
+zlib-compressed lyrics and fetch time) instead of one markdown note per song,
+so a library of hundreds of thousands of songs is one file to create, back
+up and sync. `export` writes selected entries back out as regular notes.
+
+Rows are committed one by one in WAL mode without fsync, which costs about
+as much as an append and keeps the pack consistent with the batch journal
+if a run is interrupted.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from lyrics_cache import normalize_key, rekey_songs
+from song_keys import canonical_artist, canonical_title
+
+PACK_EXTENSION = '.lyrpack'
+
+# zlib level 6 is close to level 9 on short texts at a fraction of the CPU
+COMPRESSION_LEVEL = 6
+
+class LyricsPack:
+    def __init__(self, path):
+        self.path = path
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+        # One connection shared by the batch workers, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS songs (
+                artist_key  TEXT NOT NULL,
+                song_key    TEXT NOT NULL,
+                artist      TEXT NOT NULL,
+                song        TEXT NOT NULL,
+                lyrics      BLOB NOT NULL,
+                size        INTEGER NOT NULL,
+                fetched_at  REAL NOT NULL,
+                PRIMARY KEY (artist_key, song_key)
+            )
+        """)
+        self._conn.commit()
+        rekey_songs(self._conn, 'songs')
+
+    def put(self, artist, song_title, lyrics, fetched_at=None):
+        """
+        Store lyrics for this artist/song. Returns 'saved', or 'unchanged' if identical lyrics are stored.
+        """
+        artist_key, song_key = normalize_key(artist, song_title)
+        data = lyrics.encode('utf-8')
+        blob = zlib.compress(data, COMPRESSION_LEVEL)
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT lyrics FROM songs WHERE artist_key = ? AND song_key = ?',
+                (artist_key, song_key)
+            ).fetchone()
+            if row is not None and row[0] == blob:
+                return 'unchanged'
+
+            self._conn.execute(
+                'INSERT OR REPLACE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (artist_key, song_key, artist.strip(), song_title.strip(), blob, len(data),
+                 fetched_at if fetched_at is not None else time.time())
+            )
+            self._conn.commit()
+        return 'saved'
+
+    def get(self, artist, song_title):
+        """
+        Return the stored lyrics for this artist/song, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT lyrics FROM songs WHERE artist_key = ? AND song_key = ?',
+                normalize_key(artist, song_title)
+            ).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def contains(self, artist, song_title):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM songs WHERE artist_key = ? AND song_key = ?',
+                normalize_key(artist, song_title)
+            ).fetchone()
+        return row is not None
+
+    def entries(self, artist=None, song_title=None):
+        """
+        Yield (artist, song, lyrics, fetched_at) for every entry, in artist/song order.
+
+        `artist` and `song_title` select entries whose canonical names contain
+        theirs, so case, accents and punctuation don't matter.
+        """
+        clauses = []
+        params = []
+        if artist:
+            clauses.append('instr(artist_key, ?) > 0')
+            params.append(canonical_artist(artist))
+        if song_title:
+            clauses.append('instr(song_key, ?) > 0')
+            params.append(canonical_title(song_title))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self._lock:
+            keys = self._conn.execute(
+                f'SELECT artist_key, song_key FROM songs {where} ORDER BY artist_key, song_key', params
+            ).fetchall()
+
+        # Decompress one row at a time so exporting a whole library stays flat in memory
+        for key in keys:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT artist, song, lyrics, fetched_at FROM songs WHERE artist_key = ? AND song_key = ?',
+                    key
+                ).fetchone()
+            if row is not None:
+                yield row[0], row[1], zlib.decompress(row[2]).decode('utf-8'), row[3]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM songs').fetchone()[0]
+
+    def stats(self):
+        """
+        Return (entries, uncompressed lyrics bytes, compressed lyrics bytes).
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length(lyrics)), 0) FROM songs'
+            ).fetchone()
+
+    def close(self):
+        with self._lock:
+            # Fold the WAL back into the pack so it is a single file again
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self._conn.close()
@@ -0,0 +1,229 @@
+"""
+Interactive search session (`lyrics-cli repl`).
+
+The one-shot interactive mode builds a fetcher, answers one query and exits.
+The REPL keeps a single fetcher for the whole session, so its connection
+pool, cache, vault index and candidate catalog stay warm between queries.
+
+While the numbered results are on screen, the top-ranked ones are fetched
+in the background. Picking one of them then only waits for a download that
+is already running or done. Starting a new query or making a choice cancels
+prefetches that haven't started yet. Prefetches already in flight can't be
+interrupted mid-request; they finish in the background (filling the cache)
+and their results are dropped.
+"""
+
+import concurrent.futures
+import queue
+import threading
+
+from batch_runner import lyrics_filename
+from lyrics_fetcher import result_emoji
+from metrics import PREFETCHES
+from song_keys import song_key
+
+DEFAULT_PREFETCH = 3
+
+QUIT_COMMANDS = ('q', 'quit', 'exit')
+HELP_COMMANDS = ('?', 'h', 'help')
+
+class Prefetcher:
+    """
+    Background lyrics downloads for the results currently on screen.
+    """
+    def __init__(self, fetcher, depth=DEFAULT_PREFETCH):
+        self.fetcher = fetcher
+        self.depth = max(0, depth)
+        # (future, artist, song) jobs for the daemon workers; None stops a worker
+        self._jobs = queue.Queue()
+        self._workers = []
+        # song_key -> future for the current result list only
+        self._futures = {}
+
+    def start(self, results):
+        """
+        Cancel the previous prefetches and start fetching the top `depth` online results.
+        """
+        self.cancel()
+        if not self.depth:
+            return
+
+        while len(self._workers) < self.depth:
+            # Daemon threads: a download nobody is waiting for must not hold up exit
+            worker = threading.Thread(target=self._work, name='prefetch', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        online = [result for result in results if result.get('source') != 'vault']
+        for result in online[:self.depth]:
+            key = song_key(result['artist'], result['song'])
+            if key not in self._futures:
+                future = concurrent.futures.Future()
+                self._jobs.put((future, result['artist'], result['song']))
+                self._futures[key] = future
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, artist, song = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.fetcher.prefetch_lyrics(artist, song))
+            except Exception as e:
+                future.set_exception(e)
+
+    def take(self, result):
+        """
+        Return lyrics for the chosen result, using its prefetch when there is one.
+
+        Every other prefetch is cancelled first so the choice doesn't compete with them.
+        """
+        future = self._futures.pop(song_key(result['artist'], result['song']), None)
+        self.cancel()
+
+        if future is not None and future.cancel():
+            # Still queued behind an earlier query's downloads; fetching directly is quicker
+            future = None
+        if future is not None:
+            try:
+                lyrics = future.result()
+                PREFETCHES.inc(result='used')
+                return lyrics
+            except Exception:
+                # Fall back to a regular fetch, which reports the error
+                PREFETCHES.inc(result='failed')
+        else:
+            PREFETCHES.inc(result='not_prefetched')
+
+        return self.fetcher.get_lyrics(result['artist'], result['song'])
+
+    def cancel(self):
+        for future in self._futures.values():
+            PREFETCHES.inc(result='cancelled' if future.cancel() else 'discarded')
+        self._futures.clear()
+
+    def close(self):
+        """
+        Cancel queued prefetches and stop the workers without waiting for them.
+
+        Downloads already in flight finish on their daemon threads, or are cut
+        off when the interpreter exits.
+        """
+        self.cancel()
+        for _ in self._workers:
+            self._jobs.put(None)
+        self._workers = []
+
+class LyricsRepl:
+    """
+    Read-search-pick loop over one long-lived fetcher.
+    """
+    def __init__(self, fetcher, output_dir, prefetch=DEFAULT_PREFETCH, use_vault=True,
+                 input_func=input, open_func=None):
+        self.fetcher = fetcher
+        self.output_dir = output_dir
+        self.use_vault = use_vault
+        self.prefetcher = Prefetcher(fetcher, prefetch)
+        self.results = []
+        self._input = input_func
+        # Called with the path of a saved note, e.g. to offer opening it
+        self._open = open_func
+
+    def run(self):
+        print("🎵 LYRICS REPL 🎵")
+        print("=" * 40)
+        self._print_help()
+
+        try:
+            while True:
+                try:
+                    line = self._input("\nlyrics> ").strip()
+                except EOFError:
+                    print()
+                    break
+
+                if not line:
+                    continue
+                if line.lower() in QUIT_COMMANDS:
+                    break
+                if line.lower() in HELP_COMMANDS:
+                    self._print_help()
+                elif self._is_pick(line):
+                    self.choose(int(line))
+                else:
+                    self.search(line)
+        finally:
+            self.prefetcher.close()
+        print("👋 Goodbye!")
+
+    def search(self, line):
+        """
+        Search for a query, optionally 'query @ artist', and show the numbered results.
+        """
+        query, _, artist = line.partition(' @ ')
+        query, artist = query.strip(), artist.strip() or None
+
+        # A new query makes the old prefetches useless
+        self.prefetcher.cancel()
+        self.results = self.fetcher.search_songs(query, artist, use_vault=self.use_vault)
+
+        if not self.results:
+            print("❌ No songs found! Try different search terms.")
+            return
+
+        # Start downloading before printing so the user's reading time is spent fetching
+        self.prefetcher.start(self.results)
+
+        print(f"\n🎯 Found {len(self.results)} matches:")
+        print("=" * 40)
+        for i, result in enumerate(self.results, 1):
+            print(f"{i:2d}. {result_emoji(result)} {result['artist']} - {result['song']}")
+
+    def choose(self, number):
+        """
+        Save result `number` from the last search.
+        """
+        if not 1 <= number <= len(self.results):
+            print("❌ Invalid selection!" if self.results else "❌ Search for a song first.")
+            return
+
+        selected = self.results[number - 1]
+        if selected.get('source') == 'vault':
+            print(f"📁 Already saved: {selected['path']}")
+            self._opened(selected['path'])
+            return
+
+        lyrics = self.prefetcher.take(selected)
+        if not lyrics:
+            print("❌ Failed to fetch lyrics. The song might not be available.")
+            return
+
+        saved_path = self.fetcher.save_lyrics_to_file(
+            lyrics_filename(selected['artist'], selected['song']), lyrics,
+            selected['song'], selected['artist'], self.output_dir
+        )
+        if saved_path:
+            print(f"🎉 SUCCESS! Lyrics saved to: {saved_path}")
+            self._opened(saved_path)
+        else:
+            print("❌ Failed to save lyrics file.")
+
+    def _is_pick(self, line):
+        """
+        A number is a pick only when it names a result on screen.
+
+        Anything else, like '1999' or '7' with no results yet, is searched as a title.
+        """
+        return line.isdigit() and 1 <= int(line) <= len(self.results)
+
+    def _opened(self, path):
+        if self._open is not None:
+            self._open(path)
+
+    def _print_help(self):
+        print("Type a song title ('Artist - Song' works too, or 'title @ artist' for an artist hint),")
+        print("then a result number to save it. Numbers not on the list are searched as titles.")
+        print("'q' quits.")
@@ -0,0 +1,213 @@
+"""
+Long-running JSON HTTP API over one warm LyricsFetcher (`lyrics-cli serve`).
+
+The fetcher, its connection pool, the lyrics cache and the vault index stay
+alive between requests, so a lookup costs one cache read or one upstream
+call instead of a process start. Requests are handled by a fixed pool of
+worker threads, and identical requests that arrive while one is already in
+flight wait for its answer instead of calling the API again (single-flight).
+
+Endpoints (all GET):
+
+    /lyrics?artist=Queen&song=Bohemian+Rhapsody
+    /search?q=bohemian+rhapsody[&artist=Queen][&online=1]
+    /health
+    /metrics[?format=json]   (Prometheus text format by default)
+"""
+
+import concurrent.futures
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from endpoint_health import CircuitOpenError
+from lyrics_cache import normalize_key
+from metrics import REGISTRY, SERVER_REQUESTS, SINGLE_FLIGHT_SHARED
+from vault_index import normalize_text
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8750
+DEFAULT_WORKERS = 8
+
+# Request metrics are labelled with these paths; anything else counts as 'other'
+API_ENDPOINTS = ('/lyrics', '/search', '/health')
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into a single call.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Run fn() and return (result, shared).
+
+        If a call with the same key is already running, wait for it and return
+        its result (or raise its exception) with shared=True instead.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+class LyricsService:
+    """
+    Request handling independent of HTTP: validates parameters and returns (status, payload).
+    """
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self.flights = SingleFlight()
+
+    def lyrics(self, artist, song_title):
+        if not artist or not song_title:
+            return 400, {'error': "'artist' and 'song' are required"}
+
+        key = ('lyrics',) + normalize_key(artist, song_title)
+        try:
+            lyrics, shared = self.flights.do(key, lambda: self.fetcher.fetch_lyrics(artist, song_title))
+        except CircuitOpenError as e:
+            return 503, {'error': str(e)}
+        except Exception as e:
+            return 502, {'error': f"upstream error: {e}"}
+
+        if shared:
+            SINGLE_FLIGHT_SHARED.inc(endpoint='/lyrics')
+        if not lyrics:
+            return 404, {'error': 'lyrics not found', 'artist': artist, 'song': song_title}
+        return 200, {'artist': artist, 'song': song_title, 'lyrics': lyrics}
+
+    def search(self, query, artist=None, online=False):
+        if not query:
+            return 400, {'error': "'q' is required"}
+
+        key = ('search', normalize_text(query), normalize_text(artist or ''), online)
+        try:
+            results, shared = self.flights.do(
+                key, lambda: self.fetcher.search_songs(query, artist, use_vault=not online)
+            )
+        except Exception as e:
+            return 502, {'error': f"search failed: {e}"}
+
+        if shared:
+            SINGLE_FLIGHT_SHARED.inc(endpoint='/search')
+
+        return 200, {'query': query, 'artist': artist, 'results': results}
+
+    def health(self):
+        return 200, {
+            'status': 'ok',
+            'in_flight': self.flights.in_flight(),
+            'providers': [provider.health.snapshot() for provider in self.fetcher.providers],
+        }
+
+def _param(params, name):
+    values = params.get(name)
+    if not values:
+        return None
+    return values[0].strip() or None
+
+def _flag(params, name):
+    return (_param(params, name) or '').lower() in ('1', 'true', 'yes')
+
+class LyricsRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'lyrics-cli'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        service = self.server.service
+
+        if url.path == '/lyrics':
+            status, payload = service.lyrics(_param(params, 'artist'), _param(params, 'song'))
+        elif url.path == '/search':
+            status, payload = service.search(
+                _param(params, 'q'), _param(params, 'artist'), online=_flag(params, 'online')
+            )
+        elif url.path == '/health':
+            status, payload = service.health()
+        elif url.path == '/metrics':
+            if _param(params, 'format') == 'json':
+                return self._send(200, REGISTRY.snapshot())
+            return self._send(200, REGISTRY.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            status, payload = 404, {'error': f"unknown endpoint {url.path}"}
+
+        endpoint = url.path if url.path in API_ENDPOINTS else 'other'
+        SERVER_REQUESTS.inc(endpoint=endpoint, status=status)
+        self._send(status, payload)
+
+    def _send(self, status, payload, content_type='application/json; charset=utf-8'):
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            print(f"🌐 {self.address_string()} {format % args}")
+
+class LyricsServer(HTTPServer):
+    """
+    HTTPServer that hands each connection to a fixed pool of worker threads.
+    """
+    # Connections beyond the busy workers wait in the listen backlog
+    request_queue_size = 128
+
+    def __init__(self, address, service, workers=DEFAULT_WORKERS, verbose=True):
+        super().__init__(address, LyricsRequestHandler)
+        self.service = service
+        self.verbose = verbose
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix='lyrics-serve'
+        )
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
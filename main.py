@@ -6,6 +6,8 @@ Usage:
     lyrics-cli                    # Interactive mode
     lyrics-cli search "song name" # Search and select
     lyrics-cli get "artist" "song" # Direct download
+    lyrics-cli repl               # Search many songs in one session
+    lyrics-cli serve              # Local JSON HTTP API
     lyrics-cli --version          # Show version
     lyrics-cli --help            # Show help
 """
@@ -13,12 +15,103 @@ Usage:
 import sys
 import os
 import argparse
-from lyrics_fetcher import LyricsFetcher, interactive_search_and_download, sanitize_filename
+
+# Everything else is imported by the command that needs it, so `--version`,
+# `--help` and a cached `get` don't pay for the HTTP stack at startup.
 
 __version__ = "1.0.0"
 
+DEFAULT_OUTPUT_DIR = "/home/archboyknm/Documents/Obsidian/Lyrics/"
+
+# How search_songs finds songs online
+SEARCH_APIS = ('guess', 'musixmatch')
+
+# Subcommands and their one-line help; their options are only built when used
+COMMANDS = {
+    'search': 'Search for songs',
+    'get': 'Download lyrics directly',
+    'batch': 'Download multiple songs from file',
+    'exists': 'Check which songs from a file have lyrics, without downloading them',
+    'enqueue': 'Add songs from a file to a shared work queue',
+    'worker': 'Fetch songs from a shared work queue (run several for more throughput)',
+    'index': 'Update the local index of saved lyrics',
+    'repl': 'Search and save many songs in one interactive session',
+    'serve': 'Serve search and get as a local JSON HTTP API',
+    'export': 'Write songs from a lyrics pack as markdown notes',
+    'sync': 'Re-fetch stale notes in the lyrics folder and update changed ones',
+}
+
 def main():
     """Main entry point for the CLI tool."""
+    argv = sys.argv[1:]
+    
+    # Answer the most common scripted call before building any parser
+    if argv == ['--version']:
+        print(f"lyrics-cli {__version__}")
+        return
+    
+    parser = build_parser(requested_command(argv))
+    args = parser.parse_args(argv)
+    
+    # If no command provided, run interactive mode
+    if not args.command:
+        from lyrics_fetcher import interactive_search_and_download
+        try:
+            interactive_search_and_download(build_fetcher(args, vault_dir=DEFAULT_OUTPUT_DIR, for_search=True))
+        except KeyboardInterrupt:
+            print("\n👋 Goodbye!")
+            sys.exit(0)
+        return
+    
+    if getattr(args, 'trace', None):
+        from tracing import start_tracing
+        start_tracing()
+    
+    # Handle commands
+    try:
+        if args.command == 'search':
+            handle_search_command(args)
+        elif args.command == 'get':
+            handle_get_command(args)
+        elif args.command == 'batch':
+            handle_batch_command(args)
+        elif args.command == 'exists':
+            handle_exists_command(args)
+        elif args.command == 'enqueue':
+            handle_enqueue_command(args)
+        elif args.command == 'worker':
+            handle_worker_command(args)
+        elif args.command == 'index':
+            handle_index_command(args)
+        elif args.command == 'repl':
+            handle_repl_command(args)
+        elif args.command == 'serve':
+            handle_serve_command(args)
+        elif args.command == 'export':
+            handle_export_command(args)
+        elif args.command == 'sync':
+            handle_sync_command(args)
+    except KeyboardInterrupt:
+        print("\n👋 Operation cancelled!")
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        if getattr(args, 'stats', None):
+            print_stats(args.stats)
+        if getattr(args, 'trace', None):
+            write_trace(args.trace)
+
+def requested_command(argv):
+    """Return the subcommand named on the command line, or None."""
+    for arg in argv:
+        if not arg.startswith('-'):
+            return arg if arg in COMMANDS else None
+    return None
+
+def build_parser(command=None):
+    """Build the argument parser, adding options only for the requested subcommand."""
     parser = argparse.ArgumentParser(
         prog='lyrics-cli',
         description='🎵 Search and download song lyrics to markdown files',
@@ -28,6 +121,13 @@ Examples:
   lyrics-cli                           # Interactive search mode
   lyrics-cli search "bohemian rhapsody" # Search for song
   lyrics-cli get "Queen" "Bohemian Rhapsody" # Direct download
+  lyrics-cli repl                      # Many searches, results prefetched
+  lyrics-cli serve --port 8750         # JSON API for other services
+  lyrics-cli batch songs.txt --pack library.lyrpack # One file instead of a note per song
+  lyrics-cli export library.lyrpack --artist Queen  # Write packed songs as notes
+  lyrics-cli exists songs.txt -j 4     # Which songs have lyrics? Nothing is written
+  lyrics-cli enqueue songs.txt --queue /shared/q.sqlite3  # Then run workers on any host:
+  lyrics-cli worker --queue /shared/q.sqlite3 -o /shared/Lyrics -j 4
   lyrics-cli --version                 # Show version
 
 Default output directory: /home/archboyknm/Documents/Obsidian/Lyrics/
@@ -38,58 +138,343 @@ Default output directory: /home/archboyknm/Documents/Obsidian/Lyrics/
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
-    # Search command
-    search_parser = subparsers.add_parser('search', help='Search for songs')
+    add_arguments = {
+        'search': add_search_arguments,
+        'get': add_get_arguments,
+        'batch': add_batch_arguments,
+        'exists': add_exists_arguments,
+        'enqueue': add_enqueue_arguments,
+        'worker': add_worker_arguments,
+        'index': add_index_arguments,
+        'repl': add_repl_arguments,
+        'serve': add_serve_arguments,
+        'export': add_export_arguments,
+        'sync': add_sync_arguments,
+    }
+    for name, help_text in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if name == command:
+            add_arguments[name](subparser)
+    
+    return parser
+
+def add_fetch_arguments(parser):
+    """Options shared by every command that fetches lyrics."""
+    from lyrics_cache import default_cache_dir
+    from metrics import STATS_FORMATS
+    from miss_filter import DEFAULT_FP_RATE
+    
+    parser.add_argument('--cache-dir', help=f'Lyrics cache directory (default: {default_cache_dir()})')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the lyrics cache')
+    parser.add_argument('--mirror', action='append', default=[], metavar='URL',
+                        help='Extra lyrics.ovh-compatible API to hedge slow requests to (repeatable)')
+    parser.add_argument('--stats', nargs='?', const='text', choices=STATS_FORMATS,
+                        help='Print request, cache and timing statistics to stderr when done '
+                             '(text, json or prometheus; default: text)')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Record a timeline of every stage and write it as a Chrome trace to FILE')
+    parser.add_argument('--recheck-missing', action='store_true',
+                        help='Ask the API again for songs it recently reported missing')
+    parser.add_argument('--missing-fp-rate', type=float, default=DEFAULT_FP_RATE, metavar='RATE',
+                        help='Chance that an unknown song is mistaken for a known missing one and skipped '
+                             f'(default: {DEFAULT_FP_RATE})')
+
+def add_planner_arguments(parser):
+    """Options controlling how online searches pick candidates."""
+    from candidate_planner import DEFAULT_PROBE_BUDGET, default_catalog_path
+    
+    parser.add_argument('--catalog', help=f'Catalog of known artists/songs (default: {default_catalog_path()})')
+    parser.add_argument('--probe-budget', type=int, default=DEFAULT_PROBE_BUDGET,
+                        help=f'Maximum API lookups per search (default: {DEFAULT_PROBE_BUDGET})')
+    parser.add_argument('--search-api', choices=SEARCH_APIS,
+                        help="How online searches find songs: 'guess' probes likely artist/title pairs, "
+                             "'musixmatch' asks Musixmatch track search in one request (needs "
+                             "$MUSIXMATCH_TOKEN) (default: musixmatch when the token is set, else guess)")
+    parser.add_argument('--search-url', metavar='URL',
+                        help='Base URL of a Musixmatch-compatible search API, e.g. a local stub')
+
+def add_write_arguments(parser):
+    """Options for commands that save lyrics notes."""
+    from note_writer import DEFAULT_FSYNC, FSYNC_POLICIES
+    
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default=DEFAULT_FSYNC,
+                        help='Flush notes to disk before renaming them into place: none, file or '
+                             f'full (also the directory) (default: {DEFAULT_FSYNC})')
+
+def add_search_arguments(search_parser):
+    add_fetch_arguments(search_parser)
     search_parser.add_argument('query', help='Song title or search query')
     search_parser.add_argument('--artist', '-a', help='Artist name hint')
     search_parser.add_argument('--output', '-o', help='Output directory')
-    
-    # Get command (direct download)
-    get_parser = subparsers.add_parser('get', help='Download lyrics directly')
+    search_parser.add_argument('--online', action='store_true',
+                               help='Skip the local lyrics folder and search the API directly')
+    search_parser.add_argument('--lyrics', action='store_true',
+                               help='Treat the query as a lyrics snippet and search saved lyrics')
+    add_write_arguments(search_parser)
+    add_planner_arguments(search_parser)
+
+def add_get_arguments(get_parser):
+    add_fetch_arguments(get_parser)
     get_parser.add_argument('artist', help='Artist name')
     get_parser.add_argument('song', help='Song title')
     get_parser.add_argument('--output', '-o', help='Output directory')
+    add_write_arguments(get_parser)
+
+def add_repl_arguments(repl_parser):
+    from lyrics_repl import DEFAULT_PREFETCH
+    
+    add_fetch_arguments(repl_parser)
+    repl_parser.add_argument('--output', '-o', help='Output directory')
+    repl_parser.add_argument('--online', action='store_true',
+                             help='Skip the local lyrics folder and search the API directly')
+    repl_parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH, metavar='N',
+                             help='Download the top N results in the background while you choose '
+                                  f'(0 to disable, default: {DEFAULT_PREFETCH})')
+    add_write_arguments(repl_parser)
+    add_planner_arguments(repl_parser)
+
+def add_batch_arguments(batch_parser):
+    from batch_input import INPUT_FORMATS
     
-    # Batch command
-    batch_parser = subparsers.add_parser('batch', help='Download multiple songs from file')
-    batch_parser.add_argument('file', help='File with songs (format: Artist - Song per line)')
+    add_fetch_arguments(batch_parser)
+    batch_parser.add_argument('file', help="File with songs: 'Artist - Song' per line, JSONL or CSV ('-' for stdin)")
+    batch_parser.add_argument('--format', '-f', choices=INPUT_FORMATS, default='auto',
+                              help='Input format (default: guess from the file extension)')
     batch_parser.add_argument('--output', '-o', help='Output directory')
+    batch_parser.add_argument('--concurrency', '-j', type=int, default=1,
+                              help='Number of songs to fetch in parallel (default: 1)')
+    batch_parser.add_argument('--rate', default='1/s',
+                              help='Maximum API request rate, e.g. 5/s or 300/m (default: 1/s)')
+    batch_parser.add_argument('--resume', action='store_true',
+                              help='Skip songs the journal records as saved or missing and retry only errors '
+                                   '(with --recheck-missing, missing songs are retried too)')
+    batch_parser.add_argument('--overwrite', action='store_true',
+                              help='Re-fetch songs even if their lyrics file already exists')
+    batch_parser.add_argument('--pack', metavar='FILE',
+                              help='Store lyrics in this compressed pack file instead of one note per song')
+    batch_parser.add_argument('--probe-only', action='store_true',
+                              help="Only check which songs have lyrics, like the exists command")
+    add_write_arguments(batch_parser)
+
+def add_exists_arguments(exists_parser):
+    from batch_input import INPUT_FORMATS
     
-    args = parser.parse_args()
+    add_fetch_arguments(exists_parser)
+    exists_parser.add_argument('file', help="File with songs: 'Artist - Song' per line, JSONL or CSV ('-' for stdin)")
+    exists_parser.add_argument('--format', '-f', choices=INPUT_FORMATS, default='auto',
+                               help='Input format (default: guess from the file extension)')
+    exists_parser.add_argument('--output', '-o', help='Lyrics folder whose saved notes count as available')
+    exists_parser.add_argument('--concurrency', '-j', type=int, default=1,
+                               help='Number of songs to check in parallel (default: 1)')
+    exists_parser.add_argument('--rate', default='1/s',
+                               help='Maximum API request rate, e.g. 5/s or 300/m (default: 1/s)')
+    exists_parser.add_argument('--recheck-saved', action='store_true',
+                               help='Ask the API even for songs that already have a note')
+
+def add_queue_argument(parser):
+    from work_queue import default_queue_path
     
-    # If no command provided, run interactive mode
-    if not args.command:
+    parser.add_argument('--queue', '-q', metavar='FILE',
+                        help=f'Work queue file, on shared storage for several hosts (default: {default_queue_path()})')
+
+def add_enqueue_arguments(enqueue_parser):
+    from batch_input import INPUT_FORMATS
+    
+    enqueue_parser.add_argument('file', help="File with songs: 'Artist - Song' per line, JSONL or CSV ('-' for stdin)")
+    enqueue_parser.add_argument('--format', '-f', choices=INPUT_FORMATS, default='auto',
+                                help='Input format (default: guess from the file extension)')
+    add_queue_argument(enqueue_parser)
+    enqueue_parser.add_argument('--requeue', action='store_true',
+                                help='Make songs that are already done or failed pending again')
+
+def add_worker_arguments(worker_parser):
+    from work_queue import DEFAULT_MAX_ATTEMPTS
+    
+    add_fetch_arguments(worker_parser)
+    add_queue_argument(worker_parser)
+    worker_parser.add_argument('--output', '-o', help='Output directory')
+    worker_parser.add_argument('--concurrency', '-j', type=int, default=1,
+                               help='Number of songs to fetch in parallel (default: 1)')
+    worker_parser.add_argument('--rate', default='1/s',
+                               help='Maximum API request rate of this worker, e.g. 5/s or 300/m (default: 1/s)')
+    worker_parser.add_argument('--visibility-timeout', default='5m',
+                               help='How long a leased song stays hidden from other workers, e.g. 90s or 5m '
+                                    '(default: 5m)')
+    worker_parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                               help=f'Give up on a song after this many failed attempts (default: {DEFAULT_MAX_ATTEMPTS})')
+    worker_parser.add_argument('--wait', action='store_true',
+                               help='Keep waiting for new songs when the queue is empty instead of exiting')
+    worker_parser.add_argument('--overwrite', action='store_true',
+                               help='Re-fetch songs even if their lyrics file already exists')
+    worker_parser.add_argument('--pack', metavar='FILE',
+                               help='Store lyrics in this compressed pack file instead of one note per song')
+    add_write_arguments(worker_parser)
+
+def add_index_arguments(index_parser):
+    index_parser.add_argument('--output', '-o', help='Output directory to index')
+    index_parser.add_argument('--rebuild', action='store_true', help='Re-read every file')
+    index_parser.add_argument('--cache-dir', help='Directory holding the index database')
+
+def add_serve_arguments(serve_parser):
+    from lyrics_server import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_WORKERS
+    
+    add_fetch_arguments(serve_parser)
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST})')
+    serve_parser.add_argument('--port', '-p', type=int, default=DEFAULT_PORT, help=f'Port to listen on (default: {DEFAULT_PORT})')
+    serve_parser.add_argument('--workers', '-j', type=int, default=DEFAULT_WORKERS,
+                              help=f'Number of requests handled in parallel (default: {DEFAULT_WORKERS})')
+    serve_parser.add_argument('--rate', help='Maximum API request rate, e.g. 5/s or 300/m (default: unlimited)')
+    serve_parser.add_argument('--output', '-o', help='Lyrics folder answered locally by /search')
+    add_planner_arguments(serve_parser)
+    serve_parser.add_argument('--quiet', '-q', action='store_true', help='Do not log each request')
+
+def add_export_arguments(export_parser):
+    export_parser.add_argument('pack', help='Lyrics pack written by batch --pack')
+    export_parser.add_argument('--output', '-o', help='Output directory')
+    export_parser.add_argument('--artist', '-a', help='Only songs whose artist contains this text')
+    export_parser.add_argument('--song', '-s', help='Only songs whose title contains this text')
+    export_parser.add_argument('--list', action='store_true', help='List the matching songs instead of writing them')
+    add_write_arguments(export_parser)
+
+def add_sync_arguments(sync_parser):
+    add_fetch_arguments(sync_parser)
+    sync_parser.add_argument('--output', '-o', help='Lyrics folder to refresh')
+    sync_parser.add_argument('--max-age', default='30d',
+                             help='Re-fetch notes fetched longer ago than this, e.g. 12h, 30d or 2w (default: 30d)')
+    sync_parser.add_argument('--limit', type=int,
+                             help='Refresh at most this many notes per run, oldest first')
+    sync_parser.add_argument('--concurrency', '-j', type=int, default=1,
+                             help='Number of notes to refresh in parallel (default: 1)')
+    sync_parser.add_argument('--rate', default='1/s',
+                             help='Maximum API request rate, e.g. 5/s or 300/m (default: 1/s)')
+    sync_parser.add_argument('--dry-run', action='store_true',
+                             help='List the notes that would be refreshed without fetching anything')
+    sync_parser.add_argument('--force', action='store_true',
+                             help='Also refresh notes whose lyrics were edited by hand, overwriting the edits')
+    add_write_arguments(sync_parser)
+
+def print_stats(stats_format):
+    """Print the collected metrics to stderr, keeping stdout for command output."""
+    from metrics import REGISTRY
+    print(REGISTRY.render(stats_format), file=sys.stderr)
+
+def write_trace(path):
+    """Write the spans recorded with --trace as a Chrome trace file."""
+    from tracing import stop_tracing
+    tracer = stop_tracing()
+    try:
+        tracer.write(path)
+        print(f"🧵 Trace written to {path} (open it in chrome://tracing or https://ui.perfetto.dev)", file=sys.stderr)
+    except OSError as e:
+        print(f"⚠️ Could not write trace: {e}", file=sys.stderr)
+
+def build_fetcher(args, vault_dir=None, concurrency=1, rate_limiter=None, for_search=False):
+    """Create a LyricsFetcher configured from the command-line options."""
+    from lyrics_cache import LyricsCache
+    from lyrics_fetcher import LyricsFetcher
+    from note_writer import DEFAULT_FSYNC, NoteWriter
+    from providers import LyricsOvhProvider
+    
+    cache = None
+    if not getattr(args, 'no_cache', False):
         try:
-            interactive_search_and_download()
-        except KeyboardInterrupt:
-            print("\n👋 Goodbye!")
-            sys.exit(0)
-        return
+            cache = LyricsCache(getattr(args, 'cache_dir', None))
+        except Exception as e:
+            print(f"⚠️ Lyrics cache disabled: {e}")
+    
+    # Remembers songs the API doesn't have; lives with the cache and goes away with it
+    miss_filter = None
+    if cache is not None:
+        from lyrics_cache import default_cache_dir
+        from miss_filter import DEFAULT_FP_RATE, MissFilter, default_filter_path
+        try:
+            miss_filter = MissFilter(
+                default_filter_path(getattr(args, 'cache_dir', None) or default_cache_dir()),
+                fp_rate=getattr(args, 'missing_fp_rate', DEFAULT_FP_RATE), log=print
+            )
+        except ValueError as e:
+            print(f"⚠️ Known-missing filter disabled: {e}")
+    
+    vault_index = None
+    if vault_dir:
+        from vault_index import VaultIndex
+        try:
+            vault_index = VaultIndex(vault_dir, getattr(args, 'cache_dir', None))
+        except Exception as e:
+            print(f"⚠️ Local lyrics index disabled: {e}")
+    
+    # Size the probe pool, and with it the connection pool, to the batch concurrency
+    fetcher = LyricsFetcher(
+        max_workers=max(8, concurrency), cache=cache, vault_index=vault_index,
+        rate_limiter=rate_limiter, writer=NoteWriter(getattr(args, 'fsync', DEFAULT_FSYNC)),
+        miss_filter=miss_filter, recheck_missing=getattr(args, 'recheck_missing', False)
+    )
+    for i, url in enumerate(getattr(args, 'mirror', []), 1):
+        fetcher.providers.append(LyricsOvhProvider(url, name=f"mirror {i}"))
+    # Loading the catalog reads every cached and saved song, so it waits for the
+    # first search that has to guess candidates
+    if for_search:
+        catalog_path, probe_budget = getattr(args, 'catalog', None), getattr(args, 'probe_budget', None)
+        fetcher.planner_factory = lambda: build_planner(fetcher, catalog_path, probe_budget)
+        fetcher.search_provider = build_search_provider(
+            fetcher, getattr(args, 'search_api', None), getattr(args, 'search_url', None)
+        )
+    return fetcher
+
+def build_search_provider(fetcher, search_api=None, search_url=None):
+    """Create the search provider chosen with --search-api, or None to guess candidates."""
+    from providers import MUSIXMATCH_TOKEN_ENV, MusixmatchSearchProvider, musixmatch_token
+    
+    token = musixmatch_token()
+    if search_api is None:
+        search_api = 'musixmatch' if token else 'guess'
+    if search_api == 'guess':
+        return None
+    
+    if not token:
+        print(f"⚠️ Musixmatch search needs a token in ${MUSIXMATCH_TOKEN_ENV}; guessing candidates instead")
+        return None
+    return MusixmatchSearchProvider(search_url or fetcher.apis['musixmatch_alt'], token)
+
+def build_planner(fetcher, catalog_path=None, probe_budget=None):
+    """Create a CandidatePlanner whose catalog holds every song we already know about."""
+    from candidate_planner import Catalog, CandidatePlanner, DEFAULT_PROBE_BUDGET, default_catalog_path
+    
+    if probe_budget is None:
+        probe_budget = DEFAULT_PROBE_BUDGET
+    catalog = Catalog()
     
-    # Handle commands
     try:
-        if args.command == 'search':
-            handle_search_command(args)
-        elif args.command == 'get':
-            handle_get_command(args)
-        elif args.command == 'batch':
-            handle_batch_command(args)
-    except KeyboardInterrupt:
-        print("\n👋 Operation cancelled!")
-        sys.exit(0)
+        if fetcher.cache is not None:
+            catalog.add_many(fetcher.cache.entries())
+        if fetcher.vault_index is not None:
+            catalog.add_many(fetcher.vault_index.entries())
+        
+        catalog_path = catalog_path or default_catalog_path()
+        if os.path.exists(catalog_path):
+            catalog.load(catalog_path)
     except Exception as e:
-        print(f"❌ Error: {e}")
-        sys.exit(1)
+        print(f"⚠️ Could not load song catalog: {e}")
+    
+    return CandidatePlanner(catalog, probe_budget=probe_budget)
 
 def handle_search_command(args):
     """Handle the search command."""
-    fetcher = LyricsFetcher()
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    
+    if args.lyrics:
+        handle_lyrics_search(args.query, output_dir, args.cache_dir)
+        return
+    
+    from lyrics_fetcher import result_emoji
+    
+    fetcher = build_fetcher(args, vault_dir=None if args.online else output_dir, for_search=True)
     
     print(f"🔍 Searching for: '{args.query}'")
     if args.artist:
         print(f"   Artist hint: '{args.artist}'")
     
-    results = fetcher.search_songs(args.query, args.artist)
+    results = fetcher.search_songs(args.query, args.artist, use_vault=not args.online)
     
     if not results:
         print("❌ No songs found! Try different search terms.")
@@ -100,8 +485,7 @@ def handle_search_command(args):
     print("=" * 40)
     
     for i, result in enumerate(results, 1):
-        confidence_emoji = "🎯" if result['confidence'] == 'high' else "🎲"
-        print(f"{i:2d}. {confidence_emoji} {result['artist']} - {result['song']}")
+        print(f"{i:2d}. {result_emoji(result)} {result['artist']} - {result['song']}")
     
     print(f"{len(results) + 1:2d}. ❌ None of these (exit)")
     
@@ -116,7 +500,11 @@ def handle_search_command(args):
         
         if 1 <= choice_num <= len(results):
             selected = results[choice_num - 1]
-            download_lyrics(fetcher, selected['artist'], selected['song'], args.output)
+            if selected.get('source') == 'vault':
+                print(f"\n📁 Already saved: {selected['path']}")
+                offer_to_open(selected['path'])
+            else:
+                download_lyrics(fetcher, selected['artist'], selected['song'], args.output)
         else:
             print("❌ Invalid selection!")
             
@@ -124,86 +512,478 @@ def handle_search_command(args):
         print("\n👋 Goodbye!")
         return
 
+def handle_lyrics_search(snippet, output_dir, cache_dir=None):
+    """Search the lyrics text of saved notes."""
+    from vault_index import VaultIndex
+    
+    index = VaultIndex(output_dir, cache_dir)
+    index.refresh()
+    results = index.search_lyrics(snippet)
+    
+    if not results:
+        print("❌ No saved lyrics contain that text.")
+        return
+    
+    print(f"\n🎯 Found {len(results)} matches:")
+    print("=" * 40)
+    for i, result in enumerate(results, 1):
+        print(f"{i:2d}. 📁 {result['artist']} - {result['song']}")
+        print(f"      {result['snippet']}")
+
+def handle_index_command(args):
+    """Handle the index command."""
+    from vault_index import VaultIndex
+    
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    index = VaultIndex(output_dir, args.cache_dir)
+    
+    print(f"📁 Indexing: {output_dir}")
+    updated = index.refresh(force=args.rebuild)
+    print(f"✅ Indexed {updated} changed file(s), {index.count()} total")
+
 def handle_get_command(args):
     """Handle the get command (direct download)."""
-    fetcher = LyricsFetcher()
+    fetcher = build_fetcher(args)
     download_lyrics(fetcher, args.artist, args.song, args.output)
 
 def handle_batch_command(args):
     """Handle the batch command."""
-    if not os.path.exists(args.file):
+    from batch_input import iter_batch_entries
+    from batch_journal import BatchJournal, JOURNAL_STATUSES, journal_path_for
+    from batch_runner import BatchRunner
+    from rate_limit import TokenBucket, parse_rate
+    
+    if args.probe_only:
+        args.recheck_saved = args.overwrite
+        handle_exists_command(args)
+        return
+    
+    if args.file != '-' and not os.path.exists(args.file):
         print(f"❌ File not found: {args.file}")
         return
     
-    fetcher = LyricsFetcher()
-    output_dir = args.output or "/home/archboyknm/Documents/Obsidian/Lyrics/"
+    try:
+        rate = parse_rate(args.rate)
+    except ValueError as e:
+        print(f"❌ Invalid --rate '{args.rate}': {e}")
+        return
     
-    print(f"📁 Output directory: {output_dir}")
-    print("📂 Processing batch file...")
+    fetcher = build_fetcher(args, concurrency=args.concurrency, rate_limiter=TokenBucket(rate))
+    # Workers report through BatchResult so output stays in input order
+    fetcher.verbose = False
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    
+    pack = None
+    if args.pack:
+        from lyrics_pack import LyricsPack
+        pack = LyricsPack(args.pack)
+        print(f"📦 Lyrics pack: {args.pack}")
+    else:
+        print(f"📁 Output directory: {output_dir}")
+    print(f"📂 Processing batch file ({args.concurrency} worker(s), {rate:g} requests/s)...")
+    
+    journal = BatchJournal(journal_path_for(args.pack or output_dir))
+    if args.resume:
+        print(f"📓 Resuming from journal: {journal.path}")
+    
+    counts = {'successful': 0, 'failed': 0, 'skipped': 0, 'resumed': 0, 'resumed_missing': 0}
+    
+    def pending_entries():
+        # Runs on the pipeline's reader thread while the file streams in
+        for entry in iter_batch_entries(args.file, args.format, include_invalid=True):
+            if args.resume and not entry.error:
+                if journal.is_completed(entry.artist, entry.song_title):
+                    counts['resumed'] += 1
+                    continue
+                if not args.recheck_missing and journal.is_missing(entry.artist, entry.song_title):
+                    counts['resumed_missing'] += 1
+                    continue
+            yield entry
     
     try:
-        with open(args.file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        successful = 0
-        failed = 0
-        
-        for i, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line or line.startswith('#'):
+        runner = BatchRunner(fetcher, output_dir, concurrency=args.concurrency,
+                             skip_existing=not args.overwrite, pack=pack)
+        for result in runner.run(pending_entries()):
+            entry = result.entry
+            if result.status == 'invalid':
+                print(f"⚠️ Skipping line {entry.line_no}: {result.error}")
                 continue
             
-            try:
-                if ' - ' in line:
-                    artist, song_title = line.split(' - ', 1)
-                    artist = artist.strip()
-                    song_title = song_title.strip()
-                else:
-                    print(f"⚠️ Skipping line {i}: Invalid format '{line}'")
-                    continue
-                
-                print(f"\n📥 Processing {i}: {artist} - {song_title}")
-                
-                lyrics = fetcher.get_lyrics(artist, song_title)
-                if lyrics:
-                    safe_song = sanitize_filename(song_title)
-                    safe_artist = sanitize_filename(artist)
-                    filename = f"{safe_song} - {safe_artist}.md"
-                    
-                    saved_path = fetcher.save_lyrics_to_file(
-                        filename, lyrics, song_title, artist, output_dir
-                    )
-                    
-                    if saved_path:
-                        successful += 1
-                        print(f"✅ Success: {saved_path}")
-                    else:
-                        failed += 1
-                        print(f"❌ Failed to save: {artist} - {song_title}")
+            journal.record(
+                entry.line_no, entry.artist, entry.song_title,
+                JOURNAL_STATUSES[result.status], path=result.path, error=result.error
+            )
+            
+            print(f"\n📥 Processing {entry.line_no}: {entry.artist} - {entry.song_title}")
+            
+            if result.status == 'exists':
+                counts['skipped'] += 1
+                print(f"⏭️ Already saved: {result.path}")
+            elif result.ok and pack is not None:
+                counts['successful'] += 1
+                print(f"✅ Packed: {entry.artist} - {entry.song_title}")
+            elif result.ok:
+                counts['successful'] += 1
+                print(f"✅ Success: {result.path}")
+            else:
+                counts['failed'] += 1
+                if result.status == 'not_found':
+                    print(f"❌ Failed to fetch: {entry.artist} - {entry.song_title}")
+                elif result.status == 'save_failed':
+                    print(f"❌ Failed to save: {entry.artist} - {entry.song_title}")
                 else:
-                    failed += 1
-                    print(f"❌ Failed to fetch: {artist} - {song_title}")
-                
-                # Small delay to be respectful to the API
-                import time
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"❌ Error processing line {i}: {e}")
-                failed += 1
-        
-        print(f"\n📊 BATCH RESULTS:")
-        print(f"✅ Successful: {successful}")
-        print(f"❌ Failed: {failed}")
+                    print(f"❌ Error processing line {entry.line_no}: {result.error}")
+    except Exception as e:
+        print(f"❌ Error reading file: {e}")
+    finally:
+        journal.close()
+        if pack is not None:
+            entries, raw_bytes, packed_bytes = pack.stats()
+            pack.close()
+    
+    print(f"\n📊 BATCH RESULTS:")
+    print(f"✅ Successful: {counts['successful']}")
+    print(f"❌ Failed: {counts['failed']}")
+    if counts['skipped']:
+        print(f"⏭️ Already in {'pack' if pack is not None else 'output directory'}: {counts['skipped']}")
+    if counts['resumed']:
+        print(f"📓 Completed in a previous run: {counts['resumed']}")
+    if counts['resumed_missing']:
+        print(f"📓 Missing in a previous run, not retried: {counts['resumed_missing']} (use --recheck-missing)")
+    if pack is not None:
+        print(f"📦 Lyrics pack: {args.pack} ({entries} song(s), "
+              f"{raw_bytes / 1024:.1f} KiB of lyrics in {packed_bytes / 1024:.1f} KiB)")
+    else:
         print(f"📁 Output directory: {output_dir}")
-        
+
+def handle_exists_command(args):
+    """Handle the exists command (and batch --probe-only)."""
+    from batch_input import iter_batch_entries
+    from batch_runner import BatchRunner
+    from rate_limit import TokenBucket, parse_rate
+    
+    if args.file != '-' and not os.path.exists(args.file):
+        print(f"❌ File not found: {args.file}")
+        return
+    
+    try:
+        rate = parse_rate(args.rate)
+    except ValueError as e:
+        print(f"❌ Invalid --rate '{args.rate}': {e}")
+        return
+    
+    fetcher = build_fetcher(args, concurrency=args.concurrency, rate_limiter=TokenBucket(rate))
+    fetcher.verbose = False
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    print(f"🔎 Checking availability ({args.concurrency} worker(s), {rate:g} requests/s)...")
+    
+    counts = {'available': 0, 'saved': 0, 'missing': 0, 'errors': 0}
+    try:
+        runner = BatchRunner(fetcher, output_dir, concurrency=args.concurrency,
+                             skip_existing=not args.recheck_saved, probe_only=True)
+        for result in runner.run(iter_batch_entries(args.file, args.format, include_invalid=True)):
+            entry = result.entry
+            if result.status == 'invalid':
+                print(f"⚠️ Skipping line {entry.line_no}: {result.error}")
+            elif result.status == 'available':
+                counts['available'] += 1
+                print(f"✅ Available: {entry.artist} - {entry.song_title}")
+            elif result.status == 'exists':
+                counts['saved'] += 1
+                print(f"📁 Already saved: {result.path}")
+            elif result.status == 'not_found':
+                counts['missing'] += 1
+                print(f"❌ Missing: {entry.artist} - {entry.song_title}")
+            else:
+                counts['errors'] += 1
+                print(f"⚠️ Error checking line {entry.line_no}: {result.error}")
+    except Exception as e:
+        print(f"❌ Error reading file: {e}")
+    
+    print(f"\n📊 AVAILABILITY:")
+    print(f"✅ Available: {counts['available']}")
+    if counts['saved']:
+        print(f"📁 Already saved: {counts['saved']}")
+    print(f"❌ Missing: {counts['missing']}")
+    if counts['errors']:
+        print(f"⚠️ Not checked (errors): {counts['errors']}")
+
+def handle_enqueue_command(args):
+    """Handle the enqueue command."""
+    from batch_input import iter_batch_entries
+    from work_queue import WorkQueue, default_queue_path
+    
+    if args.file != '-' and not os.path.exists(args.file):
+        print(f"❌ File not found: {args.file}")
+        return
+    
+    work_queue = WorkQueue(args.queue or default_queue_path())
+    invalid = []
+    
+    def songs():
+        for entry in iter_batch_entries(args.file, args.format, include_invalid=True):
+            if entry.error:
+                invalid.append(entry)
+                continue
+            yield entry.artist, entry.song_title
+    
+    try:
+        added, duplicates = work_queue.enqueue(songs(), requeue=args.requeue)
+        counts = work_queue.counts()
     except Exception as e:
         print(f"❌ Error reading file: {e}")
+        return
+    finally:
+        work_queue.close()
+    
+    for entry in invalid:
+        print(f"⚠️ Skipping line {entry.line_no}: {entry.error}")
+    print(f"📥 Queued {added} new song(s) in {work_queue.path}")
+    if duplicates:
+        print(f"⏭️ Already queued: {duplicates}" + (" (finished ones requeued)" if args.requeue else ""))
+    print_queue_counts(counts)
+
+def print_queue_counts(counts):
+    """Print how many songs of a work queue are in each state."""
+    print(f"📋 Queue: {counts['pending']} pending, {counts['leased']} leased, "
+          f"{counts['done']} done, {counts['failed']} failed")
+
+def handle_worker_command(args):
+    """Handle the worker command."""
+    import threading
+    
+    from batch_runner import BatchRunner
+    from rate_limit import TokenBucket, parse_rate
+    from vault_sync import parse_duration
+    from work_queue import QueueWorker, WorkQueue, default_queue_path
+    
+    try:
+        rate = parse_rate(args.rate)
+    except ValueError as e:
+        print(f"❌ Invalid --rate '{args.rate}': {e}")
+        return
+    try:
+        visibility_timeout = parse_duration(args.visibility_timeout)
+    except ValueError as e:
+        print(f"❌ Invalid --visibility-timeout '{args.visibility_timeout}': {e}")
+        return
+    
+    queue_path = args.queue or default_queue_path()
+    if not os.path.exists(queue_path):
+        print(f"❌ Queue not found: {queue_path} (add songs with 'lyrics-cli enqueue')")
+        return
+    
+    fetcher = build_fetcher(args, concurrency=args.concurrency, rate_limiter=TokenBucket(rate))
+    fetcher.verbose = False
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    
+    pack = None
+    if args.pack:
+        from lyrics_pack import LyricsPack
+        pack = LyricsPack(args.pack)
+        print(f"📦 Lyrics pack: {args.pack}")
+    else:
+        print(f"📁 Output directory: {output_dir}")
+    
+    work_queue = WorkQueue(queue_path, visibility_timeout=visibility_timeout, max_attempts=args.max_attempts)
+    runner = BatchRunner(fetcher, output_dir, skip_existing=not args.overwrite, pack=pack)
+    worker = QueueWorker(work_queue, runner, concurrency=args.concurrency, wait=args.wait)
+    print(f"👷 Worker {worker.owner} on {queue_path} ({args.concurrency} thread(s), {rate:g} requests/s)")
+    
+    counts = {'done': 0, 'retry': 0, 'failed': 0, 'lost': 0}
+    print_lock = threading.Lock()
+    
+    def report(job, result, outcome):
+        counts[outcome] += 1
+        song = f"{job.artist} - {job.song_title}"
+        if outcome == 'done' and result.status == 'not_found':
+            message = f"❌ Not found: {song}"
+        elif outcome == 'done':
+            message = f"✅ {'Already saved' if result.status == 'exists' else 'Saved'}: {result.path}"
+        elif outcome == 'lost':
+            message = f"⏱️ Lease expired before finishing, left to another worker: {song}"
+        else:
+            message = (f"{'🔁' if outcome == 'retry' else '❌'} {result.error or result.status}: {song}"
+                       f" (attempt {job.attempts}/{work_queue.max_attempts}"
+                       f"{', will retry' if outcome == 'retry' else ', giving up'})")
+        with print_lock:
+            print(message)
+    
+    try:
+        worker.run(report)
+    finally:
+        queue_counts = work_queue.counts()
+        work_queue.close()
+        if pack is not None:
+            pack.close()
+    
+    print(f"\n📊 WORKER RESULTS:")
+    print(f"✅ Finished: {counts['done']}")
+    if counts['retry']:
+        print(f"🔁 Returned for retry: {counts['retry']}")
+    if counts['failed']:
+        print(f"❌ Failed: {counts['failed']}")
+    if counts['lost']:
+        print(f"⏱️ Lost to expired leases: {counts['lost']}")
+    print_queue_counts(queue_counts)
+
+def handle_repl_command(args):
+    """Handle the repl command."""
+    from lyrics_repl import LyricsRepl
+    
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    # One fetcher for the whole session keeps connections, caches and the catalog warm
+    fetcher = build_fetcher(args, vault_dir=None if args.online else output_dir,
+                            concurrency=args.prefetch, for_search=True)
+    print(f"📁 Output directory: {output_dir}")
+    LyricsRepl(fetcher, output_dir, prefetch=args.prefetch, use_vault=not args.online,
+               open_func=offer_to_open).run()
+
+def handle_serve_command(args):
+    """Handle the serve command."""
+    from lyrics_server import LyricsServer, LyricsService
+    from rate_limit import TokenBucket, parse_rate
+    
+    rate_limiter = None
+    if args.rate:
+        try:
+            rate_limiter = TokenBucket(parse_rate(args.rate))
+        except ValueError as e:
+            print(f"❌ Invalid --rate '{args.rate}': {e}")
+            return
+    
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    fetcher = build_fetcher(args, vault_dir=output_dir, concurrency=args.workers,
+                            rate_limiter=rate_limiter, for_search=True)
+    # Requests are logged by the server; per-fetch chatter would interleave
+    fetcher.verbose = False
+    
+    server = LyricsServer((args.host, args.port), LyricsService(fetcher),
+                          workers=args.workers, verbose=not args.quiet)
+    host, port = server.server_address[:2]
+    print(f"🌐 Serving lyrics API on http://{host}:{port} ({args.workers} worker(s))")
+    print(f"📁 Local lyrics folder: {output_dir}")
+    print("   Endpoints: /lyrics?artist=&song=  /search?q=&artist=  /health")
+    
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def handle_export_command(args):
+    """Handle the export command."""
+    from batch_runner import lyrics_filename
+    from lyrics_pack import LyricsPack
+    from note_writer import NoteWriter, render_note
+    
+    if not os.path.exists(args.pack):
+        print(f"❌ Pack not found: {args.pack}")
+        return
+    
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    pack = LyricsPack(args.pack)
+    writer = NoteWriter(args.fsync)
+    counts = {'matched': 0, 'saved': 0, 'unchanged': 0, 'failed': 0}
+    
+    if not args.list:
+        print(f"📁 Output directory: {output_dir}")
+    
+    try:
+        for artist, song_title, lyrics, _ in pack.entries(args.artist, args.song):
+            counts['matched'] += 1
+            if args.list:
+                print(f"🎵 {artist} - {song_title}")
+                continue
+            
+            path = os.path.join(output_dir, lyrics_filename(artist, song_title))
+            try:
+                counts[writer.write(path, render_note(song_title, artist, lyrics))] += 1
+            except OSError as e:
+                counts['failed'] += 1
+                print(f"❌ Failed to write {path}: {e}")
+    finally:
+        pack.close()
+    
+    if args.list:
+        print(f"\n📦 {counts['matched']} matching song(s) in {args.pack}")
+        return
+    
+    print(f"✅ Exported {counts['saved']} note(s), {counts['unchanged']} already up to date")
+    if counts['failed']:
+        print(f"❌ Failed: {counts['failed']}")
+    if not counts['matched']:
+        print("🔍 No songs in the pack matched")
+
+def handle_sync_command(args):
+    """Handle the sync command."""
+    from rate_limit import TokenBucket, parse_rate
+    from vault_sync import SyncState, VaultSync, parse_duration
+    
+    try:
+        max_age = parse_duration(args.max_age)
+    except ValueError as e:
+        print(f"❌ Invalid --max-age '{args.max_age}': {e}")
+        return
+    try:
+        rate = parse_rate(args.rate)
+    except ValueError as e:
+        print(f"❌ Invalid --rate '{args.rate}': {e}")
+        return
+    
+    output_dir = args.output or DEFAULT_OUTPUT_DIR
+    if not os.path.isdir(output_dir):
+        print(f"❌ Lyrics folder not found: {output_dir}")
+        return
+    
+    print(f"📁 Lyrics folder: {output_dir}")
+    state = SyncState(output_dir, args.cache_dir)
+    try:
+        notes = state.scan()
+        fetcher = build_fetcher(args, concurrency=args.concurrency, rate_limiter=TokenBucket(rate))
+        fetcher.verbose = False
+        sync = VaultSync(fetcher, state, max_age=max_age, limit=args.limit, concurrency=args.concurrency,
+                         force=args.force)
+        stale = sync.stale_notes(notes)
+        print(f"🔄 {len(stale)} of {len(notes)} note(s) due for a refresh (max age {args.max_age})")
+        
+        if args.dry_run:
+            for note in stale:
+                kept = " (edited by hand, kept)" if note.edited and not args.force else ""
+                print(f"   {note.artist} - {note.song_title}{kept}")
+            return
+        
+        counts = {'updated': 0, 'unchanged': 0, 'not_modified': 0, 'missing': 0, 'edited': 0, 'error': 0}
+        for result in sync.run(stale):
+            counts[result.status] += 1
+            note = result.note
+            if result.status == 'updated':
+                print(f"✏️ Updated: {note.path}")
+            elif result.status == 'missing':
+                print(f"⚠️ No longer available, kept: {note.artist} - {note.song_title}")
+            elif result.status == 'edited':
+                print(f"✋ Edited by hand, kept: {note.path}")
+            elif result.status == 'error':
+                print(f"❌ Error refreshing {note.artist} - {note.song_title}: {result.error}")
+    finally:
+        state.close()
+    
+    print(f"\n📊 SYNC RESULTS:")
+    print(f"✏️ Updated: {counts['updated']}")
+    print(f"✅ Unchanged: {counts['unchanged'] + counts['not_modified']}"
+          + (f" ({counts['not_modified']} confirmed with 304)" if counts['not_modified'] else ""))
+    if counts['missing']:
+        print(f"⚠️ No longer available: {counts['missing']}")
+    if counts['edited']:
+        print(f"✋ Edited by hand, kept: {counts['edited']} (use --force to overwrite)")
+    if counts['error']:
+        print(f"❌ Errors: {counts['error']}")
 
 def download_lyrics(fetcher, artist, song_title, output_dir=None):
     """Download lyrics for a specific song."""
+    from batch_runner import lyrics_filename
+    
     if not output_dir:
-        output_dir = "/home/archboyknm/Documents/Obsidian/Lyrics/"
+        output_dir = DEFAULT_OUTPUT_DIR
     
     print(f"📡 Downloading: {artist} - {song_title}")
     print(f"📁 Output directory: {output_dir}")
@@ -211,10 +991,7 @@ def download_lyrics(fetcher, artist, song_title, output_dir=None):
     lyrics = fetcher.get_lyrics(artist, song_title)
     
     if lyrics:
-        # Create filename
-        safe_song = sanitize_filename(song_title)
-        safe_artist = sanitize_filename(artist)
-        filename = f"{safe_song} - {safe_artist}.md"
+        filename = lyrics_filename(artist, song_title)
         
         # Save file
         saved_path = fetcher.save_lyrics_to_file(
@@ -223,25 +1000,29 @@ def download_lyrics(fetcher, artist, song_title, output_dir=None):
         
         if saved_path:
             print(f"\n🎉 SUCCESS! Lyrics saved to: {saved_path}")
-            
-            # Ask to open file in interactive mode
-            if sys.stdin.isatty():
-                try:
-                    open_file = input("Open the file? (y/n): ").strip().lower()
-                    if open_file in ['y', 'yes']:
-                        import subprocess
-                        if os.name == 'nt':  # Windows
-                            os.startfile(saved_path)
-                        elif os.uname().sysname == 'Darwin':  # macOS
-                            subprocess.call(['open', saved_path])
-                        else:  # Linux
-                            subprocess.call(['xdg-open', saved_path])
-                except:
-                    pass
+            offer_to_open(saved_path)
         else:
             print("❌ Failed to save lyrics file.")
     else:
         print("❌ Failed to fetch lyrics. The song might not be available.")
 
+def offer_to_open(path):
+    """Ask to open a saved file when running interactively."""
+    if not sys.stdin.isatty():
+        return
+    
+    try:
+        open_file = input("Open the file? (y/n): ").strip().lower()
+        if open_file in ['y', 'yes']:
+            import subprocess
+            if os.name == 'nt':  # Windows
+                os.startfile(path)
+            elif os.uname().sysname == 'Darwin':  # macOS
+                subprocess.call(['open', path])
+            else:  # Linux
+                subprocess.call(['xdg-open', path])
+    except:
+        pass
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,329 @@
+"""
+In-process metrics: counters and latency histograms behind `--stats` and `/metrics`.
+
+Every fetcher path reports into the module-level REGISTRY: HTTP requests per
+endpoint and status, retries, bytes downloaded, cache hits and misses, search
+probes and file writes. Recording is a dict update under a lock, so metrics
+are always on. The registry renders as a human-readable summary, as JSON, or
+in the Prometheus text exposition format.
+"""
+
+import bisect
+import threading
+
+# Upper bounds in seconds; observations above the last bound land in +Inf
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROBE_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12)
+
+STATS_FORMATS = ('text', 'json', 'prometheus')
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._values.items())
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """
+        Sum of the counter over every label set matching the given labels.
+        """
+        return sum(value for key, value in self._matching(labels))
+
+    def _matching(self, labels):
+        wanted = {self.labelnames.index(name): str(value) for name, value in labels.items()}
+        for key, value in self._items():
+            if all(key[index] == value for index, value in wanted.items()):
+                yield key, value
+
+    def snapshot(self):
+        return [dict(zip(self.labelnames, key), value=value) for key, value in self._items()]
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _merged(self, labels):
+        wanted = {self.labelnames.index(name): str(value) for name, value in labels.items()}
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        count = 0
+        for key, (bucket_counts, key_sum, key_count) in self._items():
+            if all(key[index] == value for index, value in wanted.items()):
+                counts = [a + b for a, b in zip(counts, bucket_counts)]
+                total += key_sum
+                count += key_count
+        return counts, total, count
+
+    def count(self, **labels):
+        return self._merged(labels)[2]
+
+    def sum(self, **labels):
+        return self._merged(labels)[1]
+
+    def quantile(self, fraction, **labels):
+        """
+        Estimate a quantile from the buckets by linear interpolation, or None without data.
+        """
+        counts, _, count = self._merged(labels)
+        if not count:
+            return None
+
+        rank = fraction * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self):
+        rows = []
+        for key, (bucket_counts, total, count) in self._items():
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), bucket_counts):
+                cumulative += bucket_count
+                buckets[str(bound)] = cumulative
+            rows.append(dict(zip(self.labelnames, key), count=count, sum=round(total, 6), buckets=buckets))
+        return rows
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self):
+        for metric in self.metrics():
+            metric.reset()
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self.metrics()}
+
+    def to_json(self):
+        import json
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in metric._items():
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == 'counter':
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_number(value)}")
+                    continue
+
+                bucket_counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + ('+Inf',), bucket_counts):
+                    cumulative += bucket_count
+                    le = bound if bound == '+Inf' else _format_number(bound)
+                    lines.append(f"{metric.name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_number(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def render(self, stats_format='text'):
+        if stats_format == 'json':
+            return self.to_json()
+        if stats_format == 'prometheus':
+            return self.to_prometheus()
+        return format_summary()
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'lyrics_http_requests_total', 'HTTP requests by endpoint and status or error', ('endpoint', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'lyrics_http_request_seconds', 'HTTP request latency by endpoint and status', ('endpoint', 'status'))
+HTTP_RETRIES = REGISTRY.counter(
+    'lyrics_http_retries_total', 'Requests repeated after an error, gateway error or 429', ('endpoint', 'reason'))
+HTTP_BYTES = REGISTRY.counter(
+    'lyrics_http_response_bytes_total', 'Response body bytes downloaded', ('endpoint',))
+HEDGED_REQUESTS = REGISTRY.counter(
+    'lyrics_hedged_requests_total', 'Requests hedged to another provider', ('endpoint',))
+CACHE_LOOKUPS = REGISTRY.counter(
+    'lyrics_cache_lookups_total', 'Lyrics cache lookups', ('result',))
+SEARCHES = REGISTRY.histogram(
+    'lyrics_search_seconds', 'search_songs latency by where the answer came from', ('source',))
+SEARCH_PROBES = REGISTRY.histogram(
+    'lyrics_search_probes', 'API probes sent per search', buckets=PROBE_BUCKETS)
+PROBE_RESULTS = REGISTRY.counter(
+    'lyrics_search_probe_results_total', 'Search probe outcomes', ('result',))
+PROBE_TRANSFERS = REGISTRY.counter(
+    'lyrics_probe_transfers_total',
+    'Probes decided from the start of the body: aborted, read but not decoded, or cached', ('result',))
+FILE_WRITES = REGISTRY.histogram(
+    'lyrics_file_write_seconds', 'Time spent writing lyrics files by result (saved, unchanged, error)', ('result',))
+MISS_FILTER = REGISTRY.counter(
+    'lyrics_miss_filter_total', 'Songs skipped as known missing and misses recorded', ('result',))
+PREFETCHES = REGISTRY.counter(
+    'lyrics_prefetches_total', 'REPL lyrics prefetches by outcome (used, cancelled, discarded, failed, not_prefetched)',
+    ('result',))
+SERVER_REQUESTS = REGISTRY.counter(
+    'lyrics_server_requests_total', 'Requests answered by lyrics-cli serve', ('endpoint', 'status'))
+SINGLE_FLIGHT_SHARED = REGISTRY.counter(
+    'lyrics_server_shared_requests_total', 'Serve requests answered by another in-flight call', ('endpoint',))
+
+def record_request(endpoint, status, seconds, nbytes=0):
+    """
+    Record one HTTP request attempt; `status` is the HTTP status or an error name.
+    """
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=status)
+    HTTP_LATENCY.observe(seconds, endpoint=endpoint, status=status)
+    if nbytes:
+        HTTP_BYTES.inc(nbytes, endpoint=endpoint)
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+def _kib(nbytes):
+    return f"{nbytes / 1024:.1f} KiB"
+
+def format_summary():
+    """
+    Human-readable summary of the standard metrics.
+    """
+    lines = ["📊 Stats:"]
+
+    endpoints = sorted({row['endpoint'] for row in HTTP_REQUESTS.snapshot()})
+    for endpoint in endpoints:
+        statuses = ', '.join(
+            f"{row['status']}: {row['value']}" for row in HTTP_REQUESTS.snapshot() if row['endpoint'] == endpoint
+        )
+        lines.append(
+            f"   🌐 {endpoint}: {HTTP_REQUESTS.value(endpoint=endpoint)} request(s) ({statuses}), "
+            f"p50 {_ms(HTTP_LATENCY.quantile(0.5, endpoint=endpoint))}, "
+            f"p95 {_ms(HTTP_LATENCY.quantile(0.95, endpoint=endpoint))}, "
+            f"{_kib(HTTP_BYTES.value(endpoint=endpoint))}, "
+            f"{HTTP_LATENCY.sum(endpoint=endpoint):.2f}s waiting"
+        )
+        retries = HTTP_RETRIES.value(endpoint=endpoint)
+        if retries:
+            reasons = ', '.join(
+                f"{row['reason']}: {row['value']}" for row in HTTP_RETRIES.snapshot() if row['endpoint'] == endpoint
+            )
+            lines.append(f"      🔁 {retries} retr{'y' if retries == 1 else 'ies'} ({reasons})")
+        hedges = HEDGED_REQUESTS.value(endpoint=endpoint)
+        if hedges:
+            lines.append(f"      🔀 {hedges} hedged request(s)")
+    if not endpoints:
+        lines.append("   🌐 No API requests")
+
+    hits = CACHE_LOOKUPS.value(result='hit')
+    misses = CACHE_LOOKUPS.value(result='miss')
+    if hits or misses:
+        lines.append(f"   📦 Cache: {hits} hit(s), {misses} miss(es) ({hits / (hits + misses):.0%} hit rate)")
+
+    searches = SEARCHES.count()
+    if searches:
+        probes = SEARCH_PROBES.sum()
+        outcomes = ', '.join(f"{row['result']}: {row['value']}" for row in PROBE_RESULTS.snapshot())
+        lines.append(
+            f"   🔍 Searches: {searches}, p50 {_ms(SEARCHES.quantile(0.5))}, "
+            f"{probes / searches:.1f} probe(s)/search" + (f" ({outcomes})" if outcomes else "")
+        )
+
+    if PROBE_TRANSFERS.value():
+        outcomes = ', '.join(f"{row['result']}: {row['value']}" for row in PROBE_TRANSFERS.snapshot())
+        lines.append(f"   📶 Probes decided early: {outcomes}")
+
+    skipped = MISS_FILTER.value(result='skipped')
+    recorded = MISS_FILTER.value(result='recorded')
+    if skipped or recorded:
+        lines.append(f"   🚫 Known missing: {skipped} request(s) skipped, {recorded} new miss(es) recorded")
+
+    if PREFETCHES.value():
+        outcomes = ', '.join(f"{row['result']}: {row['value']}" for row in PREFETCHES.snapshot())
+        lines.append(f"   ⚡ Prefetch: {outcomes}")
+
+    writes = FILE_WRITES.count()
+    if writes:
+        unchanged = FILE_WRITES.count(result='unchanged')
+        lines.append(
+            f"   💾 File writes: {writes}, {FILE_WRITES.sum():.3f}s total"
+            + (f" ({unchanged} unchanged, not rewritten)" if unchanged else "")
+        )
+
+    served = SERVER_REQUESTS.value()
+    if served:
+        lines.append(f"   🖥️ Served: {served} request(s), {SINGLE_FLIGHT_SHARED.value()} shared an in-flight call")
+
+    return '\n'.join(lines)
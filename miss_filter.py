@@ -0,0 +1,267 @@
+"""
+Persistent filter of songs the lyrics API confirmed it doesn't have.
+
+Many batch lines and search probes ask for songs that lyrics.ovh simply
+doesn't know, and each such request costs a round trip or a timeout on
+every run. A MissFilter remembers those misses in a time-decaying Bloom
+filter stored next to the lyrics cache, so later runs skip them without
+a request.
+
+The filter is a ring of `generations` Bloom filters. New misses go into
+the newest one, which is retired after ttl / generations (or once it
+holds `capacity` misses), and the oldest is dropped. A miss is therefore
+forgotten after between (1 - 1/generations) * ttl and ttl, and songs that
+appear upstream later are eventually asked for again. Lookups may answer
+"missing" for a song that was never recorded with probability about
+`fp_rate`; they never miss a recorded song.
+
+With the defaults (1M misses per generation, 3 generations, 1% false
+positives) the file is about 4.5 MB.
+
+Several runs can share one filter file. Saving takes a lock file next to
+it, reads what other runs saved in the meantime and ORs their bits into
+the matching generations before replacing the file, so no run's misses
+are lost to another's save.
+"""
+
+import atexit
+import contextlib
+import math
+import os
+import struct
+import threading
+import time
+
+from song_keys import song_key
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_FP_RATE = 0.01
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30 days
+DEFAULT_GENERATIONS = 3
+
+# Write the filter back at most this often while a long run keeps adding misses
+AUTOSAVE_INTERVAL = 60.0
+
+_MAGIC = b'LYRMISS1'
+_HEADER = struct.Struct('<QII')      # bits per generation, hashes, generation count
+_GENERATION = struct.Struct('<dQ')   # created at, misses recorded
+
+def default_filter_path(cache_dir):
+    return os.path.join(cache_dir, 'misses.bloom')
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """
+    Hold an exclusive lock on `path` (created if needed) across processes.
+    """
+    with open(path, 'a+b') as f:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows: lock the first byte; LK_LOCK retries for about 10 seconds
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def filter_size(capacity, fp_rate, generations):
+    """
+    Return (bits per generation, hash count) for the requested capacity and overall false-positive rate.
+    """
+    if not 0 < fp_rate < 1:
+        raise ValueError("false-positive rate must be between 0 and 1")
+    # A lookup checks every generation, so each gets a share of the error budget
+    generation_rate = 1 - (1 - fp_rate) ** (1 / generations)
+    bits = math.ceil(-capacity * math.log(generation_rate) / math.log(2) ** 2)
+    bits = max(64, (bits + 7) // 8 * 8)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+class _Generation:
+    __slots__ = ('created_at', 'count', 'bits', 'synced')
+
+    def __init__(self, created_at, count, bits):
+        self.created_at = created_at
+        self.count = count
+        self.bits = bits
+        # `count` as of the last read or write of the file; the rest were added here
+        self.synced = count
+
+class MissFilter:
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, fp_rate=DEFAULT_FP_RATE, ttl=DEFAULT_TTL,
+                 generations=DEFAULT_GENERATIONS, log=None):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self.generations = max(1, generations)
+        self.bits, self.hashes = filter_size(capacity, fp_rate, self.generations)
+        # Called with a message when a saved filter has to be discarded
+        self._log = log
+
+        self._lock = threading.Lock()
+        # Newest first; read from disk on first use so commands that never miss don't pay for it
+        self._ring = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        atexit.register(self.save)
+
+    def might_contain(self, artist, song_title):
+        """
+        True if this song was recorded as missing (or, rarely, is a false positive).
+        """
+        positions = self._positions(artist, song_title)
+        with self._lock:
+            self._expire(time.time())
+            for generation in self._ring:
+                bits = generation.bits
+                if all(bits[position >> 3] & (1 << (position & 7)) for position in positions):
+                    return True
+        return False
+
+    def add(self, artist, song_title):
+        """
+        Record a song the API confirmed it doesn't have.
+        """
+        positions = self._positions(artist, song_title)
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            newest = self._ring[0] if self._ring else None
+            if newest is None or now - newest.created_at >= self.ttl / self.generations or newest.count >= self.capacity:
+                newest = _Generation(now, 0, bytearray(self.bits // 8))
+                self._ring.insert(0, newest)
+                del self._ring[self.generations:]
+
+            bits = newest.bits
+            for position in positions:
+                bits[position >> 3] |= 1 << (position & 7)
+            newest.count += 1
+            self._dirty = True
+            autosave = time.monotonic() - self._saved_at >= AUTOSAVE_INTERVAL
+
+        if autosave:
+            self.save()
+
+    def __len__(self):
+        with self._lock:
+            self._expire(time.time())
+            return sum(generation.count for generation in self._ring)
+
+    def save(self):
+        """
+        Merge the filter into the file on disk if misses were added since the last save.
+
+        Misses other runs saved meanwhile are kept: under a lock file, the
+        saved generations are ORed into the matching ones here before the
+        file is replaced atomically.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with _file_lock(f"{self.path}.lock"):
+                    self._merge(self._load())
+                    parts = [_MAGIC, _HEADER.pack(self.bits, self.hashes, len(self._ring))]
+                    for generation in self._ring:
+                        parts.append(_GENERATION.pack(generation.created_at, generation.count))
+                        parts.append(bytes(generation.bits))
+                    with open(tmp_path, 'wb') as f:
+                        f.write(b''.join(parts))
+                    os.replace(tmp_path, self.path)
+            except OSError:
+                # Losing the filter only costs repeated requests; never fail a run over it
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return
+            for generation in self._ring:
+                generation.synced = generation.count
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+    def _merge(self, saved):
+        """
+        OR generations saved by other runs into the ring. Must hold the lock.
+        """
+        now = time.time()
+        by_created = {generation.created_at: generation for generation in self._ring}
+        for theirs in saved:
+            if now - theirs.created_at >= self.ttl:
+                continue
+            ours = by_created.get(theirs.created_at)
+            if ours is None:
+                by_created[theirs.created_at] = theirs
+                continue
+            merged = int.from_bytes(ours.bits, 'little') | int.from_bytes(theirs.bits, 'little')
+            ours.bits = bytearray(merged.to_bytes(len(ours.bits), 'little'))
+            # Both started from the same saved count; add what each recorded since
+            ours.count = theirs.count + ours.count - ours.synced
+        ring = sorted(by_created.values(), key=lambda generation: generation.created_at, reverse=True)
+        self._ring = ring[:self.generations]
+
+    def _positions(self, artist, song_title):
+        # Imported here so cache hits never load OpenSSL
+        import hashlib
+
+        # Double hashing: k positions from two 64-bit halves of one digest
+        key = '\x1f'.join(song_key(artist, song_title)).encode('utf-8')
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def _expire(self, now):
+        """
+        Load the ring on first use and drop generations older than the TTL. Must hold the lock.
+        """
+        if self._ring is None:
+            self._ring = self._load()
+        live = [generation for generation in self._ring if now - generation.created_at < self.ttl]
+        if len(live) != len(self._ring):
+            self._ring = live
+            self._dirty = True
+
+    def _load(self):
+        """
+        Read the ring from disk; a missing, damaged or differently sized file starts empty.
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return []
+
+        if not data.startswith(_MAGIC) or len(data) < len(_MAGIC) + _HEADER.size:
+            return []
+        bits, hashes, count = _HEADER.unpack_from(data, len(_MAGIC))
+        if bits != self.bits or hashes != self.hashes:
+            if self._log is not None:
+                self._log(f"⚠️ Known-missing filter {self.path} was built with a different size or "
+                          "false-positive rate; starting a new one")
+            return []
+
+        ring = []
+        offset = len(_MAGIC) + _HEADER.size
+        size = bits // 8
+        for _ in range(min(count, self.generations)):
+            if len(data) < offset + _GENERATION.size + size:
+                return []
+            created_at, recorded = _GENERATION.unpack_from(data, offset)
+            offset += _GENERATION.size
+            ring.append(_Generation(created_at, recorded, bytearray(data[offset:offset + size])))
+            offset += size
+        return ring
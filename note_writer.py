@@ -0,0 +1,130 @@
+"""
+Atomic, change-aware writer for lyrics notes.
+
+A note is rendered into one string and written with a single call to a
+temporary file next to its destination, which is then renamed over the
+destination. Readers (and Obsidian) see either the old note or the new one,
+never a truncated file from an interrupted run. A note whose content is
+unchanged is not rewritten at all, so its mtime stays put and sync tools see
+no churn. Directories are created once per writer instead of on every save.
+
+How hard a write tries to survive a power loss is the fsync policy:
+
+    none  rename only; safe against crashes of this process (default)
+    file  fsync the note before the rename
+    full  also fsync the directory after the rename
+"""
+
+import os
+import threading
+
+FSYNC_POLICIES = ('none', 'file', 'full')
+DEFAULT_FSYNC = 'none'
+
+def render_note(song_title, artist, lyrics_text):
+    """
+    Render the markdown note for a song; parse_note_text reads this format back.
+    """
+    return (
+        f"# {song_title}\n"
+        f"**Artist:** {artist}\n\n"
+        "---\n\n"
+        f"{lyrics_text}\n\n"
+        "---\n"
+        "\n*Fetched using Lyrics API*\n"
+    )
+
+def _current_umask():
+    # os.umask can only be read by setting it; done once per writer
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+class NoteWriter:
+    def __init__(self, fsync=DEFAULT_FSYNC):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {', '.join(FSYNC_POLICIES)}")
+        self.fsync = fsync
+        # New notes get the mode open() would have given them
+        self._file_mode = 0o666 & ~_current_umask()
+        self._dirs = set()
+        self._lock = threading.Lock()
+
+    def ensure_dir(self, directory):
+        """
+        Create a directory the first time it is written to.
+        """
+        directory = os.path.abspath(directory)
+        if directory in self._dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._dirs.add(directory)
+
+    def is_unchanged(self, path, data):
+        """
+        True if the file at path already holds exactly these bytes.
+        """
+        # A size mismatch settles most changed notes without reading them
+        try:
+            if os.path.getsize(path) != len(data):
+                return False
+            with open(path, 'rb') as f:
+                return f.read() == data
+        except OSError:
+            return False
+
+    def write(self, path, text):
+        """
+        Write text to path atomically. Returns 'saved', or 'unchanged' if nothing was written.
+        """
+        data = text.encode('utf-8')
+        if self.is_unchanged(path, data):
+            return 'unchanged'
+
+        directory, name = os.path.split(os.path.abspath(path))
+        self.ensure_dir(directory)
+
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except OSError:
+            mode = self._file_mode
+
+        # A dotfile in the same directory, so the rename never crosses filesystems
+        # and Obsidian ignores it while it exists
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            try:
+                view = memoryview(data)
+                written = 0
+                while written < len(view):
+                    written += os.write(fd, view[written:])
+                if self.fsync != 'none':
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        if self.fsync == 'full':
+            self._fsync_dir(directory)
+        return 'saved'
+
+    def _fsync_dir(self, directory):
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            # Not supported for directories on every platform/filesystem
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,210 @@
+"""
+Lyrics providers used by LyricsFetcher.
+
+A provider knows how to build the request URL for an artist/song and how to
+read lyrics out of the decoded response. The HTTP request itself is made by
+the fetcher's HttpTransport, so every provider shares its rate limiting and
+connection pool, and the async fetcher can reuse the same URL and parsing logic.
+
+A search provider does the same for a whole search query, returning ranked
+(artist, title) matches from one request.
+"""
+
+import json
+import os
+import re
+from urllib.parse import quote, urlencode
+
+from endpoint_health import EndpointHealth
+
+# Hedge delay used until a provider has enough latency samples
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_DELAY = 0.05
+
+# Probes count a song as available when its lyrics are longer than this (after stripping)
+MIN_LYRICS_LENGTH = 10
+
+MUSIXMATCH_APP_ID = 'web-desktop-app-v1.0'
+# The desktop API needs a user token; it is read from the environment, never the command line
+MUSIXMATCH_TOKEN_ENV = 'MUSIXMATCH_TOKEN'
+
+def musixmatch_token():
+    return os.environ.get(MUSIXMATCH_TOKEN_ENV, '').strip() or None
+
+class ProviderError(Exception):
+    """
+    Raised when a provider answers with something other than lyrics or 'not found'.
+    """
+
+class LyricsProvider:
+    """
+    Base class for lyrics sources.
+    """
+    name = 'provider'
+
+    def __init__(self, base_url, name=None):
+        self.base_url = base_url.rstrip('/')
+        if name:
+            self.name = name
+        # Extra headers for this provider, on top of the transport's defaults
+        self.headers = None
+        # Latency statistics, adaptive timeouts and circuit breaker for this endpoint
+        self.health = EndpointHealth(self.name)
+
+    def lyrics_url(self, artist, song_title):
+        raise NotImplementedError
+
+    def parse_lyrics(self, status_code, data):
+        """
+        Return raw lyrics from a decoded response, None if the API says the song
+        isn't available, or raise ProviderError for any other answer (including
+        a 200 whose body isn't the API's JSON, like a maintenance page).
+        """
+        raise NotImplementedError
+
+    def probe_prefix(self, prefix):
+        """
+        Look at the first bytes of a 200 response body: True if they already show
+        usable lyrics, None if the whole body is needed to tell.
+        """
+        return None
+
+    def hedge_delay(self):
+        """
+        How long to wait for this provider before hedging: its recent p95 latency.
+        """
+        p95 = self.health.percentile(0.95)
+        if p95 is None:
+            return DEFAULT_HEDGE_DELAY
+        return max(MIN_HEDGE_DELAY, p95)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} {self.base_url}>"
+
+class LyricsOvhProvider(LyricsProvider):
+    """
+    api.lyrics.ovh, or any server with the same /v1/<artist>/<song> API.
+    """
+    name = 'lyrics.ovh'
+
+    def lyrics_url(self, artist, song_title):
+        clean_artist = quote(artist.strip())
+        clean_song = quote(song_title.strip())
+        return f"{self.base_url}/{clean_artist}/{clean_song}"
+
+    # '{"lyrics": "' at the start of the body
+    _LYRICS_FIELD = re.compile(rb'\s*\{\s*"lyrics"\s*:\s*"')
+
+    def probe_prefix(self, prefix):
+        match = self._LYRICS_FIELD.match(prefix)
+        if match is None:
+            return None
+
+        # Take the string up to its closing quote, or what has arrived of it,
+        # dropping an escape sequence cut off at the end
+        text = prefix[match.end():]
+        end = 0
+        while end < len(text) and text[end:end + 1] != b'"':
+            end += 2 if text[end:end + 1] == b'\\' else 1
+        content = text[:min(end, len(text))]
+        if end >= len(text):
+            if end > len(text):
+                content = content[:-1]
+            escape = content.rfind(b'\\u')
+            if escape != -1 and len(content) - escape < 6:
+                content = content[:escape]
+
+        try:
+            # A multi-byte character cut off at the end is dropped too
+            lyrics = json.loads('"' + content.decode('utf-8', 'ignore') + '"')
+        except ValueError:
+            return None
+        return True if len(lyrics.strip()) > MIN_LYRICS_LENGTH else None
+
+    def parse_lyrics(self, status_code, data):
+        if status_code == 200:
+            # None when the body wasn't JSON at all (HTML error page, truncated transfer)
+            if not isinstance(data, dict) or 'lyrics' not in data:
+                raise ProviderError(f"{self.name} returned a response without lyrics JSON")
+            return data['lyrics'] or None
+
+        if status_code == 404:
+            return None
+
+        raise ProviderError(f"{self.name} returned HTTP {status_code}")
+
+class MusixmatchSearchProvider:
+    """
+    Musixmatch track.search: ranked (artist, title) matches for a query in one request.
+
+    Used by search_songs instead of probing guessed pairs one lyrics request at a
+    time. Only the search goes to Musixmatch; lyrics for the chosen result still
+    come from the lyrics providers, which return full texts.
+    """
+    name = 'musixmatch'
+
+    def __init__(self, base_url, token, page_size=10, name=None):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.page_size = page_size
+        if name:
+            self.name = name
+        self.headers = None
+        self.health = EndpointHealth(self.name)
+
+    def search_url(self, query, artist=None):
+        params = {
+            'format': 'json',
+            'app_id': MUSIXMATCH_APP_ID,
+            'usertoken': self.token,
+            'page': 1,
+            'page_size': self.page_size,
+            'f_has_lyrics': 1,
+            's_track_rating': 'desc',
+        }
+        if artist:
+            params['q_track'] = query.strip()
+            params['q_artist'] = artist.strip()
+        else:
+            # Matches 'Song', 'Artist Song' and 'Artist - Song' alike
+            params['q_track_artist'] = query.strip()
+        return f"{self.base_url}/track.search?{urlencode(params)}"
+
+    def parse_search(self, status_code, data):
+        """
+        Return a list of {'artist', 'song', 'track_id'} matches in Musixmatch's ranking,
+        or raise ProviderError if the API refused the search.
+        """
+        if status_code != 200:
+            raise ProviderError(f"{self.name} returned HTTP {status_code}")
+
+        # Errors come back as HTTP 200 with the real status in the message header
+        message = data.get('message') if isinstance(data, dict) else None
+        if not isinstance(message, dict):
+            raise ProviderError(f"{self.name} returned an unexpected response")
+        api_status = (message.get('header') or {}).get('status_code')
+        if api_status == 404:
+            return []
+        if api_status == 401:
+            raise ProviderError(f"{self.name} rejected the token in ${MUSIXMATCH_TOKEN_ENV}")
+        if api_status != 200:
+            raise ProviderError(f"{self.name} returned status {api_status}")
+
+        body = message.get('body')
+        track_list = body.get('track_list') if isinstance(body, dict) else None
+        matches = []
+        for item in track_list or []:
+            track = item.get('track') if isinstance(item, dict) else None
+            if not track or not track.get('track_name') or not track.get('artist_name'):
+                continue
+            if track.get('has_lyrics') == 0 or track.get('instrumental') == 1:
+                continue
+            matches.append({
+                'artist': track['artist_name'],
+                'song': track['track_name'],
+                'track_id': track.get('track_id'),
+            })
+        return matches
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} {self.base_url}>"
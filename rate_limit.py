@@ -0,0 +1,108 @@
+"""
+Token-bucket rate limiting shared by all requests of a LyricsFetcher.
+"""
+
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """
+        Allow `rate` requests per second on average, with bursts of up to `burst`.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available, then consume it.
+        """
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """
+        Consume a token if one is available and return 0, otherwise return how long to wait.
+
+        Lets callers that can't block, like the asyncio fetcher, do their own sleeping.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for `seconds`, e.g. after an HTTP 429 with Retry-After.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            # Start from an empty bucket once the pause is over so we don't burst
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+def parse_rate(text):
+    """
+    Parse a rate such as '5', '5/s', '300/m' or '1000/h' into requests per second.
+    """
+    units = {'s': 1.0, 'sec': 1.0, 'm': 60.0, 'min': 60.0, 'h': 3600.0}
+
+    text = text.strip().lower()
+    if '/' in text:
+        amount, unit = text.split('/', 1)
+        unit = unit.strip()
+        if unit not in units:
+            raise ValueError(f"unknown rate unit '{unit}' (use /s, /m or /h)")
+        rate = float(amount) / units[unit]
+    else:
+        rate = float(text)
+
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    return rate
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (seconds or HTTP date) into seconds to wait, or None.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # Only needed for the rare HTTP-date form; email.utils is slow to import
+    import email.utils
+    
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
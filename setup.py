@@ -24,12 +24,15 @@ setup(
     
     # Package configuration
     packages=find_packages(),
-    py_modules=['lyrics_fetcher', 'main'],
+    py_modules=['lyrics_fetcher', 'lyrics_cache', 'rate_limit', 'batch_runner', 'batch_journal', 'batch_input', 'vault_index', 'note_writer', 'lyrics_pack', 'vault_sync', 'song_keys', 'miss_filter', 'lyrics_repl', 'work_queue', 'candidate_planner', 'providers', 'endpoint_health', 'transport', 'async_fetcher', 'lyrics_server', 'metrics', 'tracing', 'main'],
     
     # Dependencies
     install_requires=[
         'requests>=2.25.0',
     ],
+    extras_require={
+        'async': ['aiohttp>=3.7'],
+    },
     
     # Python version requirement
     python_requires='>=3.6',
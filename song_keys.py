@@ -0,0 +1,121 @@
+"""
+Canonical keys for artist and song names.
+
+Different spellings of the same song should share one cache entry, one
+probe and one note. song_key() reduces an artist/title pair to a canonical
+form:
+
+    - Unicode NFKC (full-width letters and punctuation become ASCII) and casefold
+    - accents removed ('Beyoncé' -> 'beyonce')
+    - featuring, remaster and live suffixes dropped from titles
+      ('Song (feat. X)', 'Song - Remastered 2011', 'Song (Live at Wembley)')
+    - a leading 'The' dropped from artists and '&' read as 'and'
+    - apostrophes removed, other punctuation and whitespace collapsed to single spaces
+
+Keys are only used to identify songs; requests still send the names as typed.
+Results are memoized, and pure-ASCII names skip the Unicode work entirely,
+so batches with millions of rows spend little time here.
+"""
+
+import functools
+import re
+import unicodedata
+
+# Stored keys are rebuilt when this changes (1 was lowercase with collapsed whitespace)
+KEY_VERSION = 2
+
+_CACHE_SIZE = 1 << 16
+
+_FEAT = r'(?:feat\.?|ft\.?|featuring)'
+_SUFFIX_WORDS = r'(?:[^()\[\]]*\bremaster(?:ed)?\b[^()\[\]]*|live\b[^()\[\]]*)'
+
+# '(feat. X)', '[ft. X]', '(Remastered 2011)', '(2011 Remaster)', '(Live)', '(Live at Wembley)'
+_BRACKETED = re.compile(rf'\s*[(\[](?:{_FEAT}\s[^()\[\]]*|{_SUFFIX_WORDS})[)\]]', re.IGNORECASE)
+# 'Song - Remastered 2011', 'Song - 2011 Remaster', 'Song - Live at Wembley'
+_DASHED = re.compile(r'\s+[-–—]\s+(?:[^-–—]*\bremaster(?:ed)?\b.*|live\b.*)$', re.IGNORECASE)
+# 'Song feat. X', 'Artist ft. X'
+_TRAILING_FEAT = re.compile(rf'\s+{_FEAT}\s.*$', re.IGNORECASE)
+
+_APOSTROPHES = re.compile("['’`]")
+_NON_WORD = re.compile(r'[\W_]+')
+
+def _is_ascii(text):
+    """
+    str.isascii() without needing Python 3.7.
+    """
+    # UTF-8 only grows for non-ASCII characters
+    return len(text.encode('utf-8', 'surrogatepass')) == len(text)
+
+def _fold(text):
+    """
+    NFKC-normalize, casefold and strip accents.
+    """
+    if _is_ascii(text):
+        return text.lower()
+
+    text = unicodedata.normalize('NFKC', text).casefold()
+    if not _is_ascii(text):
+        decomposed = unicodedata.normalize('NFKD', text)
+        text = unicodedata.normalize('NFC', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+    return text
+
+def _words(text):
+    # Most names are already just letters, digits and spaces
+    if not text.replace(' ', '').isalnum():
+        text = _APOSTROPHES.sub('', text.replace('&', ' and '))
+        text = _NON_WORD.sub(' ', text)
+    return ' '.join(text.split())
+
+# The substring checks below skip each regex for the many names it can't match
+
+def _strip_feat(text):
+    lowered = text.lower()
+    if 'ft' in lowered or 'feat' in lowered:
+        text = _TRAILING_FEAT.sub('', text)
+    return text
+
+def _strip_title_suffixes(text):
+    if '(' in text or '[' in text:
+        text = _BRACKETED.sub('', text)
+    if '-' in text or '–' in text or '—' in text:
+        text = _DASHED.sub('', text)
+    return _strip_feat(text)
+
+def _strip_artist_suffixes(text):
+    if '(' in text or '[' in text:
+        text = _BRACKETED.sub('', text)
+    return _strip_feat(text)
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def canonical_title(title):
+    folded = _fold(title)
+    # A title that is nothing but a suffix ('Live') keeps it
+    return _words(_strip_title_suffixes(folded)) or _words(folded)
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def canonical_artist(artist):
+    folded = _fold(artist)
+    words = _words(_strip_artist_suffixes(folded)) or _words(folded)
+    if words.startswith('the ') and len(words) > 4:
+        words = words[4:]
+    return words
+
+def song_key(artist, song_title):
+    """
+    Return the canonical (artist, title) key for a song.
+    """
+    return canonical_artist(artist), canonical_title(song_title)
+
+def display_title(song_title):
+    """
+    The title as shown and used in filenames: NFKC-normalized, suffixes dropped, case kept.
+    """
+    text = ' '.join(unicodedata.normalize('NFKC', song_title).split())
+    return _strip_title_suffixes(text).strip() or text
+
+def display_artist(artist):
+    """
+    The artist as shown and used in filenames, without 'feat.' guests.
+    """
+    text = ' '.join(unicodedata.normalize('NFKC', artist).split())
+    return _strip_artist_suffixes(text).strip() or text
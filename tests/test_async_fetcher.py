@@ -0,0 +1,61 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from async_fetcher import AsyncLyricsFetcher
+
+LYRICS = "Is this the real life? Is this just fantasy?"
+
+class RecordingCache:
+    """
+    Remembers which threads touched it.
+    """
+    def __init__(self):
+        self.threads = []
+
+    def get(self, artist, song_title):
+        self.threads.append(threading.current_thread())
+        return None
+
+    def put(self, artist, song_title, lyrics):
+        self.threads.append(threading.current_thread())
+
+class RecordingMissFilter(RecordingCache):
+    def might_contain(self, artist, song_title):
+        self.threads.append(threading.current_thread())
+        return False
+
+    def add(self, artist, song_title):
+        self.threads.append(threading.current_thread())
+
+class FakeTransport:
+    def __init__(self, lyrics):
+        self.lyrics = lyrics
+
+    async def get(self, url, timeout, headers=None, health=None, probe=None):
+        if self.lyrics is None:
+            return 404, b''
+        return 200, json.dumps({'lyrics': self.lyrics}).encode()
+
+    async def close(self):
+        pass
+
+@pytest.mark.parametrize('lyrics', [LYRICS, None])
+def test_local_storage_stays_off_the_event_loop(lyrics):
+    cache, miss_filter = RecordingCache(), RecordingMissFilter()
+    fetcher = AsyncLyricsFetcher(cache=cache, miss_filter=miss_filter, verbose=False,
+                                 transport=FakeTransport(lyrics))
+
+    async def fetch():
+        return threading.current_thread(), await fetcher.fetch_lyrics('Queen', 'Bohemian Rhapsody')
+
+    loop_thread, fetched = asyncio.run(fetch())
+
+    assert (fetched or None) == (LYRICS if lyrics else None)
+    # get and put, or get plus the miss filter's lookup and record
+    assert len(cache.threads + miss_filter.threads) >= 2
+    assert loop_thread not in cache.threads + miss_filter.threads
@@ -0,0 +1,51 @@
+import json
+import threading
+
+from batch_journal import BatchJournal
+
+def test_replayed_statuses(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = BatchJournal(path)
+    journal.record(1, 'Queen', 'Bohemian Rhapsody', 'saved', path='/vault/Bohemian Rhapsody - Queen.md')
+    journal.record(2, 'Nobody', 'Unknown Song', 'not_found')
+    journal.record(3, 'Adele', 'Hello', 'error', error='timeout')
+    journal.close()
+
+    journal = BatchJournal(path)
+    try:
+        assert journal.is_completed('queen', 'bohemian rhapsody')
+        assert journal.is_missing('Nobody', 'Unknown Song')
+        assert not journal.is_completed('Nobody', 'Unknown Song')
+        assert not journal.is_completed('Adele', 'Hello') and not journal.is_missing('Adele', 'Hello')
+        assert journal.status('Nobody', 'Other Song') is None
+    finally:
+        journal.close()
+
+def last_record(path):
+    with open(path, encoding='utf-8') as f:
+        return json.loads(f.readlines()[-1])
+
+def test_concurrent_errors_are_all_counted(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = BatchJournal(path)
+    threads = [
+        threading.Thread(target=lambda: [journal.record(1, 'Adele', 'Hello', 'error') for _ in range(200)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+    assert last_record(path)['retries'] == 800
+
+def test_error_count_carries_over_a_resume(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = BatchJournal(path)
+    journal.record(1, 'Adele', 'Hello', 'error', error='timeout')
+    journal.close()
+
+    journal = BatchJournal(path)
+    journal.record(1, 'Adele', 'Hello', 'error', error='timeout')
+    journal.close()
+    assert last_record(path)['retries'] == 2
@@ -0,0 +1,16 @@
+from batch_runner import BatchEntry, BatchRunner, lyrics_filename
+
+class NoNetworkFetcher:
+    def get_lyrics(self, artist, song_title):
+        raise AssertionError(f"fetched {artist} - {song_title} although it is saved")
+
+def test_saved_note_with_stripped_characters_is_found(tmp_path):
+    filename = lyrics_filename('AC/DC', 'Back In Black')
+    assert filename == 'Back In Black - ACDC.md'
+    (tmp_path / filename).write_text('saved', encoding='utf-8')
+
+    runner = BatchRunner(NoNetworkFetcher(), str(tmp_path))
+    results = list(runner.run([BatchEntry(1, 'AC/DC', 'Back In Black')]))
+
+    assert [result.status for result in results] == ['exists']
+    assert results[0].path == str(tmp_path / filename)
@@ -0,0 +1,14 @@
+import argparse
+
+import main
+
+def test_search_fetcher_builds_planner_on_first_use(tmp_path, monkeypatch):
+    built = []
+    monkeypatch.setattr(main, 'build_planner', lambda *args: built.append(args) or 'planner')
+
+    fetcher = main.build_fetcher(argparse.Namespace(cache_dir=str(tmp_path)), for_search=True)
+    assert built == []
+
+    assert fetcher.planner == 'planner'
+    assert fetcher.planner == 'planner'
+    assert len(built) == 1
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LYRICS = "Is this the real life? Is this just fantasy?\n" * 5
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(4)
+        try:
+            self.send_response(404)
+            self.end_headers()
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+class FastHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({'lyrics': LYRICS}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@pytest.fixture
+def servers():
+    slow, fast = serve(SlowHandler), serve(FastHandler)
+    yield f"http://127.0.0.1:{slow.server_port}/v1", f"http://127.0.0.1:{fast.server_port}/v1"
+    for server in (slow, fast):
+        server.shutdown()
+        server.server_close()
+
+SCRIPT = """
+import sys, time
+from lyrics_fetcher import LyricsFetcher
+from providers import LyricsOvhProvider
+slow = LyricsOvhProvider(sys.argv[1], name='slow')
+slow.hedge_delay = lambda: 0.1
+fetcher = LyricsFetcher(search_timeout=10, verbose=False, hedge=True,
+                        providers=[slow, LyricsOvhProvider(sys.argv[2], name='fast')])
+start = time.monotonic()
+lyrics = fetcher._fetch_hedged('Queen', 'Bohemian Rhapsody', 10)
+print(len(lyrics or ''))
+print(round(time.monotonic() - start, 2))
+"""
+
+def test_slow_provider_does_not_delay_return_or_exit(servers):
+    start = time.monotonic()
+    output = subprocess.run(
+        [sys.executable, '-c', SCRIPT, *servers], cwd=REPO, capture_output=True, text=True, timeout=30
+    )
+    elapsed = time.monotonic() - start
+
+    assert output.returncode == 0, output.stderr
+    length, fetch_seconds = output.stdout.split()
+    assert int(length) > 0
+    assert float(fetch_seconds) < 1.5
+    # The slow provider is still waiting on its server; exiting must not wait for it
+    assert elapsed < 3
@@ -0,0 +1,30 @@
+from miss_filter import MissFilter
+
+def test_concurrent_runs_keep_each_others_misses(tmp_path):
+    path = str(tmp_path / 'misses.bloom')
+    seed = MissFilter(path, capacity=1000)
+    seed.add('Queen', 'Lost Song')
+    seed.save()
+
+    first, second = MissFilter(path, capacity=1000), MissFilter(path, capacity=1000)
+    first.add('Queen', 'First Miss')
+    second.add('Queen', 'Second Miss')
+    first.save()
+    second.save()
+
+    merged = MissFilter(path, capacity=1000)
+    for song in ('Lost Song', 'First Miss', 'Second Miss'):
+        assert merged.might_contain('Queen', song)
+    assert len(merged) == 3
+
+def test_different_fp_rate_is_reported(tmp_path):
+    path = str(tmp_path / 'misses.bloom')
+    saved = MissFilter(path, capacity=1000)
+    saved.add('Queen', 'Lost Song')
+    saved.save()
+
+    messages = []
+    reopened = MissFilter(path, capacity=1000, fp_rate=0.001, log=messages.append)
+    assert not reopened.might_contain('Queen', 'Lost Song')
+    assert len(messages) == 1
+    assert 'false-positive rate' in messages[0]
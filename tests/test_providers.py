@@ -0,0 +1,62 @@
+import pytest
+
+from lyrics_fetcher import LyricsFetcher
+from miss_filter import MissFilter
+from providers import LyricsOvhProvider, ProviderError
+
+class FakeResponse:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+class FakeTransport:
+    """
+    Answers every request with the same response.
+    """
+    def __init__(self, status_code, content):
+        self.response = FakeResponse(status_code, content)
+
+    def get(self, url, timeout, headers=None, health=None, probe=None):
+        if probe is not None and self.response.status_code == 200:
+            probe.feed(self.response.content)
+            probe.complete = True
+        return self.response
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def provider():
+    return LyricsOvhProvider('http://lyrics.test/v1')
+
+def test_parse_lyrics_not_found_answers(provider):
+    assert provider.parse_lyrics(404, {'error': 'No lyrics found'}) is None
+    assert provider.parse_lyrics(200, {'lyrics': ''}) is None
+    assert provider.parse_lyrics(200, {'lyrics': 'la la la'}) == 'la la la'
+
+@pytest.mark.parametrize('data', [None, [], {'error': 'maintenance'}])
+def test_parse_lyrics_rejects_200_without_lyrics_json(provider, data):
+    with pytest.raises(ProviderError):
+        provider.parse_lyrics(200, data)
+
+def make_fetcher(provider, tmp_path, status_code, content):
+    miss_filter = MissFilter(str(tmp_path / 'misses.bloom'), capacity=1000)
+    fetcher = LyricsFetcher(providers=[provider], hedge=False, verbose=False, miss_filter=miss_filter,
+                            transport=FakeTransport(status_code, content))
+    return fetcher, miss_filter
+
+def test_html_page_is_not_recorded_as_missing(provider, tmp_path):
+    fetcher, miss_filter = make_fetcher(provider, tmp_path, 200, b'<html><body>Down for maintenance</body></html>')
+
+    with pytest.raises(ProviderError):
+        fetcher.fetch_lyrics('Queen', 'Bohemian Rhapsody')
+    with pytest.raises(ProviderError):
+        fetcher.probe_lyrics('Queen', 'Bohemian Rhapsody')
+    assert not miss_filter.might_contain('Queen', 'Bohemian Rhapsody')
+
+def test_not_found_is_recorded_as_missing(provider, tmp_path):
+    fetcher, miss_filter = make_fetcher(provider, tmp_path, 404, b'{"error": "No lyrics found"}')
+
+    assert fetcher.fetch_lyrics('Queen', 'Bohemian Rhapsody') is None
+    assert miss_filter.might_contain('Queen', 'Bohemian Rhapsody')
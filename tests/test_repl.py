@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import time
+
+from lyrics_repl import LyricsRepl
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FakeFetcher:
+    def __init__(self):
+        self.searches = []
+        self.fetched = []
+
+    def search_songs(self, query, artist=None, use_vault=True):
+        self.searches.append(query)
+        return [{'artist': 'Prince', 'song': f'{query} {i}', 'source': 'vault', 'path': f'/{i}.md'}
+                for i in range(1, 4)]
+
+def run(lines):
+    fetcher = FakeFetcher()
+    opened = []
+    inputs = iter(lines)
+    repl = LyricsRepl(fetcher, '/tmp', prefetch=0, input_func=lambda prompt: next(inputs),
+                      open_func=opened.append)
+    repl.run()
+    return fetcher, opened
+
+def test_number_without_results_is_searched():
+    fetcher, opened = run(['1999', 'q'])
+    assert fetcher.searches == ['1999']
+    assert opened == []
+
+def test_number_on_the_list_is_a_pick():
+    fetcher, opened = run(['purple rain', '2', 'q'])
+    assert fetcher.searches == ['purple rain']
+    assert opened == ['/2.md']
+
+def test_number_past_the_list_is_searched():
+    fetcher, opened = run(['purple rain', '22', 'q'])
+    assert fetcher.searches == ['purple rain', '22']
+    assert opened == []
+
+SLOW_PREFETCH = """
+import time
+from lyrics_repl import Prefetcher
+
+class SlowFetcher:
+    def prefetch_lyrics(self, artist, song):
+        time.sleep(5)
+
+prefetcher = Prefetcher(SlowFetcher(), depth=2)
+prefetcher.start([{'artist': 'Prince', 'song': f'Song {i}'} for i in range(4)])
+time.sleep(0.2)
+prefetcher.close()
+"""
+
+def test_close_does_not_wait_for_prefetches():
+    start = time.monotonic()
+    output = subprocess.run([sys.executable, '-c', SLOW_PREFETCH], cwd=REPO,
+                            capture_output=True, text=True, timeout=30)
+    assert output.returncode == 0, output.stderr
+    assert time.monotonic() - start < 3
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(4)
+        try:
+            self.send_response(404)
+            self.end_headers()
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+SCRIPT = """
+import sys, time
+from lyrics_fetcher import LyricsFetcher
+from providers import LyricsOvhProvider
+fetcher = LyricsFetcher(search_timeout=0.5, verbose=False, hedge=False,
+                        providers=[LyricsOvhProvider(sys.argv[1])])
+candidates = [{'artist': 'Queen', 'song': f'Song {i}'} for i in range(4)]
+start = time.monotonic()
+print(len(fetcher._probe_candidates(candidates)))
+print(round(time.monotonic() - start, 2))
+"""
+
+def test_search_deadline_bounds_process_exit(slow_server):
+    start = time.monotonic()
+    output = subprocess.run(
+        [sys.executable, '-c', SCRIPT, slow_server], cwd=REPO, capture_output=True, text=True, timeout=30
+    )
+    elapsed = time.monotonic() - start
+
+    assert output.returncode == 0, output.stderr
+    results, search_seconds = output.stdout.split()
+    assert results == '0'
+    assert float(search_seconds) < 1.5
+    # The probes are still waiting on the server; exiting must not wait for them
+    assert elapsed < 3
@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lyrics_cache import LyricsCache
+from lyrics_fetcher import LyricsFetcher
+from providers import LyricsOvhProvider
+from transport import BodyProbe, HttpTransport
+
+LYRICS = "Is this the real life? Is this just fantasy?\n" * 100
+BODY = json.dumps({'lyrics': LYRICS}).encode('utf-8')
+
+class StallingHandler(BaseHTTPRequestHandler):
+    """
+    Sends the first 2 KB of the body, then stalls on the first request; later requests get all of it.
+    """
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        if type(self).requests == 1:
+            self.wfile.write(BODY[:2048])
+            self.wfile.flush()
+            time.sleep(1.5)
+            return
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stalling_server():
+    StallingHandler.requests = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StallingHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+def test_probe_retry_starts_from_empty_body(stalling_server):
+    transport = HttpTransport(retries=2, backoff=0.01)
+    provider = LyricsOvhProvider(stalling_server)
+    probe = BodyProbe(provider.probe_prefix)
+
+    response = transport.get(provider.lyrics_url('Queen', 'Bohemian Rhapsody'), 0.5, probe=probe)
+
+    assert response.status_code == 200
+    assert StallingHandler.requests == 2
+    assert probe.complete
+    assert probe.body == BODY
+
+def test_probe_lyrics_after_stalled_attempt(stalling_server, tmp_path):
+    provider = LyricsOvhProvider(stalling_server)
+    cache = LyricsCache(str(tmp_path))
+    fetcher = LyricsFetcher(providers=[provider], hedge=False, verbose=False, cache=cache,
+                            transport=HttpTransport(retries=2, backoff=0.01))
+    fetcher.PROBE_TIMEOUT = 0.5
+
+    assert fetcher.probe_lyrics('Queen', 'Bohemian Rhapsody') is True
+    assert StallingHandler.requests == 2
+    assert cache.get('Queen', 'Bohemian Rhapsody') == LYRICS.strip()
+
+def test_async_probe_retry_starts_from_empty_body(stalling_server):
+    pytest.importorskip('aiohttp')
+    import asyncio
+    from async_fetcher import AsyncHttpTransport
+
+    provider = LyricsOvhProvider(stalling_server)
+    probe = BodyProbe(provider.probe_prefix)
+
+    async def probe_once():
+        transport = AsyncHttpTransport(retries=2, backoff=0.01)
+        try:
+            return await transport.get(provider.lyrics_url('Queen', 'Bohemian Rhapsody'), 0.5, probe=probe)
+        finally:
+            await transport.close()
+
+    status_code, body = asyncio.run(probe_once())
+
+    assert status_code == 200
+    assert body is None
+    assert StallingHandler.requests == 2
+    assert probe.complete
+    assert probe.body == BODY
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+
+import pytest
+
+import vault_index
+from note_writer import render_note
+from vault_index import VaultIndex
+
+SONGS = [
+    ('Queen', 'Bohemian Rhapsody'),
+    ('Queen', 'Love of My Life'),
+    ('Adele', 'Someone Like You'),
+    ('Adele', 'Rolling in the Deep'),
+    ('The Beatles', 'Let It Be'),
+]
+
+def write_note(vault, artist, title, lyrics='la la la'):
+    path = os.path.join(vault, f"{title} - {artist}.md")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_note(title, artist, lyrics))
+    return path
+
+@pytest.fixture
+def vault(tmp_path):
+    vault_dir = tmp_path / 'vault'
+    vault_dir.mkdir()
+    for artist, title in SONGS:
+        write_note(str(vault_dir), artist, title)
+    return str(vault_dir)
+
+@pytest.fixture
+def index(vault, tmp_path):
+    index = VaultIndex(vault, str(tmp_path / 'index'))
+    index.refresh()
+    yield index
+    index.close()
+
+def test_fuzzy_title_search(index):
+    results = index.search('bohemian rapsody')
+    assert [(r['artist'], r['song']) for r in results] == [('Queen', 'Bohemian Rhapsody')]
+
+def test_artist_hint_ranks_matching_artist_first(index):
+    results = index.search('Adele - Someone Like You')
+    assert results[0]['song'] == 'Someone Like You'
+    assert index.search('nothing like this at all') == []
+
+def test_note_edited_in_place_is_reindexed(index, vault, monkeypatch):
+    path = os.path.join(vault, 'Let It Be - The Beatles.md')
+    dir_mtime = os.stat(vault).st_mtime
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_note('Hey Jude', 'The Beatles', 'na na na'))
+    # Rewriting a file in place leaves the directory's mtime alone
+    os.utime(vault, (dir_mtime, dir_mtime))
+
+    monkeypatch.setattr(vault_index, 'SWEEP_INTERVAL', 0)
+    assert index.refresh() == 1
+    assert [r['song'] for r in index.search('hey jude')] == ['Hey Jude']
+    assert index.search('let it be') == []
+
+def test_deleted_note_leaves_index(index, vault):
+    os.unlink(os.path.join(vault, 'Let It Be - The Beatles.md'))
+    index.refresh()
+    assert index.search('let it be') == []
+    assert index.count() == len(SONGS) - 1
+
+def test_index_with_older_layout_is_rebuilt(vault, tmp_path):
+    index = VaultIndex(vault, str(tmp_path / 'index'))
+    path = index.path
+    index.close()
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA user_version=1')
+    conn.commit()
+    conn.close()
+
+    index = VaultIndex(vault, str(tmp_path / 'index'))
+    try:
+        assert index.refresh() == len(SONGS)
+        assert index.search('rolling in the deep')[0]['artist'] == 'Adele'
+    finally:
+        index.close()
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from note_writer import NoteWriter, render_note
+from vault_sync import SyncNote, SyncState, VaultSync
+
+class FakeFetcher:
+    """
+    Answers every revalidation with the same upstream lyrics.
+    """
+    def __init__(self, lyrics):
+        self.lyrics = lyrics
+        self.writer = NoteWriter()
+        self.requests = []
+
+    def revalidate_lyrics(self, artist, song_title, etag=None, last_modified=None):
+        self.requests.append((artist, song_title, etag))
+        return 'found', self.lyrics, None, None
+
+@pytest.fixture
+def vault(tmp_path):
+    vault_dir = tmp_path / 'vault'
+    vault_dir.mkdir()
+    return str(vault_dir)
+
+@pytest.fixture
+def state(vault, tmp_path):
+    state = SyncState(vault, str(tmp_path / 'state'))
+    yield state
+    state.close()
+
+def write_note(vault, lyrics, title='Let It Be'):
+    path = os.path.join(vault, f'{title} - The Beatles.md')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_note(title, 'The Beatles', lyrics))
+    return path
+
+def read_lyrics(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def sync_all(state, fetcher, force=False):
+    sync = VaultSync(fetcher, state, max_age=0, force=force)
+    return {result.note.path: result.status for result in sync.run(sync.stale_notes(state.scan()))}
+
+def test_changed_upstream_lyrics_are_written(vault, state):
+    path = write_note(vault, 'old words')
+    state.scan()
+
+    assert sync_all(state, FakeFetcher('new words')) == {path: 'updated'}
+    assert 'new words' in read_lyrics(path)
+
+def test_hand_edited_note_is_kept(vault, state):
+    path = write_note(vault, 'fetched words')
+    state.scan()
+    write_note(vault, 'my own corrections')
+
+    fetcher = FakeFetcher('new words')
+    assert sync_all(state, fetcher) == {path: 'edited'}
+    assert fetcher.requests == []
+    assert 'my own corrections' in read_lyrics(path)
+
+def test_force_overwrites_hand_edited_note(vault, state):
+    path = write_note(vault, 'fetched words')
+    state.scan()
+    write_note(vault, 'my own corrections')
+
+    assert sync_all(state, FakeFetcher('new words'), force=True) == {path: 'updated'}
+    assert 'new words' in read_lyrics(path)
+    # Once overwritten the note counts as fetched again
+    assert sync_all(state, FakeFetcher('newer words')) == {path: 'updated'}
+
+def test_note_edited_during_the_request_is_kept(vault, state):
+    path = write_note(vault, 'fetched words')
+    state.scan()
+
+    class EditingFetcher(FakeFetcher):
+        def revalidate_lyrics(self, *args, **kwargs):
+            write_note(vault, 'typed while syncing')
+            return super().revalidate_lyrics(*args, **kwargs)
+
+    assert sync_all(state, EditingFetcher('new words')) == {path: 'edited'}
+    assert 'typed while syncing' in read_lyrics(path)
+
+def test_edited_notes_do_not_use_up_the_limit(vault, state):
+    edited = write_note(vault, 'fetched words', title='Edited')
+    fresh = write_note(vault, 'fetched words', title='Fresh')
+    state.scan()
+    write_note(vault, 'my own corrections', title='Edited')
+
+    sync = VaultSync(FakeFetcher('new words'), state, max_age=0, limit=1)
+    stale = sync.stale_notes(state.scan())
+    assert sorted(note.path for note in stale) == sorted([edited, fresh])
+
+def test_stopping_early_leaves_the_backlog_unrequested(tmp_path, state):
+    fetcher = FakeFetcher('new words')
+    notes = [SyncNote(str(tmp_path / f'{i}.md'), 'The Beatles', f'Song {i}', None, 0) for i in range(100)]
+    sync = VaultSync(fetcher, state, max_age=0, concurrency=4)
+
+    results = sync.run(notes)
+    next(results)
+    results.close()
+
+    # Only the refreshes running when the caller stopped were made
+    assert len(fetcher.requests) <= 8
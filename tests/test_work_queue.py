@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from work_queue import LEASE_EXPIRED_ERROR, WorkQueue
+
+@pytest.fixture
+def work_queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite3'), visibility_timeout=0.05, max_attempts=3)
+    yield queue
+    queue.close()
+
+def test_lease_fails_song_whose_workers_keep_crashing(work_queue):
+    work_queue.enqueue([('Queen', 'Bohemian Rhapsody')])
+
+    # Each worker leases the song and dies without completing or failing it
+    for attempt in range(1, 4):
+        job = work_queue.lease(f'worker-{attempt}')
+        assert job is not None
+        assert job.attempts == attempt
+        time.sleep(0.1)
+
+    assert work_queue.lease('worker-4') is None
+    assert work_queue.counts()['failed'] == 1
+    assert work_queue.is_drained()
+    error = work_queue._conn.execute('SELECT error FROM jobs').fetchone()[0]
+    assert error == LEASE_EXPIRED_ERROR
+
+def test_expired_lease_is_taken_over_before_the_limit(work_queue):
+    work_queue.enqueue([('Queen', 'Bohemian Rhapsody')])
+
+    stale = work_queue.lease('crashed')
+    time.sleep(0.1)
+    job = work_queue.lease('healthy')
+
+    assert job.attempts == 2
+    assert not work_queue.complete(stale, 'saved')
+    assert work_queue.complete(job, 'saved')
+    assert work_queue.counts()['done'] == 1
@@ -0,0 +1,154 @@
+"""
+Opt-in span tracing with Chrome trace-event export (`--trace out.json`).
+
+Code marks stages with `with span('name', key=value):`. While tracing is off,
+span() returns a shared no-op context manager, so an instrumented call costs a
+global lookup and a function call. After start_tracing(), every span is
+recorded as a complete ('X') trace event with its thread, and the trace can be
+written as JSON for chrome://tracing or https://ui.perfetto.dev.
+
+Spans entered inside an asyncio task are drawn on a track per task instead of
+per thread, so overlapping coroutines don't appear falsely nested.
+"""
+
+import os
+import sys
+import threading
+import time
+
+_tracer = None
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key, value):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'track', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.track = self.tracer.current_track()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self, end)
+        return False
+
+    def set(self, key, value):
+        """
+        Attach a value learned inside the span, e.g. the HTTP status.
+        """
+        self.args[key] = value
+
+class Tracer:
+    def __init__(self):
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._events = []
+        self._tracks = {}
+        self._lock = threading.Lock()
+
+    def current_track(self):
+        """
+        Return the trace thread id for the caller: its asyncio task, or its thread.
+        """
+        task = None
+        asyncio = sys.modules.get('asyncio')
+        if asyncio is not None:
+            try:
+                task = asyncio.current_task()
+            except RuntimeError:
+                task = None
+
+        key = task if task is not None else threading.get_ident()
+        track = self._tracks.get(key)
+        if track is None:
+            with self._lock:
+                track = self._tracks.get(key)
+                if track is None:
+                    track = len(self._tracks) + 1
+                    self._tracks[key] = track
+                    if task is not None:
+                        name = f"task {task.get_name()}" if hasattr(task, 'get_name') else f"task {track}"
+                    else:
+                        name = threading.current_thread().name
+                    self._events.append({
+                        'ph': 'M', 'name': 'thread_name', 'pid': self.pid, 'tid': track,
+                        'args': {'name': name},
+                    })
+        return track
+
+    def record(self, span, end):
+        event = {
+            'ph': 'X',
+            'name': span.name,
+            'pid': self.pid,
+            'tid': span.track,
+            'ts': round((span.start - self._origin) * 1e6, 1),
+            'dur': round((end - span.start) * 1e6, 1),
+        }
+        if span.args:
+            event['args'] = {key: _json_value(value) for key, value in span.args.items()}
+        with self._lock:
+            self._events.append(event)
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def write(self, path):
+        """
+        Write the trace in Chrome trace-event JSON format.
+        """
+        import json
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, f)
+
+def _json_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+def span(name, **args):
+    """
+    Context manager timing one stage; does nothing unless tracing is on.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return _Span(tracer, name, args)
+
+def start_tracing():
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def stop_tracing():
+    """
+    Stop recording and return the tracer with the spans collected so far.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def is_tracing():
+    return _tracer is not None
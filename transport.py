@@ -0,0 +1,260 @@
+"""
+Shared HTTP transport for all lyrics requests.
+
+One requests.Session per LyricsFetcher gives connection pooling and
+keep-alive, so the TCP+TLS handshake is paid once per host instead of once
+per request. Every GET goes through HttpTransport.get, which applies the
+rate limiter, waits out HTTP 429 responses, retries connection errors and
+gateway errors with jittered exponential backoff, and reports each attempt
+to the endpoint's health tracker.
+"""
+
+import random
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from endpoint_health import CircuitOpenError
+from metrics import HTTP_REQUESTS, HTTP_RETRIES, record_request
+from rate_limit import parse_retry_after
+from tracing import span
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_RATE_LIMIT_RETRIES = 3
+
+# Responses worth retrying: the upstream or a proxy in front of it hiccuped
+RETRY_STATUSES = (502, 503, 504)
+
+# Streamed probe bodies are read in chunks of this size (after decompression)
+PROBE_CHUNK_SIZE = 1024
+# Once a probe knows lyrics are there, bodies up to this size are read to the end
+# (cheaper than dropping a keep-alive connection, and the lyrics can be cached);
+# longer ones are abandoned
+PROBE_BODY_LIMIT = 16 * 1024
+
+class BodyProbe:
+    """
+    Reads a 200 response body incrementally until `decide(prefix)` reports lyrics.
+
+    `decide` returns True as soon as the bytes so far show usable lyrics, or
+    None if it can't tell yet. After a True, reading goes on only while the
+    body stays under `limit`. `complete` says whether the whole body was read.
+    """
+    def __init__(self, decide, limit=PROBE_BODY_LIMIT):
+        self.decide = decide
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        """
+        Forget everything read so far; each request attempt starts from an empty body.
+        """
+        self.chunks = []
+        self.size = 0
+        self.available = False
+        self.complete = False
+
+    def feed(self, chunk):
+        """
+        Add a chunk; returns True when the rest of the body should be abandoned.
+        """
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if not self.available:
+            self.available = bool(self.decide(b''.join(self.chunks)))
+        return self.available and self.size > self.limit
+
+    @property
+    def body(self):
+        return b''.join(self.chunks)
+
+def accept_encoding():
+    """
+    Return the Accept-Encoding header value, offering brotli only when it can be decoded.
+    """
+    encodings = ['gzip', 'deflate']
+    try:
+        import brotli  # noqa: F401
+        encodings.append('br')
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append('br')
+        except ImportError:
+            pass
+    return ', '.join(encodings)
+
+def backoff_delay(backoff, attempt):
+    """
+    Seconds to wait before retry number `attempt` (1-based).
+    """
+    # Full jitter keeps parallel workers from retrying in lockstep
+    return random.uniform(0, backoff * 2 ** (attempt - 1))
+
+def rate_limit_delay(retry_after, rate_limited):
+    """
+    Seconds to wait after an HTTP 429: the server's Retry-After, or exponential backoff.
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = 2 ** rate_limited
+    return delay
+
+def record_response(health, status_code, seconds):
+    """
+    Report a completed request to the endpoint's health tracker.
+    """
+    # Server errors count against the endpoint; 404s and 429s mean it is up
+    if status_code >= 500:
+        health.record_failure(seconds)
+    else:
+        health.record_success(seconds)
+
+def endpoint_name(url, health):
+    """
+    Name an endpoint for metrics: its provider name, or the URL's host.
+    """
+    if health is not None:
+        return health.name
+    return urlsplit(url).netloc
+
+def check_circuit(health, endpoint):
+    """
+    Fail fast if the endpoint's circuit is open, counting the refused request.
+    """
+    if health is None:
+        return
+    try:
+        health.before_request()
+    except CircuitOpenError:
+        HTTP_REQUESTS.inc(endpoint=endpoint, status='circuit_open')
+        raise
+
+class HttpTransport:
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 rate_limiter=None, max_rate_limit_retries=DEFAULT_RATE_LIMIT_RETRIES, log=None):
+        self.retries = retries
+        self.backoff = backoff
+        # Optional TokenBucket; HTTP 429 responses pause it for the server's Retry-After
+        self.rate_limiter = rate_limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self._log = log or (lambda message: None)
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.headers['Accept-Encoding'] = accept_encoding()
+
+        # Retries are handled here, not by urllib3, so they respect the rate limiter
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size), max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, timeout, headers=None, health=None, probe=None):
+        """
+        GET a URL and return the response.
+
+        With a BodyProbe, a 200 response is streamed into the probe instead of
+        read at once, and the transfer is dropped as soon as the probe has seen
+        enough; the body is then in the probe, not the response.
+
+        Raises the last exception if every retry failed, and CircuitOpenError
+        without sending anything if the endpoint's circuit is open.
+        """
+        endpoint = endpoint_name(url, health)
+        rate_limited = 0
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                with span('rate_limit_wait'):
+                    self.rate_limiter.acquire()
+
+            try:
+                response = self._send(url, timeout, headers, health, endpoint, probe)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                HTTP_RETRIES.inc(endpoint=endpoint, reason='error')
+                self._sleep_backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                response.close()
+                attempt += 1
+                HTTP_RETRIES.inc(endpoint=endpoint, reason='gateway')
+                self._sleep_backoff(attempt)
+                continue
+
+            if response.status_code == 429 and rate_limited < self.max_rate_limit_retries:
+                delay = rate_limit_delay(response.headers.get('Retry-After'), rate_limited)
+                rate_limited += 1
+                response.close()
+                HTTP_RETRIES.inc(endpoint=endpoint, reason='rate_limited')
+
+                self._log(f"⏳ Rate limited by API, waiting {delay:.0f}s")
+                if self.rate_limiter is not None:
+                    self.rate_limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            return response
+
+    def _send(self, url, timeout, headers, health, endpoint, probe=None):
+        """
+        Send a single request, checking and updating the endpoint's health and metrics.
+        """
+        check_circuit(health, endpoint)
+        with span('http_get', endpoint=endpoint, url=url) as http_span:
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout, stream=probe is not None)
+                nbytes = self._read_probe(response, probe) if probe is not None else len(response.content)
+            except Exception as e:
+                seconds = time.monotonic() - start
+                if health is not None:
+                    health.record_failure(seconds)
+                record_request(endpoint, 'timeout' if isinstance(e, requests.Timeout) else 'error', seconds)
+                raise
+
+            seconds = time.monotonic() - start
+            http_span.set('status', response.status_code)
+            if health is not None:
+                record_response(health, response.status_code, seconds)
+            record_request(endpoint, response.status_code, seconds, nbytes)
+            return response
+
+    def _read_probe(self, response, probe):
+        """
+        Stream a 200 body into the probe, closing the connection if it stops early.
+
+        Other responses are read whole as usual. Returns the number of body bytes read.
+        """
+        # A retried request must not append to the bytes of an attempt that failed mid-body
+        probe.reset()
+        if response.status_code != 200:
+            return len(response.content)
+
+        for chunk in response.iter_content(PROBE_CHUNK_SIZE):
+            if probe.feed(chunk):
+                # Unread data makes the connection unusable; don't return it to the pool
+                response.close()
+                return probe.size
+        probe.complete = True
+        return probe.size
+
+    def _sleep_backoff(self, attempt):
+        time.sleep(backoff_delay(self.backoff, attempt))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,373 @@
+"""
+Local index over the saved lyrics vault.
+
+Notes written by save_lyrics_to_file start with a '# title' line and an
+'**Artist:** name' line. The index keeps those headers, trigram postings for
+fuzzy title matching and a full-text table over the lyrics in a small SQLite
+database, so `search` can answer from disk before going to the network.
+
+The index is refreshed incrementally: only notes whose mtime or size changed
+are re-read. Adding, renaming or deleting a note changes the vault
+directory's mtime, which triggers a walk right away. Editing a note in
+place (as Obsidian does) doesn't, so the walk also runs whenever the last
+one is more than SWEEP_INTERVAL seconds old; such edits show up in search
+within that time.
+
+Trigram postings are keyed by (trigram, title length in trigrams), so a
+search only reads postings of titles whose length allows the required
+similarity, and counts shared trigrams in SQL without re-tokenizing any
+stored title.
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from lyrics_cache import default_cache_dir
+
+# Minimum similarity (0..1) for a fuzzy match to count as a hit
+DEFAULT_MIN_SCORE = 0.45
+
+# With an artist hint the score is weighted between title and artist similarity,
+# and titles only need to be this similar to be considered at all
+TITLE_WEIGHT = 0.6
+HINTED_TITLE_FLOOR = 0.25
+
+# Seconds between walks that catch notes edited in place
+SWEEP_INTERVAL = 30.0
+
+# Stored in PRAGMA user_version; an index with an older layout is rebuilt from the vault
+INDEX_VERSION = 2
+
+def normalize_text(text):
+    """
+    Lowercase and reduce text to letters, digits and single spaces.
+    """
+    return ' '.join(re.sub(r'[^\w]+', ' ', text.lower()).split())
+
+def trigrams(text):
+    """
+    Return the set of character trigrams of normalized text, padded at word edges.
+    """
+    text = normalize_text(text)
+    if not text:
+        return set()
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def trigram_similarity(grams_a, grams_b):
+    """
+    Jaccard similarity of two trigram sets.
+    """
+    if not grams_a or not grams_b:
+        return 0.0
+    shared = len(grams_a & grams_b)
+    return shared / (len(grams_a) + len(grams_b) - shared)
+
+def parse_note_text(text):
+    """
+    Parse a note written by save_lyrics_to_file into (title, artist, lyrics).
+
+    Missing fields come back as None.
+    """
+    title = None
+    artist = None
+    lines = text.split('\n')
+
+    for line in lines[:10]:
+        if title is None and line.startswith('# '):
+            title = line[2:].strip()
+        elif artist is None and line.startswith('**Artist:**'):
+            artist = line[len('**Artist:**'):].strip()
+
+    # Lyrics sit between the first and the last '---' separators
+    separators = [i for i, line in enumerate(lines) if line.strip() == '---']
+    if len(separators) >= 2:
+        lyrics = '\n'.join(lines[separators[0] + 1:separators[-1]]).strip()
+    elif separators:
+        lyrics = '\n'.join(lines[separators[0] + 1:]).strip()
+    else:
+        lyrics = None
+
+    return title, artist, lyrics
+
+class VaultIndex:
+    def __init__(self, vault_dir, index_dir=None):
+        self.vault_dir = os.path.abspath(os.path.expanduser(vault_dir))
+        index_dir = index_dir or default_cache_dir()
+        os.makedirs(index_dir, exist_ok=True)
+
+        # One database per vault, named after its path
+        digest = hashlib.sha1(self.vault_dir.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(index_dir, f"vault-{digest}.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] < INDEX_VERSION:
+            # The index only mirrors the vault, so older layouts are dropped and rebuilt
+            self._conn.executescript("""
+                DROP TABLE IF EXISTS notes;
+                DROP TABLE IF EXISTS grams;
+                DROP TABLE IF EXISTS meta;
+                DROP TABLE IF EXISTS lyrics_fts;
+            """)
+            self._conn.execute(f'PRAGMA user_version={INDEX_VERSION}')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS notes (
+                id            INTEGER PRIMARY KEY,
+                path          TEXT UNIQUE NOT NULL,
+                mtime         REAL NOT NULL,
+                size          INTEGER NOT NULL,
+                title         TEXT NOT NULL,
+                artist        TEXT NOT NULL,
+                lyrics        TEXT
+            );
+            CREATE TABLE IF NOT EXISTS grams (
+                gram        TEXT NOT NULL,
+                title_grams INTEGER NOT NULL,
+                note_id     INTEGER NOT NULL,
+                PRIMARY KEY (gram, title_grams, note_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS grams_note ON grams (note_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+        # Full-text search over lyrics needs FTS5; fall back to LIKE without it
+        try:
+            self._conn.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS lyrics_fts USING fts5(lyrics, tokenize="unicode61")'
+            )
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self._conn.commit()
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date with the vault and return the number of notes (re)indexed.
+        """
+        if not os.path.isdir(self.vault_dir):
+            return 0
+
+        dir_mtime = repr(os.stat(self.vault_dir).st_mtime)
+        with self._lock:
+            meta = dict(self._conn.execute("SELECT key, value FROM meta WHERE key IN ('dir_mtime', 'swept_at')"))
+            now = time.time()
+            swept_recently = 0 <= now - float(meta.get('swept_at', 0)) < SWEEP_INTERVAL
+            if not force and meta.get('dir_mtime') == dir_mtime and swept_recently:
+                return 0
+
+            known = {
+                path: (note_id, mtime, size)
+                for note_id, path, mtime, size in self._conn.execute(
+                    'SELECT id, path, mtime, size FROM notes'
+                )
+            }
+
+            updated = 0
+            seen = set()
+            with os.scandir(self.vault_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.lower().endswith('.md') or not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    seen.add(dir_entry.path)
+
+                    previous = known.get(dir_entry.path)
+                    if not force and previous and previous[1] == stat.st_mtime and previous[2] == stat.st_size:
+                        continue
+
+                    if previous:
+                        self._delete_note(previous[0])
+                    if self._add_note(dir_entry.path, stat):
+                        updated += 1
+
+            for path, (note_id, _, _) in known.items():
+                if path not in seen:
+                    self._delete_note(note_id)
+
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO meta VALUES (?, ?)', [('dir_mtime', dir_mtime), ('swept_at', repr(now))]
+            )
+            self._conn.commit()
+            return updated
+
+    def _add_note(self, path, stat):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return False
+
+        title, artist, lyrics = parse_note_text(text)
+        if not title or not artist:
+            return False
+
+        cursor = self._conn.execute(
+            'INSERT INTO notes (path, mtime, size, title, artist, lyrics) VALUES (?, ?, ?, ?, ?, ?)',
+            (path, stat.st_mtime, stat.st_size, title, artist, None if self.has_fts else lyrics)
+        )
+        note_id = cursor.lastrowid
+
+        # Titles get trigram postings; artists are only compared on matches
+        title_grams = trigrams(title)
+        self._conn.executemany(
+            'INSERT INTO grams VALUES (?, ?, ?)',
+            [(gram, len(title_grams), note_id) for gram in title_grams]
+        )
+        if self.has_fts and lyrics:
+            self._conn.execute('INSERT INTO lyrics_fts (rowid, lyrics) VALUES (?, ?)', (note_id, lyrics))
+        return True
+
+    def _delete_note(self, note_id):
+        self._conn.execute('DELETE FROM notes WHERE id = ?', (note_id,))
+        self._conn.execute('DELETE FROM grams WHERE note_id = ?', (note_id,))
+        if self.has_fts:
+            self._conn.execute('DELETE FROM lyrics_fts WHERE rowid = ?', (note_id,))
+
+    def _matches(self, grams, threshold):
+        """
+        Return (note id, similarity) for notes whose title is at least `threshold` similar to the query grams.
+
+        A title with n trigrams sharing s of the query's q has Jaccard
+        similarity s / (q + n - s), so only titles with threshold * q <= n <=
+        q / threshold can match. Postings are read for that range of lengths
+        only, and SQLite counts the shared trigrams per note.
+        """
+        size = len(grams)
+        placeholders = ','.join('?' * size)
+        rows = self._conn.execute(
+            f'SELECT note_id, title_grams, COUNT(*) AS shared FROM grams '
+            f'WHERE gram IN ({placeholders}) AND title_grams BETWEEN ? AND ? '
+            f'GROUP BY note_id HAVING shared * (1 + ?) >= ? * (? + title_grams) - 1e-9',
+            list(grams) + [math.ceil(threshold * size), math.floor(size / threshold), threshold, threshold, size]
+        )
+
+        matches = []
+        for note_id, title_size, shared in rows:
+            similarity = shared / (size + title_size - shared)
+            if similarity >= threshold:
+                matches.append((note_id, similarity))
+        return matches
+
+    def _notes(self, note_ids):
+        """
+        Yield (id, path, title, artist) rows for the given note ids.
+        """
+        for start in range(0, len(note_ids), 500):
+            chunk = note_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            yield from self._conn.execute(
+                f'SELECT id, path, title, artist FROM notes WHERE id IN ({placeholders})', chunk
+            )
+
+    def search(self, query, artist=None, limit=10, min_score=DEFAULT_MIN_SCORE):
+        """
+        Fuzzy-match saved notes by title (and artist, if given) and return result dicts.
+
+        Results use the same shape as LyricsFetcher.search_songs, with source
+        'vault', the note's path and its similarity score.
+        """
+        hypotheses = [(artist, query)]
+        if not artist:
+            # Same splits the network search uses
+            if ' - ' in query:
+                left, right = [p.strip() for p in query.split(' - ', 1)]
+                hypotheses += [(left, right), (right, left)]
+            elif ' by ' in query.lower():
+                song, by_artist = [p.strip() for p in re.split(r'(?i)\s+by\s+', query, maxsplit=1)]
+                hypotheses.append((by_artist, song))
+
+        best = {}
+        with self._lock:
+            for hint, title in hypotheses:
+                title_grams = trigrams(title)
+                if not title_grams:
+                    continue
+                hint_grams = trigrams(hint) if hint else None
+                threshold = HINTED_TITLE_FLOOR if hint_grams else min_score
+
+                matches = self._matches(title_grams, threshold)
+                if not hint_grams:
+                    # Without an artist to weigh in, only the `limit` best titles can be results
+                    matches = sorted(matches, key=lambda match: match[1], reverse=True)[:limit]
+                scores = dict(matches)
+
+                artist_scores = {}
+                for note_id, path, note_title, note_artist in self._notes(list(scores)):
+                    score = scores[note_id]
+                    if hint_grams:
+                        # Matches often share an artist; compare each one once
+                        if note_artist not in artist_scores:
+                            artist_scores[note_artist] = trigram_similarity(hint_grams, trigrams(note_artist))
+                        score = TITLE_WEIGHT * score + (1 - TITLE_WEIGHT) * artist_scores[note_artist]
+                    if score >= min_score and score > best.get(note_id, (0.0,))[0]:
+                        best[note_id] = (score, path, note_title, note_artist)
+
+        ranked = sorted(best.values(), key=lambda hit: hit[0], reverse=True)[:limit]
+        return [{
+            'artist': note_artist,
+            'song': note_title,
+            'confidence': 'high',
+            'source': 'vault',
+            'path': path,
+            'score': round(score, 3),
+        } for score, path, note_title, note_artist in ranked]
+
+    def search_lyrics(self, snippet, limit=10):
+        """
+        Full-text search over saved lyrics; returns dicts with artist, song, path and snippet.
+        """
+        results = []
+        with self._lock:
+            if self.has_fts:
+                # Quote each word so punctuation in the snippet isn't read as FTS syntax
+                terms = ' '.join('"' + word.replace('"', '""') + '"' for word in snippet.split())
+                if not terms:
+                    return []
+                rows = self._conn.execute(
+                    "SELECT n.path, n.title, n.artist, snippet(lyrics_fts, 0, '[', ']', '…', 12) "
+                    "FROM lyrics_fts JOIN notes n ON n.id = lyrics_fts.rowid "
+                    "WHERE lyrics_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (terms, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT path, title, artist, substr(lyrics, max(1, instr(lower(lyrics), lower(?)) - 40), 120) "
+                    "FROM notes WHERE lyrics LIKE ? LIMIT ?",
+                    (snippet, f"%{snippet}%", limit)
+                ).fetchall()
+
+        for path, title, artist, text in rows:
+            results.append({
+                'artist': artist,
+                'song': title,
+                'source': 'vault',
+                'path': path,
+                'snippet': ' '.join(text.split()),
+            })
+        return results
+
+    def entries(self):
+        """
+        Return (artist, title) pairs for every indexed note.
+        """
+        with self._lock:
+            return self._conn.execute('SELECT artist, title FROM notes').fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM notes').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
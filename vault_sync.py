@@ -0,0 +1,331 @@
+"""
+Incremental refresh of an existing lyrics vault (`lyrics-cli sync`).
+
+The vault is walked and each note's artist and title are recovered from the
+header written by save_lyrics_to_file. A small SQLite state database per
+vault remembers, for every note, when its lyrics were last fetched, a hash
+of those lyrics and the HTTP validators (ETag / Last-Modified) of the last
+answer. Notes that haven't changed on disk since the last sync are not
+re-read.
+
+Only notes older than the staleness window are re-fetched, oldest first and
+optionally capped per run, so a large vault is refreshed a slice at a time.
+Each note's window is stretched or shrunk by up to a quarter, derived from
+its path, so notes saved by the same batch don't all go stale on the same
+day. Providers that support conditional requests can answer 304; otherwise
+the fresh lyrics are hashed and the note is only rewritten if they differ.
+
+The state also keeps the hash of the lyrics sync (or the first scan) last
+saw written, so a note whose lyrics were edited by hand since then is
+reported and left alone instead of being overwritten, unless forced.
+"""
+
+import concurrent.futures
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from lyrics_cache import default_cache_dir
+from note_writer import render_note
+from vault_index import parse_note_text
+
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
+# Each note's staleness window is scaled into [1 - SPREAD, 1 + SPREAD)
+STALENESS_SPREAD = 0.25
+
+def parse_duration(text):
+    """
+    Parse a duration such as '45s', '90m', '12h', '30d' or '2w' into seconds; a bare number is days.
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        seconds = float(text[:-1]) * units[text[-1]]
+    else:
+        seconds = float(text) * units['d']
+
+    if seconds < 0:
+        raise ValueError("duration must not be negative")
+    return seconds
+
+def lyrics_hash(lyrics):
+    """
+    Hash of lyrics text, ignoring surrounding whitespace.
+    """
+    return hashlib.sha1((lyrics or '').strip().encode('utf-8')).hexdigest()
+
+def staleness_factor(path):
+    """
+    Stable per-note multiplier for the staleness window.
+    """
+    fraction = int(hashlib.sha1(path.encode('utf-8')).hexdigest()[:8], 16) / 0x100000000
+    return 1 - STALENESS_SPREAD + 2 * STALENESS_SPREAD * fraction
+
+def note_lyrics_hash(path):
+    """
+    Hash of the lyrics currently in a note file, or None if it can't be read.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    return lyrics_hash(parse_note_text(text)[2])
+
+class SyncNote:
+    def __init__(self, path, artist, song_title, lyrics_hash, fetched_at, etag=None, last_modified=None,
+                 written_hash=None):
+        self.path = path
+        self.artist = artist
+        self.song_title = song_title
+        # Lyrics in the note now, and lyrics as last written by a fetch
+        self.lyrics_hash = lyrics_hash
+        self.written_hash = written_hash or lyrics_hash
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def edited(self):
+        """
+        True if the note's lyrics were changed by hand since they were last written.
+        """
+        return self.lyrics_hash != self.written_hash
+
+class SyncState:
+    """
+    Per-vault record of fetch times, lyrics hashes and HTTP validators.
+    """
+    def __init__(self, vault_dir, state_dir=None):
+        self.vault_dir = os.path.abspath(os.path.expanduser(vault_dir))
+        state_dir = state_dir or default_cache_dir()
+        os.makedirs(state_dir, exist_ok=True)
+
+        # One database per vault, named after its path like the vault index
+        digest = hashlib.sha1(self.vault_dir.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(state_dir, f"sync-{digest}.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS notes (
+                path          TEXT PRIMARY KEY,
+                mtime         REAL NOT NULL,
+                size          INTEGER NOT NULL,
+                artist        TEXT NOT NULL,
+                song          TEXT NOT NULL,
+                lyrics_hash   TEXT NOT NULL,
+                fetched_at    REAL NOT NULL,
+                etag          TEXT,
+                last_modified TEXT,
+                written_hash  TEXT
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(notes)')]
+        if 'written_hash' not in columns:
+            # State from before edits were tracked: take the notes as they are now as written
+            self._conn.execute('ALTER TABLE notes ADD COLUMN written_hash TEXT')
+            self._conn.execute('UPDATE notes SET written_hash = lyrics_hash')
+        self._conn.commit()
+
+    def scan(self):
+        """
+        Walk the vault, update the state and return a SyncNote per parsable note.
+
+        Notes whose mtime and size match the state are not re-read. A note seen
+        for the first time counts as fetched when it was last modified.
+        """
+        if not os.path.isdir(self.vault_dir):
+            return []
+
+        with self._lock:
+            known = {
+                row[0]: row
+                for row in self._conn.execute(
+                    'SELECT path, mtime, size, artist, song, lyrics_hash, fetched_at, etag, last_modified, '
+                    'written_hash FROM notes'
+                )
+            }
+
+            notes = []
+            seen = set()
+            with os.scandir(self.vault_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.lower().endswith('.md') or not dir_entry.is_file():
+                        continue
+                    stat = dir_entry.stat()
+                    seen.add(dir_entry.path)
+
+                    row = known.get(dir_entry.path)
+                    if row is not None and row[1] == stat.st_mtime and row[2] == stat.st_size:
+                        notes.append(SyncNote(row[0], row[3], row[4], row[5], row[6], row[7], row[8], row[9]))
+                        continue
+
+                    note = self._read_note(dir_entry.path, stat, row)
+                    if note is not None:
+                        notes.append(note)
+
+            gone = [(path,) for path in known if path not in seen]
+            self._conn.executemany('DELETE FROM notes WHERE path = ?', gone)
+            self._conn.commit()
+            return notes
+
+    def _read_note(self, path, stat, row):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        title, artist, lyrics = parse_note_text(text)
+        if not title or not artist:
+            return None
+
+        # An edited note keeps its fetch time, validators and the hash of what was written
+        fetched_at = row[6] if row is not None else stat.st_mtime
+        etag, last_modified, written_hash = (row[7], row[8], row[9]) if row is not None else (None, None, None)
+        note = SyncNote(path, artist, title, lyrics_hash(lyrics), fetched_at, etag, last_modified, written_hash)
+        self._save(note, stat)
+        return note
+
+    def _save(self, note, stat):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO notes (path, mtime, size, artist, song, lyrics_hash, fetched_at, etag, '
+            'last_modified, written_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (note.path, stat.st_mtime, stat.st_size, note.artist, note.song_title,
+             note.lyrics_hash, note.fetched_at, note.etag, note.last_modified, note.written_hash)
+        )
+
+    def update(self, note):
+        """
+        Record a refreshed note, including its current mtime and size.
+        """
+        try:
+            stat = os.stat(note.path)
+        except OSError:
+            return
+        with self._lock:
+            self._save(note, stat)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SyncResult:
+    def __init__(self, note, status, error=None):
+        self.note = note
+        # 'updated', 'unchanged', 'not_modified', 'missing', 'edited' or 'error'
+        self.status = status
+        self.error = error
+
+class VaultSync:
+    def __init__(self, fetcher, state, max_age=DEFAULT_MAX_AGE, limit=None, concurrency=1, force=False):
+        self.fetcher = fetcher
+        self.state = state
+        self.max_age = max_age
+        self.limit = limit
+        self.concurrency = max(1, concurrency)
+        # Overwrite notes whose lyrics were edited by hand
+        self.force = force
+
+    def stale_notes(self, notes, now=None):
+        """
+        Return the notes due for a refresh, oldest first, capped at `limit` fetches.
+        """
+        now = time.time() if now is None else now
+        stale = [
+            note for note in notes
+            if now - note.fetched_at >= self.max_age * staleness_factor(note.path)
+        ]
+        stale.sort(key=lambda note: note.fetched_at)
+        if self.limit is None:
+            return stale
+
+        # Hand-edited notes are skipped without a request, so they don't use up the limit
+        capped = []
+        fetched = 0
+        for note in stale:
+            if note.edited and not self.force:
+                capped.append(note)
+            elif fetched < self.limit:
+                capped.append(note)
+                fetched += 1
+        return capped
+
+    def run(self, notes):
+        """
+        Refresh notes concurrently, yielding a SyncResult for each as it finishes.
+
+        Notes are submitted as workers free up, so Ctrl-C or a caller that stops
+        early only waits for the `concurrency` refreshes already running.
+        """
+        notes = iter(notes)
+        pending = set()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                while True:
+                    for note in itertools.islice(notes, self.concurrency - len(pending)):
+                        pending.add(executor.submit(self.refresh, note))
+                    if not pending:
+                        break
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def refresh(self, note):
+        """
+        Re-fetch one note's lyrics and rewrite the note only if they changed.
+
+        Notes edited by hand are skipped without a request unless `force` is set.
+        """
+        if note.edited and not self.force:
+            return SyncResult(note, 'edited')
+
+        # A 304 can't restore a hand-edited note, so forcing one asks for the full lyrics
+        etag, last_modified = (None, None) if note.edited else (note.etag, note.last_modified)
+        try:
+            status, lyrics, etag, last_modified = self.fetcher.revalidate_lyrics(
+                note.artist, note.song_title, etag, last_modified
+            )
+        except Exception as e:
+            return SyncResult(note, 'error', error=str(e))
+
+        note.fetched_at = time.time()
+        note.etag = etag
+        note.last_modified = last_modified
+        result_status = status
+
+        if status == 'not_found':
+            # The provider dropped the song; the saved note stays as it is
+            result_status = 'missing'
+        elif status == 'found':
+            new_hash = lyrics_hash(lyrics)
+            if new_hash == note.lyrics_hash:
+                result_status = 'unchanged'
+            elif not self.force and note_lyrics_hash(note.path) != note.lyrics_hash:
+                # Edited while the request was in flight
+                return SyncResult(note, 'edited')
+            else:
+                try:
+                    self.fetcher.writer.write(note.path, render_note(note.song_title, note.artist, lyrics))
+                except OSError as e:
+                    return SyncResult(note, 'error', error=f"could not write note: {e}")
+                note.lyrics_hash = new_hash
+                result_status = 'updated'
+            note.written_hash = new_hash
+
+        self.state.update(note)
+        return SyncResult(note, result_status)
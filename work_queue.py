@@ -0,0 +1,309 @@
+"""
+Durable work queue shared by `lyrics-cli enqueue` and `lyrics-cli worker`.
+
+`enqueue` adds songs to a SQLite queue file, once per canonical song key.
+Any number of `worker` processes, on one machine or several hosts sharing
+the file, lease songs from it, fetch them, write the notes (or pack rows)
+and mark the songs done. Each worker has its own rate limit, so adding hosts
+adds request budget.
+
+A lease hides a song from other workers for the visibility timeout. A worker
+that crashes or hangs simply stops completing its leases; once they expire
+the songs are leased again by whoever asks next. Every lease carries a new
+lease id, and a song is only marked done by the holder of its current
+lease, so each song's completion is recorded exactly once even if an
+expired lease's owner finishes late. Writes are idempotent (notes are
+replaced atomically and identical content isn't rewritten), so the rare
+double fetch leaves one note.
+
+Leasing and completing are short transactions that take SQLite's write
+lock, which serializes workers across processes. Across hosts the file must
+live on storage with working POSIX locks.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from lyrics_cache import default_cache_dir, normalize_key
+
+DEFAULT_VISIBILITY_TIMEOUT = 300.0  # 5 minutes
+DEFAULT_MAX_ATTEMPTS = 3
+# Failed songs wait RETRY_DELAY * 2^(attempts - 1) seconds before they can be leased again
+RETRY_DELAY = 30.0
+# How often an idle worker looks for new or expired leases
+POLL_INTERVAL = 2.0
+# Error recorded for songs whose leases kept expiring
+LEASE_EXPIRED_ERROR = 'lease expired too many times'
+# Songs inserted per enqueue transaction
+ENQUEUE_CHUNK = 5000
+
+# Job states; 'done' and 'failed' are final
+JOB_STATES = ('pending', 'leased', 'done', 'failed')
+
+def default_queue_path(cache_dir=None):
+    return os.path.join(cache_dir or default_cache_dir(), 'queue.sqlite3')
+
+def worker_name():
+    """
+    Identify this process in leases: host and pid.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class Job:
+    def __init__(self, job_id, artist, song_title, attempts, lease_id):
+        self.id = job_id
+        self.artist = artist
+        self.song_title = song_title
+        self.attempts = attempts
+        # Fencing token: only the current lease may complete the job
+        self.lease_id = lease_id
+
+class WorkQueue:
+    def __init__(self, path, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(1, max_attempts)
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Autocommit mode: every write below starts its own BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id            INTEGER PRIMARY KEY,
+                artist_key    TEXT NOT NULL,
+                song_key      TEXT NOT NULL,
+                artist        TEXT NOT NULL,
+                song          TEXT NOT NULL,
+                state         TEXT NOT NULL DEFAULT 'pending',
+                attempts      INTEGER NOT NULL DEFAULT 0,
+                lease_id      INTEGER NOT NULL DEFAULT 0,
+                lease_owner   TEXT,
+                available_at  REAL NOT NULL,
+                lease_expires REAL,
+                enqueued_at   REAL NOT NULL,
+                finished_at   REAL,
+                result        TEXT,
+                path          TEXT,
+                error         TEXT,
+                UNIQUE (artist_key, song_key)
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at)')
+
+    def _write(self, work):
+        """
+        Run `work(conn)` in an immediate transaction, holding the database write lock.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def enqueue(self, songs, requeue=False):
+        """
+        Add (artist, song) pairs from any iterable; returns (added, already queued).
+
+        A song already in the queue is left alone unless `requeue` is set, which
+        makes finished and failed songs pending again. Songs are inserted in
+        chunks, so huge inputs neither sit in memory nor hold the lock for long.
+        """
+        added = total = 0
+        chunk = []
+        for artist, song_title in songs:
+            chunk.append((artist, song_title))
+            if len(chunk) >= ENQUEUE_CHUNK:
+                added += self._enqueue_chunk(chunk, requeue)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            added += self._enqueue_chunk(chunk, requeue)
+            total += len(chunk)
+        return added, total - added
+
+    def _enqueue_chunk(self, songs, requeue):
+        now = time.time()
+        rows = []
+        for artist, song_title in songs:
+            artist_key, song_key = normalize_key(artist, song_title)
+            rows.append((artist_key, song_key, artist.strip(), song_title.strip(), now, now))
+
+        def work(conn):
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO jobs (artist_key, song_key, artist, song, available_at, enqueued_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            added = conn.total_changes - before
+            if requeue:
+                conn.executemany(
+                    "UPDATE jobs SET state = 'pending', attempts = 0, available_at = ?, result = NULL, "
+                    "error = NULL, finished_at = NULL WHERE artist_key = ? AND song_key = ? "
+                    "AND state IN ('done', 'failed')",
+                    [(now, row[0], row[1]) for row in rows]
+                )
+            return added
+
+        return self._write(work)
+
+    def lease(self, owner):
+        """
+        Lease the oldest available song, or return None if none is available.
+
+        Pending songs whose retry delay has passed and leased songs whose lease
+        expired are both available. An expired lease counts as a failed attempt:
+        a song whose worker crashed or hung max_attempts times is failed instead
+        of being handed out again, so one poison song can't take down every worker.
+        """
+        def work(conn):
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', error = ?, finished_at = ?, lease_expires = NULL "
+                "WHERE state = 'leased' AND lease_expires <= ? AND attempts >= ?",
+                (LEASE_EXPIRED_ERROR, now, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, artist, song, attempts, lease_id FROM jobs "
+                "WHERE (state = 'pending' AND available_at <= ?) OR (state = 'leased' AND lease_expires <= ?) "
+                "ORDER BY available_at, id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job(row[0], row[1], row[2], row[3] + 1, row[4] + 1)
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', attempts = ?, lease_id = ?, lease_owner = ?, "
+                "lease_expires = ? WHERE id = ?",
+                (job.attempts, job.lease_id, owner, now + self.visibility_timeout, job.id)
+            )
+            return job
+
+        return self._write(work)
+
+    def complete(self, job, result, path=None):
+        """
+        Mark a leased song done; returns False if the lease expired and was taken over.
+        """
+        def work(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'done', result = ?, path = ?, error = NULL, finished_at = ?, "
+                "lease_expires = NULL WHERE id = ? AND lease_id = ? AND state = 'leased'",
+                (result, path, time.time(), job.id, job.lease_id)
+            )
+            return cursor.rowcount == 1
+
+        return self._write(work)
+
+    def fail(self, job, error):
+        """
+        Give a leased song back for a later retry, or fail it for good after max_attempts.
+
+        Returns the new state ('pending' or 'failed'), or None if the lease was lost.
+        """
+        final = job.attempts >= self.max_attempts
+        state = 'failed' if final else 'pending'
+
+        def work(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, available_at = ?, lease_expires = NULL, "
+                "finished_at = ? WHERE id = ? AND lease_id = ? AND state = 'leased'",
+                (state, error, now + RETRY_DELAY * 2 ** (job.attempts - 1),
+                 now if final else None, job.id, job.lease_id)
+            )
+            return state if cursor.rowcount == 1 else None
+
+        return self._write(work)
+
+    def counts(self):
+        """
+        Return {state: number of songs} for every state.
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall()
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update(rows)
+        return counts
+
+    def is_drained(self):
+        """
+        True once no song is pending or leased, i.e. nothing can still become available.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE state IN ('pending', 'leased') LIMIT 1"
+            ).fetchone()
+        return row is None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class QueueWorker:
+    """
+    Lease songs from a WorkQueue and run them through a BatchRunner until the queue drains.
+    """
+    def __init__(self, work_queue, runner, concurrency=1, wait=False, owner=None):
+        self.queue = work_queue
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        # Keep polling for new songs after the queue drains, instead of exiting
+        self.wait = wait
+        self.owner = owner or worker_name()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, report=None):
+        """
+        Process songs on `concurrency` threads; `report(job, result, outcome)` is called for each.
+
+        `outcome` is 'done', 'retry', 'failed' or 'lost' (the lease expired first).
+        """
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{self.owner}/{i}", report), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.2)
+        finally:
+            self._stop.set()
+
+    def _loop(self, owner, report):
+        from batch_runner import BatchEntry
+
+        while not self._stop.is_set():
+            job = self.queue.lease(owner)
+            if job is None:
+                if not self.wait and self.queue.is_drained():
+                    return
+                # Other workers still hold leases; theirs may expire and come back to us
+                self._stop.wait(POLL_INTERVAL)
+                continue
+
+            result = self.runner.process(BatchEntry(job.id, job.artist, job.song_title))
+            if result.status in ('saved', 'exists', 'not_found'):
+                outcome = 'done' if self.queue.complete(job, result.status, result.path) else 'lost'
+            else:
+                state = self.queue.fail(job, result.error or result.status)
+                outcome = {'pending': 'retry', 'failed': 'failed', None: 'lost'}[state]
+
+            if report is not None:
+                report(job, result, outcome)